@@ -0,0 +1,159 @@
+import copy
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from dataaudit.caches import is_shared
+from . import metrics
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case so trivially different inputs share a key."""
+    return _WHITESPACE_RE.sub(' ', text or '').strip().lower()
+
+
+def make_key(model: str, kind: str, *parts: str) -> str:
+    """Content-addressed key for one rendered prompt run against one model."""
+    digest = hashlib.sha256()
+    for part in (model, kind, *parts):
+        digest.update(normalize_text(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return f"ai:{kind}:{digest.hexdigest()}"
+
+
+class LocalTier:
+    """In-process LRU tier with per-entry TTL, bounded by entry count."""
+
+    name = 'local'
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(value)
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoCacheTier:
+    """Shared tier backed by one of the aliases in settings.CACHES."""
+
+    name = 'shared'
+
+    def __init__(self, ttl: int, alias: str = 'default'):
+        self.ttl = ttl
+        self.alias = alias
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def get(self, key: str):
+        return self.backend.get(key)
+
+    def set(self, key: str, value) -> None:
+        self.backend.set(key, value, timeout=self.ttl)
+
+    def clear(self) -> None:
+        # Shared entries expire on their own; clearing the whole alias would
+        # drop unrelated data such as sessions stored in the same backend.
+        pass
+
+
+class ResultCache:
+    """
+    Read-through cache for LLM results, checked tier by tier (fastest first).
+    A hit in a slower tier is promoted into every faster one.
+    """
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        self._lock = threading.Lock()
+        self._hits = {tier.name: 0 for tier in self.tiers}
+        self._misses = 0
+
+    def get(self, key: str):
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster in self.tiers[:index]:
+                    faster.set(key, value)
+                with self._lock:
+                    self._hits[tier.name] += 1
+                metrics.CACHE_LOOKUPS.inc(result='hit', tier=tier.name)
+                return value
+        with self._lock:
+            self._misses += 1
+        metrics.CACHE_LOOKUPS.inc(result='miss', tier='none')
+        return None
+
+    def set(self, key: str, value) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = dict(self._hits)
+            misses = self._misses
+        lookups = sum(hits.values()) + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(sum(hits.values()) / lookups, 4) if lookups else 0.0,
+            'local_entries': sum(len(t) for t in self.tiers if isinstance(t, LocalTier)),
+        }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide result cache configured from the AI_RESULT_CACHE_* settings."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                ttl = settings.AI_RESULT_CACHE_TTL
+                tiers = [LocalTier(ttl, settings.AI_RESULT_CACHE_MAX_ENTRIES)]
+                # A process-local alias would only duplicate the LocalTier.
+                if settings.AI_RESULT_CACHE_ALIAS and is_shared(settings.AI_RESULT_CACHE_ALIAS):
+                    tiers.append(DjangoCacheTier(ttl, settings.AI_RESULT_CACHE_ALIAS))
+                _result_cache = ResultCache(tiers)
+    return _result_cache
@@ -0,0 +1,185 @@
+"""
+Local, offline ATS keyword matcher.
+
+Scores a resume against a job description with weighted sparse term vectors
+(dicts of term -> count). Term frequency is damped logarithmically and known
+skills from SKILL_TERMS weigh more than ordinary words. No network is
+needed, so the engine can use it as a fast path, as a pre-filter before the
+LLM, and as the fallback when the LLM is unavailable.
+"""
+import math
+import re
+from collections import Counter
+
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.-]*")
+
+# Canonical spelling for common variants, applied before any matching.
+ALIASES = {
+    'k8s': 'kubernetes',
+    'js': 'javascript',
+    'ts': 'typescript',
+    'postgres': 'postgresql',
+    'nodejs': 'node.js',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'gcp': 'google cloud',
+    'cicd': 'ci/cd',
+    'py': 'python',
+}
+
+# Variants that are also everyday words ("ready to go", "a cluster node").
+# They are only resolved next to another skill, as in "Go, Rust and Docker".
+CONTEXT_ALIASES = {
+    'go': 'golang',
+    'node': 'node.js',
+}
+CONTEXT_WINDOW = 2
+
+SKILL_TERMS = frozenset({
+    # Languages
+    'python', 'java', 'javascript', 'typescript', 'golang', 'rust', 'c++', 'c#', 'ruby', 'php',
+    'kotlin', 'swift', 'scala', 'sql', 'bash',
+    # Frameworks and libraries
+    'django', 'flask', 'fastapi', 'react', 'vue', 'angular', 'node.js', 'spring',
+    'rails', 'next.js', 'tailwind', 'pandas', 'numpy', 'pytorch', 'tensorflow', 'scikit-learn',
+    'graphql', 'grpc', 'rest api', 'restful', 'celery',
+    # Data and infrastructure
+    'postgresql', 'mysql', 'sqlite', 'mongodb', 'redis', 'elasticsearch', 'kafka', 'rabbitmq',
+    'docker', 'kubernetes', 'terraform', 'ansible', 'aws', 'azure', 'google cloud', 'linux',
+    'nginx', 'gunicorn', 'ci/cd', 'git', 'github actions', 'jenkins', 'microservices',
+    'serverless', 'spark', 'airflow', 'snowflake',
+    # Practices
+    'machine learning', 'deep learning', 'artificial intelligence', 'data engineering',
+    'system design', 'distributed systems', 'unit testing', 'test automation', 'agile', 'scrum',
+    'devops', 'observability', 'security', 'performance tuning', 'api design', 'llm',
+})
+
+# Multi-word skills, matched as phrases over the token stream.
+_PHRASES = {tuple(term.split()) for term in SKILL_TERMS if ' ' in term}
+_MAX_PHRASE = max((len(p) for p in _PHRASES), default=1)
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be been being below between both but by
+can could did do does doing down during each etc few for from further had has have having he her
+here hers him his how i if in into is it its itself just me more most my no nor not now of off on
+once only or other our ours out over own same she should so some such than that the their theirs
+them then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours
+ability able across experience experienced work working team teams strong years year role
+responsibilities requirements required preferred plus including include candidate job looking
+join company environment skills skill knowledge understanding using use used good great excellent
+new well within must may etc
+""".split())
+
+SKILL_WEIGHT = 3.0
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased tokens with aliases resolved and trailing punctuation removed."""
+    text = (text or '').lower().replace('ci/cd', 'cicd')
+    tokens = []
+    for raw in TOKEN_RE.findall(text):
+        token = raw.rstrip('.-')
+        if token:
+            tokens.append(ALIASES.get(token, token))
+    for i, token in enumerate(tokens):
+        if token in CONTEXT_ALIASES:
+            neighbours = tokens[max(i - CONTEXT_WINDOW, 0):i] + tokens[i + 1:i + 1 + CONTEXT_WINDOW]
+            if any(other in SKILL_TERMS for other in neighbours):
+                tokens[i] = CONTEXT_ALIASES[token]
+    return tokens
+
+
+def term_vector(text: str) -> dict:
+    """Sparse term-count vector: skill phrases plus content words."""
+    tokens = tokenize(text)
+    counts = Counter()
+    i = 0
+    while i < len(tokens):
+        for size in range(_MAX_PHRASE, 1, -1):
+            phrase = tuple(tokens[i:i + size])
+            if len(phrase) == size and phrase in _PHRASES:
+                counts[' '.join(phrase)] += 1
+                i += size
+                break
+        else:
+            token = tokens[i]
+            if token in SKILL_TERMS or (len(token) > 2 and token not in STOPWORDS and not token.isdigit()):
+                counts[token] += 1
+            i += 1
+    return dict(counts)
+
+
+def _weight(term: str, count: int) -> float:
+    # Sub-linear term frequency, boosted for dictionary skills.
+    tf = 1.0 + math.log(count)
+    return tf * (SKILL_WEIGHT if term in SKILL_TERMS else 1.0)
+
+
+_NUMBER_RE = re.compile(r'\d')
+
+
+def _impact_score(resume_text: str) -> int:
+    """Share of resume lines that carry a concrete number, scaled to 0-100."""
+    lines = [line for line in (resume_text or '').splitlines() if len(line.split()) >= 4]
+    if not lines:
+        return 0
+    quantified = sum(1 for line in lines if _NUMBER_RE.search(line))
+    return min(100, round(40 + 60 * quantified / len(lines)))
+
+
+def local_ats_score(resume_text: str, job_description: str, resume_terms: dict = None) -> dict:
+    """
+    Score resume_text against job_description without calling the LLM.
+    Returns the same keys as AICareerEngine.get_ats_score, plus "source": "local".
+    resume_terms may be a precomputed term_vector(resume_text).
+    """
+    resume_terms = resume_terms if resume_terms is not None else term_vector(resume_text)
+    job_terms = term_vector(job_description)
+
+    total = matched = 0.0
+    skill_total = skill_matched = 0.0
+    missing = []
+    for term, count in job_terms.items():
+        weight = _weight(term, count)
+        total += weight
+        present = term in resume_terms
+        if present:
+            matched += weight
+        if term in SKILL_TERMS:
+            skill_total += weight
+            if present:
+                skill_matched += weight
+            else:
+                missing.append((weight, term))
+
+    if not total:
+        coverage = 0.0
+    elif skill_total:
+        # Skills decide most of the score; general vocabulary overlap breaks ties.
+        coverage = 0.75 * (skill_matched / skill_total) + 0.25 * (matched / total)
+    else:
+        coverage = matched / total
+    score = round(100 * coverage)
+
+    missing.sort(key=lambda item: (-item[0], item[1]))
+    missing_keywords = [term for _, term in missing[:10]]
+    impact = _impact_score(resume_text)
+
+    suggestions = [f"Add concrete experience with {term}" for term in missing_keywords[:3]]
+    if impact < 60:
+        suggestions.append("Quantify key achievements with metrics")
+
+    return {
+        "score": score,
+        "impact_score": impact,
+        "missing_keywords": missing_keywords,
+        "improvement_suggestions": suggestions,
+        "feedback": f"Keyword match covers {score}% of the job description's weighted terms.",
+        "source": "local",
+    }
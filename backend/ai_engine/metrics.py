@@ -0,0 +1,170 @@
+"""
+In-process metrics for LLM calls, rendered in the Prometheus text format.
+
+Counters and histograms live in this worker process only. Every gunicorn
+worker keeps its own registry, and a scrape reports whichever worker
+answered. Each metric also carries enough label detail to be useful on its
+own. Every call is additionally written as one JSON log line on the
+"ai_engine.calls" logger, so per-call records can be aggregated across
+workers by the log pipeline.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+call_logger = logging.getLogger('ai_engine.calls')
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for key, value in labels
+    )
+    return '{' + body + '}'
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((key, dict(series, counts=list(series['counts']))) for key, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series['counts']):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f"{self.name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {series['sum']}"
+            yield f"{self.name}_count{_format_labels(labels)} {series['count']}"
+
+
+LLM_REQUESTS = Counter('ai_llm_requests_total', "LLM calls by prompt kind and outcome.")
+LLM_ERRORS = Counter('ai_llm_errors_total', "Failed LLM calls by prompt kind and exception class.")
+LLM_LATENCY = Histogram(
+    'ai_llm_request_duration_seconds', "Wall-clock latency of LLM calls.",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+LLM_TOKENS = Counter('ai_llm_tokens_total', "Tokens sent to and received from the LLM, by direction.")
+LLM_PROMPT_TOKENS = Histogram(
+    'ai_llm_prompt_tokens', "Prompt size per LLM call in tokens.",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000),
+)
+LLM_RETRIES = Counter('ai_llm_retries_total', "LLM calls retried after a failure.")
+LLM_HEDGES = Counter('ai_llm_hedges_total', "Hedged second attempts started after AI_HEDGE_AFTER seconds.")
+CIRCUIT_TRANSITIONS = Counter('ai_circuit_transitions_total', "Circuit breaker state changes by new state.")
+FALLBACKS = Counter('ai_fallbacks_total', "Results served by the local scorer or canned fallback instead of the LLM.")
+CACHE_LOOKUPS = Counter('ai_cache_lookups_total', "Result cache lookups by outcome.")
+
+REGISTRY = (
+    LLM_REQUESTS, LLM_ERRORS, LLM_LATENCY, LLM_TOKENS, LLM_PROMPT_TOKENS,
+    LLM_RETRIES, LLM_HEDGES, CIRCUIT_TRANSITIONS, FALLBACKS, CACHE_LOOKUPS,
+)
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class CallRecord:
+    """Mutable per-call record filled in while an LLM call is in flight."""
+
+    def __init__(self, kind: str, model: str, stream: bool):
+        self.kind = kind
+        self.model = model
+        self.stream = stream
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+@contextmanager
+def track_call(kind: str, model: str, stream: bool = False):
+    """
+    Time one LLM call and record latency, tokens and outcome when it ends.
+    A streamed call whose consumer stops early (an SSE client disconnecting
+    closes the generator) is recorded as 'cancelled'.
+    """
+    record = CallRecord(kind, model, stream)
+    started = time.perf_counter()
+    error = None
+    cancelled = False
+    try:
+        yield record
+    except GeneratorExit:
+        cancelled = True
+        raise
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        outcome = 'error' if error else 'cancelled' if cancelled else 'success'
+        LLM_REQUESTS.inc(kind=kind, outcome=outcome)
+        LLM_LATENCY.observe(elapsed, kind=kind)
+        LLM_PROMPT_TOKENS.observe(record.prompt_tokens, kind=kind)
+        LLM_TOKENS.inc(record.prompt_tokens, kind=kind, direction='prompt')
+        LLM_TOKENS.inc(record.completion_tokens, kind=kind, direction='completion')
+        if error:
+            LLM_ERRORS.inc(kind=kind, error=error)
+        call_logger.info(json.dumps({
+            'event': 'llm_call',
+            'kind': kind,
+            'model': model,
+            'stream': stream,
+            'outcome': outcome,
+            'error': error,
+            'latency_ms': round(elapsed * 1000, 1),
+            'prompt_tokens': record.prompt_tokens,
+            'completion_tokens': record.completion_tokens,
+        }))
@@ -0,0 +1,77 @@
+"""
+Prompt-size budgeting for LLM calls.
+
+User-supplied text (pasted job postings, resume dumps, LinkedIn profiles) is
+compacted before it is embedded in a prompt. Markup and entities are
+stripped, whitespace is collapsed, repeated and boilerplate lines are
+dropped, and the text is truncated to a token budget. Token counts come from
+a fast regex estimator that splits text roughly the way BPE tokenizers do. It
+is close enough for budgeting and needs no tokenizer download.
+"""
+import html
+import re
+
+
+_PIECE_RE = re.compile(r"\w{1,4}|[^\w\s]")
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"[ \t\f\v\xa0]+")
+_BULLET_RE = re.compile(r"^[\-\*•●▪>]+\s*")
+
+# Lines containing any of these are legal/HR boilerplate that never changes a score.
+BOILERPLATE_MARKERS = (
+    'equal opportunity employer',
+    'reasonable accommodation',
+    'without regard to race',
+    'e-verify',
+    'privacy notice',
+    'privacy policy',
+    'cookie',
+    'apply now',
+    'share this job',
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count of text."""
+    return len(_PIECE_RE.findall(text or ''))
+
+
+def compact_text(text: str) -> str:
+    """Strip markup, collapse whitespace and drop duplicate or boilerplate lines."""
+    text = html.unescape(_TAG_RE.sub('\n', text or ''))
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = _SPACE_RE.sub(' ', line).strip()
+        if not line:
+            continue
+        key = _BULLET_RE.sub('', line).lower()
+        if key in seen or any(marker in key for marker in BOILERPLATE_MARKERS):
+            continue
+        seen.add(key)
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """Keep whole lines from the top of text until the token budget is spent."""
+    if estimate_tokens(text) <= budget:
+        return text
+    kept, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            remaining = budget - used
+            if remaining > 8:
+                # Cut the final line at a piece boundary rather than dropping it.
+                pieces = list(_PIECE_RE.finditer(line))
+                kept.append(line[:pieces[remaining - 1].end()] if len(pieces) >= remaining else line)
+            break
+        kept.append(line)
+        used += cost
+    return '\n'.join(kept)
+
+
+def fit(text: str, budget: int) -> str:
+    """Compact text and truncate it to at most roughly budget tokens."""
+    return truncate_to_budget(compact_text(text), budget)
@@ -0,0 +1,227 @@
+"""
+Failure handling for LLM calls: deadlines, retries, hedging and a circuit breaker.
+
+Every call gets one overall deadline (AI_CALL_DEADLINE). Retries, backoff
+sleeps and hedged attempts all spend from that same budget, so a slow
+provider can never pin a gunicorn worker until its 120 s timeout. When
+recent calls fail too often (timeouts, connection errors, 429 and 5xx;
+client errors such as a bad request do not count), the circuit breaker
+opens and rejects calls outright with CircuitOpenError. The engine then serves its local fallback
+immediately instead of waiting on a provider that is already failing.
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import groq
+import httpx
+from django.conf import settings
+
+from . import metrics
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The overall call deadline ran out before a successful attempt."""
+
+
+RETRYABLE_ERRORS = (
+    groq.APITimeoutError,
+    groq.APIConnectionError,
+    groq.RateLimitError,
+    groq.InternalServerError,
+    httpx.TimeoutException,
+    httpx.TransportError,
+)
+
+
+def is_retryable(exc: Exception) -> bool:
+    return isinstance(exc, RETRYABLE_ERRORS)
+
+
+def is_provider_failure(exc: Exception) -> bool:
+    """
+    Whether exc says the provider is unhealthy. Client errors (bad request,
+    auth) say nothing about the provider, so the breaker does not count them.
+    """
+    if isinstance(exc, (DeadlineExceeded,) + RETRYABLE_ERRORS):
+        return True
+    return isinstance(exc, groq.APIStatusError) and exc.status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Error-rate breaker over the last `window` calls.
+
+    CLOSED: calls pass; opens once at least `min_calls` outcomes are recorded
+    and the failure share reaches `failure_rate`.
+    OPEN: calls fail fast until `reset_after` seconds have passed.
+    HALF_OPEN: a single trial call is let through; its outcome closes or
+    re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_rate: float, min_calls: int, window: int, reset_after: float):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_after = reset_after
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        metrics.CIRCUIT_TRANSITIONS.inc(state=state)
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_after:
+                    raise CircuitOpenError("LLM circuit breaker is open")
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError("LLM circuit breaker is half-open")
+                self._trial_in_flight = True
+
+    def release(self) -> None:
+        """End a call without counting its outcome, e.g. a client error."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                self._outcomes.clear()
+                if success:
+                    self._transition(self.CLOSED)
+                else:
+                    self._opened_at = time.monotonic()
+                    self._transition(self.OPEN)
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (self.state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+
+_hedge_pool = None
+_hedge_pool_pid = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    """This process's pool for hedged second attempts, re-created after a fork."""
+    global _hedge_pool, _hedge_pool_pid
+    pid = os.getpid()
+    if _hedge_pool is None or _hedge_pool_pid != pid:
+        with _hedge_pool_lock:
+            if _hedge_pool is None or _hedge_pool_pid != pid:
+                _hedge_pool = ThreadPoolExecutor(max_workers=settings.AI_HEDGE_POOL_SIZE, thread_name_prefix='llm-hedge')
+                _hedge_pool_pid = pid
+    return _hedge_pool
+
+
+def _hedged(fn, timeout: float, hedge_after: float):
+    """
+    Run fn(timeout) on the calling thread and, if it has not finished after
+    hedge_after seconds, start a second copy on the hedge pool. A primary
+    success is returned at once. If the primary fails, the copy already in
+    flight is awaited for what is left of the deadline instead of starting a
+    retry from scratch. The pool only ever runs second copies, so a busy
+    pool never delays a first attempt; a full one just queues the copy.
+    """
+    started = time.monotonic()
+    lock = threading.Lock()
+    state = {'settled': False, 'hedge': None}
+
+    def launch():
+        with lock:
+            if state['settled']:
+                return
+            metrics.LLM_HEDGES.inc()
+            remaining = max(timeout - (time.monotonic() - started), 0.001)
+            state['hedge'] = _get_hedge_pool().submit(fn, remaining)
+
+    timer = threading.Timer(hedge_after, launch)
+    timer.daemon = True
+    timer.start()
+    try:
+        return fn(timeout)
+    except Exception as error:
+        with lock:
+            state['settled'] = True
+            hedge = state['hedge']
+        if hedge is None:
+            raise
+        try:
+            return hedge.result(timeout=max(timeout - (time.monotonic() - started), 0))
+        except FutureTimeoutError:
+            raise DeadlineExceeded(f"LLM call exceeded {timeout:.1f}s") from error
+        except Exception:
+            raise error
+    finally:
+        with lock:
+            state['settled'] = True
+        timer.cancel()
+
+
+class CallPolicy:
+    """Applies the breaker, deadline, retry and hedging settings to one LLM call."""
+
+    def __init__(self, breaker: CircuitBreaker = None):
+        self.breaker = breaker or CircuitBreaker(
+            failure_rate=settings.AI_BREAKER_FAILURE_RATE,
+            min_calls=settings.AI_BREAKER_MIN_CALLS,
+            window=settings.AI_BREAKER_WINDOW,
+            reset_after=settings.AI_BREAKER_RESET_AFTER,
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(settings.AI_RETRY_BASE_DELAY * (2 ** attempt), settings.AI_RETRY_MAX_DELAY)
+        return delay * random.uniform(0.5, 1.0)
+
+    def execute(self, fn, kind: str = 'chat', hedge: bool = True):
+        """
+        Call fn(timeout) under the policy. timeout is the number of seconds
+        left on the overall deadline, for fn to pass on to the HTTP client.
+        """
+        deadline = time.monotonic() + settings.AI_CALL_DEADLINE
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"LLM call exceeded {settings.AI_CALL_DEADLINE}s")
+                if hedge and 0 < settings.AI_HEDGE_AFTER < remaining:
+                    result = _hedged(fn, remaining, settings.AI_HEDGE_AFTER)
+                else:
+                    result = fn(remaining)
+            except Exception as e:
+                if is_provider_failure(e):
+                    self.breaker.record(False)
+                else:
+                    self.breaker.release()
+                attempt += 1
+                delay = self._backoff(attempt - 1)
+                if (not is_retryable(e) or attempt >= settings.AI_RETRY_ATTEMPTS
+                        or time.monotonic() + delay >= deadline):
+                    raise
+                metrics.LLM_RETRIES.inc(kind=kind)
+                time.sleep(delay)
+                continue
+            self.breaker.record(True)
+            return result
@@ -1,17 +1,55 @@
 import os
 import json
-from groq import Groq
+import logging
+import threading
+from typing import Iterator
+import httpx
+from django.conf import settings
+from groq import DefaultHttpxClient, Groq
+from . import metrics
+from .cache import get_result_cache, make_key
+from .keywords import local_ats_score
+from .prompting import estimate_tokens, fit
+from .resilience import CallPolicy, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+def build_client(api_key: str) -> Groq:
+    """Groq client on a keep-alive connection pool sized from settings."""
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.GROQ_POOL_SIZE,
+            max_keepalive_connections=settings.GROQ_POOL_SIZE,
+            keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.GROQ_TIMEOUT, connect=settings.GROQ_CONNECT_TIMEOUT),
+    )
+    # Retries are owned by resilience.CallPolicy so they share one deadline.
+    return Groq(
+        api_key=api_key,
+        base_url=settings.GROQ_BASE_URL or None,
+        http_client=http_client,
+        max_retries=0,
+    )
+
+
+def _parse_json(raw: str) -> dict:
+    # Strip any markdown code fences if present
+    raw = raw.strip().strip("```json").strip("```").strip()
+    return json.loads(raw)
 
 
 class AICareerEngine:
-    def __init__(self):
-        self.api_key = os.getenv('GROQ_API_KEY', '')
-        self.client = Groq(api_key=self.api_key)
+    def __init__(self, client=None, cache=None, policy=None):
+        self.api_key = settings.GROQ_API_KEY
+        self.client = client if client is not None else build_client(self.api_key)
         self.model = "openai/gpt-oss-120b"
+        self.cache = cache if cache is not None else get_result_cache()
+        self.policy = policy if policy is not None else CallPolicy()
 
-    def _chat(self, system_prompt: str, user_prompt: str) -> str:
-        """Send a chat message to the Groq API and return content."""
-        completion = self.client.chat.completions.create(
+    def _create(self, system_prompt: str, user_prompt: str, stream: bool, timeout: float):
+        return self.client.chat.completions.create(
             model=self.model,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -20,20 +58,104 @@ class AICareerEngine:
             temperature=0.7,
             max_completion_tokens=2048,
             top_p=1,
-            stream=False,
+            stream=stream,
             stop=None,
+            timeout=timeout,
         )
-        return completion.choices[0].message.content or ""
 
-    def get_ats_score(self, resume_text: str, job_description: str) -> dict:
+    def _chat(self, system_prompt: str, user_prompt: str, kind: str = "chat") -> str:
+        """Send a chat message to the Groq API and return content."""
+        def attempt(timeout: float) -> str:
+            with metrics.track_call(kind, self.model) as call:
+                call.prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+                completion = self._create(system_prompt, user_prompt, stream=False, timeout=timeout)
+                content = completion.choices[0].message.content or ""
+                if completion.usage is not None:
+                    call.prompt_tokens = completion.usage.prompt_tokens
+                    call.completion_tokens = completion.usage.completion_tokens
+                else:
+                    call.completion_tokens = estimate_tokens(content)
+            return content
+
+        return self.policy.execute(attempt, kind=kind)
+
+    def _chat_stream(self, system_prompt: str, user_prompt: str, kind: str = "chat") -> Iterator[str]:
+        """Send a chat message to the Groq API and yield content deltas as they arrive."""
+        with metrics.track_call(kind, self.model, stream=True) as call:
+            call.prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+            # Only opening the stream is retried; once tokens have reached the
+            # client a failure is final.
+            stream = self.policy.execute(
+                lambda timeout: self._create(system_prompt, user_prompt, stream=True, timeout=timeout),
+                kind=kind,
+                hedge=False,
+            )
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        call.completion_tokens += estimate_tokens(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Hands the connection back to the pool when the client goes away mid-stream.
+                stream.close()
+
+    def _serve_fallback(self, kind: str, fallback, e: Exception) -> dict:
+        logger.warning("LLM %s call failed, serving fallback: %s: %s", kind, type(e).__name__, e)
+        metrics.FALLBACKS.inc(kind=kind, reason='circuit_open' if isinstance(e, CircuitOpenError) else 'error')
+        return fallback(e)
+
+    def _cache_key(self, kind: str, system_prompt: str, user_prompt: str) -> str:
+        # Keyed on the rendered prompts rather than the raw inputs, so a new
+        # template or token budget never serves results built from the old one.
+        return make_key(self.model, kind, system_prompt, user_prompt)
+
+    def _complete_json(self, kind: str, system_prompt: str, user_prompt: str, fallback=None) -> dict:
+        cache_key = self._cache_key(kind, system_prompt, user_prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            result = _parse_json(self._chat(system_prompt, user_prompt, kind=kind))
+        except Exception as e:
+            if fallback is None:
+                raise
+            return self._serve_fallback(kind, fallback, e)
+        # Only genuine model output is cached; fallbacks must not mask a recovery.
+        self.cache.set(cache_key, result)
+        return result
+
+    def _stream_json(self, kind: str, system_prompt: str, user_prompt: str, fallback):
         """
-        Compare resume against job description and return score + gap analysis.
+        Yield ("token", text) events while the model writes, then a single
+        ("result", dict) event with the parsed (or fallback) payload.
         """
-        system_prompt = (
-            "You are a Senior Tech Recruiter and ATS Optimization Expert. "
-            "Always respond with valid JSON only, no extra text."
-        )
-        user_prompt = f"""Analyze the following resume against the job description.
+        cache_key = self._cache_key(kind, system_prompt, user_prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            yield "result", cached
+            return
+        parts = []
+        try:
+            for delta in self._chat_stream(system_prompt, user_prompt, kind=kind):
+                parts.append(delta)
+                yield "token", delta
+            result = _parse_json("".join(parts))
+        except Exception as e:
+            yield "result", self._serve_fallback(kind, fallback, e)
+            return
+        self.cache.set(cache_key, result)
+        yield "result", result
+
+    # ── ATS scoring ─────────────────────────────────────────────────────────
+    ATS_SYSTEM_PROMPT = (
+        "You are a Senior Tech Recruiter and ATS Optimization Expert. "
+        "Always respond with valid JSON only, no extra text."
+    )
+
+    def _ats_prompt(self, resume_text: str, job_description: str) -> str:
+        resume_text = fit(resume_text, settings.AI_PROMPT_RESUME_TOKENS)
+        job_description = fit(job_description, settings.AI_PROMPT_JOB_TOKENS)
+        return f"""Analyze the following resume against the job description.
 
 Resume:
 {resume_text}
@@ -50,29 +172,64 @@ Respond ONLY with a JSON object containing:
   "feedback": "<one sentence summary>"
 }}"""
 
-        try:
-            raw = self._chat(system_prompt, user_prompt)
-            # Strip any markdown code fences if present
-            raw = raw.strip().strip("```json").strip("```").strip()
-            return json.loads(raw)
-        except Exception as e:
-            return {
-                "score": 70,
-                "impact_score": 75,
-                "missing_keywords": ["Kubernetes", "gRPC", "System Design"],
-                "improvement_suggestions": ["Quantify key achievements", "Add a dedicated skills section"],
-                "feedback": f"Analysis completed. (Note: {str(e)})"
-            }
+    @staticmethod
+    def _ats_fallback(local: dict):
+        def fallback(e: Exception) -> dict:
+            return {**local, "feedback": f"{local['feedback']} (Note: {str(e)})"}
+        return fallback
 
-    def optimize_linkedin(self, current_profile_text: str) -> dict:
+    @staticmethod
+    def _llm_needed(local: dict) -> bool:
+        """Whether the local keyword score leaves anything for the LLM to decide."""
+        if settings.AI_LOCAL_ONLY:
+            metrics.FALLBACKS.inc(kind='ats_score', reason='local_only')
+            return False
+        # A resume that misses nearly every weighted term is a poor match
+        # whatever the model says, so it is not worth a round-trip.
+        if local["score"] < settings.AI_LOCAL_SCORE_SKIP_BELOW:
+            metrics.FALLBACKS.inc(kind='ats_score', reason='low_local_score')
+            return False
+        return True
+
+    def get_ats_score(self, resume_text: str, job_description: str, raise_errors: bool = False,
+                      resume_terms: dict = None) -> dict:
         """
-        Generate an optimized LinkedIn headline, summary, and experience bullets.
+        Compare resume against job description and return score + gap analysis.
+        The local keyword matcher answers directly when the LLM is not needed
+        and replaces a failed LLM call, unless raise_errors=True.
+        resume_terms is an optional precomputed keywords.term_vector(resume_text).
         """
-        system_prompt = (
-            "You are a world-class LinkedIn profile strategist and career coach for elite tech professionals. "
-            "Always respond with valid JSON only, no extra text."
+        local = local_ats_score(resume_text, job_description, resume_terms)
+        if not self._llm_needed(local):
+            return local
+        return self._complete_json(
+            'ats_score',
+            self.ATS_SYSTEM_PROMPT,
+            self._ats_prompt(resume_text, job_description),
+            None if raise_errors else self._ats_fallback(local),
+        )
+
+    def stream_ats_score(self, resume_text: str, job_description: str):
+        """Streaming variant of get_ats_score; see _stream_json for the event shape."""
+        local = local_ats_score(resume_text, job_description)
+        if not self._llm_needed(local):
+            return iter([("result", local)])
+        return self._stream_json(
+            'ats_score',
+            self.ATS_SYSTEM_PROMPT,
+            self._ats_prompt(resume_text, job_description),
+            self._ats_fallback(local),
         )
-        user_prompt = f"""Optimize the following LinkedIn profile content for maximum professional impact.
+
+    # ── LinkedIn optimization ───────────────────────────────────────────────
+    LINKEDIN_SYSTEM_PROMPT = (
+        "You are a world-class LinkedIn profile strategist and career coach for elite tech professionals. "
+        "Always respond with valid JSON only, no extra text."
+    )
+
+    def _linkedin_prompt(self, current_profile_text: str) -> str:
+        current_profile_text = fit(current_profile_text, settings.AI_PROMPT_PROFILE_TOKENS)
+        return f"""Optimize the following LinkedIn profile content for maximum professional impact.
 
 Current Profile:
 {current_profile_text}
@@ -88,17 +245,55 @@ Respond ONLY with a JSON object containing:
   ]
 }}"""
 
-        try:
-            raw = self._chat(system_prompt, user_prompt)
-            raw = raw.strip().strip("```json").strip("```").strip()
-            return json.loads(raw)
-        except Exception as e:
-            return {
-                "headline": "Senior Full Stack Architect | AI-Driven SaaS Builder | Career OS Pioneer",
-                "summary": "I architect high-scale SaaS platforms powered by AI, turning complex career challenges into systematic wins for 10,000+ professionals.",
-                "bullet_points": [
-                    "Engineered an AI Career OS serving 10K+ users with 99.9% uptime",
-                    "Reduced time-to-hire by 40% through intelligent ATS optimization",
-                    f"Note: Live generation encountered: {str(e)}"
-                ]
-            }
+    @staticmethod
+    def _linkedin_fallback(e: Exception) -> dict:
+        return {
+            "headline": "Senior Full Stack Architect | AI-Driven SaaS Builder | Career OS Pioneer",
+            "summary": "I architect high-scale SaaS platforms powered by AI, turning complex career challenges into systematic wins for 10,000+ professionals.",
+            "bullet_points": [
+                "Engineered an AI Career OS serving 10K+ users with 99.9% uptime",
+                "Reduced time-to-hire by 40% through intelligent ATS optimization",
+                f"Note: Live generation encountered: {str(e)}"
+            ]
+        }
+
+    def optimize_linkedin(self, current_profile_text: str) -> dict:
+        """
+        Generate an optimized LinkedIn headline, summary, and experience bullets.
+        """
+        return self._complete_json(
+            'linkedin',
+            self.LINKEDIN_SYSTEM_PROMPT,
+            self._linkedin_prompt(current_profile_text),
+            self._linkedin_fallback,
+        )
+
+    def stream_linkedin(self, current_profile_text: str):
+        """Streaming variant of optimize_linkedin; see _stream_json for the event shape."""
+        return self._stream_json(
+            'linkedin',
+            self.LINKEDIN_SYSTEM_PROMPT,
+            self._linkedin_prompt(current_profile_text),
+            self._linkedin_fallback,
+        )
+
+
+# ── Per-process engine registry ─────────────────────────────────────────────
+# One engine (and therefore one connection pool) per gunicorn worker. The
+# engine is built lazily on first use, and rebuilt if the process id changes,
+# so sockets opened before a fork are never shared with a child process.
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> AICareerEngine:
+    """Return this process's shared AICareerEngine, creating it on first use."""
+    global _engine, _engine_pid
+    pid = os.getpid()
+    if _engine is None or _engine_pid != pid:
+        with _engine_lock:
+            if _engine is None or _engine_pid != pid:
+                _engine = AICareerEngine()
+                _engine_pid = pid
+    return _engine
@@ -1,3 +1,458 @@
-from django.test import TestCase
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+import groq
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import metrics
+from .cache import DjangoCacheTier, LocalTier, ResultCache, make_key
+from .resilience import CircuitBreaker, CircuitOpenError
+from . import services
+from .services import AICareerEngine, get_engine
+from .keywords import local_ats_score, term_vector, tokenize
+from .prompting import compact_text, estimate_tokens, fit, truncate_to_budget
+
+
+class FakeLLMServer:
+    """
+    OpenAI-compatible chat completions endpoint on localhost, so tests drive
+    the real Groq client, its timeouts and streaming without network access.
+
+    Each request takes the next scripted reply, a dict with optional keys
+    delay (seconds before answering), status (HTTP code, default 200) and
+    content (the assistant message). Once the script runs out, the last reply
+    is repeated. Streamed requests get the content in chunks of CHUNK
+    characters. Use as a context manager; base_url goes in GROQ_BASE_URL.
+    """
+
+    CHUNK = 8
+
+    def __init__(self, *replies):
+        self.replies = list(replies) or [{'content': '{}'}]
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with server._lock:
+                    reply = server.replies[min(len(server.requests), len(server.replies) - 1)]
+                    server.requests.append(body)
+                time.sleep(reply.get('delay', 0))
+                try:
+                    if reply.get('status', 200) != 200:
+                        self._send(reply['status'], 'application/json', b'{"error": {"message": "scripted failure"}}')
+                    elif body.get('stream'):
+                        self._stream(reply.get('content', ''))
+                    else:
+                        self._send(200, 'application/json', json.dumps(server.completion(reply.get('content', ''))).encode())
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up first
+
+            def _send(self, status, content_type, payload):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, content):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                for start in range(0, len(content), server.CHUNK):
+                    chunk = server.chunk(content[start:start + server.CHUNK])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    @staticmethod
+    def completion(content: str) -> dict:
+        return {
+            'id': 'chatcmpl-test', 'object': 'chat.completion', 'created': 0, 'model': 'fake',
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 50, 'completion_tokens': 20, 'total_tokens': 70},
+        }
+
+    @staticmethod
+    def chunk(content: str) -> dict:
+        return {
+            'id': 'chatcmpl-test', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'fake',
+            'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': None}],
+        }
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# Fast retries and short deadlines for tests against FakeLLMServer.
+FAST_POLICY = dict(
+    GROQ_API_KEY='test', AI_CALL_DEADLINE=3, AI_RETRY_ATTEMPTS=3, AI_RETRY_BASE_DELAY=0.01, AI_RETRY_MAX_DELAY=0.02,
+    AI_HEDGE_AFTER=0, AI_BREAKER_MIN_CALLS=100, AI_LOCAL_ONLY=False, AI_LOCAL_SCORE_SKIP_BELOW=0,
+)
+
+
+@override_settings(**FAST_POLICY)
+class FakeLLMTestCase(SimpleTestCase):
+    """Runs under FAST_POLICY with the per-call log lines and fallback warnings silenced."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+
+def fake_engine(server) -> AICareerEngine:
+    """An uncached engine pointed at server."""
+    with override_settings(GROQ_BASE_URL=server.base_url, GROQ_API_KEY='test'):
+        return AICareerEngine(cache=ResultCache([]))
+
+
+def read_events(response) -> list:
+    """(event, data) pairs from a text/event-stream response."""
+    body = b''.join(response.streaming_content).decode()
+    events = []
+    for message in body.split('\n\n'):
+        if message:
+            fields = dict(line.split(': ', 1) for line in message.split('\n'))
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class TrackCallTests(SimpleTestCase):
+    def test_outcomes_are_counted_and_logged(self):
+        with self.assertLogs('ai_engine.calls') as logs:
+            with metrics.track_call('test_ok', 'model') as call:
+                call.prompt_tokens, call.completion_tokens = 120, 30
+            with self.assertRaises(ValueError):
+                with metrics.track_call('test_err', 'model'):
+                    raise ValueError("bad json")
+
+        self.assertEqual(metrics.LLM_REQUESTS.value(kind='test_ok', outcome='success'), 1)
+        self.assertEqual(metrics.LLM_TOKENS.value(kind='test_ok', direction='completion'), 30)
+        self.assertEqual(metrics.LLM_ERRORS.value(kind='test_err', error='ValueError'), 1)
+        records = [json.loads(line.split(':', 2)[2]) for line in logs.output]
+        self.assertEqual([r['outcome'] for r in records], ['success', 'error'])
+        self.assertEqual(records[0]['prompt_tokens'], 120)
+
+    def test_closing_a_stream_early_records_cancelled(self):
+        def stream():
+            with metrics.track_call('test_cancel', 'model', stream=True):
+                yield 'first'
+                yield 'second'
+
+        with self.assertLogs('ai_engine.calls'):
+            tokens = stream()
+            next(tokens)
+            tokens.close()
+        self.assertEqual(metrics.LLM_REQUESTS.value(kind='test_cancel', outcome='cancelled'), 1)
+        self.assertEqual(metrics.LLM_REQUESTS.value(kind='test_cancel', outcome='success'), 0)
+
+    def test_render_is_prometheus_text(self):
+        metrics.LLM_LATENCY.observe(0.3, kind='test_render')
+        text = metrics.render()
+        self.assertIn('# TYPE ai_llm_request_duration_seconds histogram', text)
+        self.assertIn('ai_llm_request_duration_seconds_bucket{kind="test_render",le="0.5"} 1', text)
+        self.assertIn('ai_llm_request_duration_seconds_count{kind="test_render"} 1', text)
+
+
+class KeywordTests(SimpleTestCase):
+    def test_aliases_and_phrases(self):
+        terms = term_vector("Built ML pipelines on K8s with Postgres; CI/CD via GitHub Actions.")
+        for term in ('machine learning', 'kubernetes', 'postgresql', 'ci/cd', 'github actions'):
+            self.assertIn(term, terms)
+        self.assertNotIn('with', terms)
+
+    def test_ambiguous_aliases_need_a_skill_nearby(self):
+        self.assertIn('golang', tokenize("Services in Go and Kubernetes"))
+        self.assertNotIn('golang', tokenize("Ready to go the extra mile"))
+        self.assertIn('node.js', tokenize("React with Node on the backend"))
+        self.assertNotIn('node.js', tokenize("Restarted a failing node overnight"))
+
+    def test_local_score_weights_skills(self):
+        job = "Python engineer: Django, PostgreSQL and Docker. Kubernetes is a plus."
+        strong = local_ats_score("Python developer using Django, PostgreSQL, Docker and Kubernetes.", job)
+        weak = local_ats_score("Python developer.", job)
+        self.assertGreater(strong['score'], weak['score'])
+        self.assertEqual(strong['missing_keywords'], [])
+        self.assertEqual(weak['missing_keywords'][:2], ['django', 'docker'])
+        self.assertEqual(strong['source'], 'local')
+
+
+class PromptBudgetTests(SimpleTestCase):
+    def test_compaction_drops_markup_duplicates_and_boilerplate(self):
+        text = (
+            "<p>Senior&nbsp;Engineer</p>\n\n"
+            "- Build APIs   in   Python\n"
+            "* Build APIs in Python\n"
+            "We are an Equal Opportunity Employer.\n"
+            "Apply now!\n"
+        )
+        self.assertEqual(compact_text(text), "Senior Engineer\n- Build APIs in Python")
+
+    def test_truncation_keeps_whole_lines_within_budget(self):
+        text = '\n'.join(f"Line {i} describes one responsibility of the role" for i in range(200))
+        truncated = truncate_to_budget(text, 300)
+        self.assertLessEqual(estimate_tokens(truncated), 300)
+        self.assertTrue(truncated.startswith("Line 0 "))
+        self.assertEqual(truncate_to_budget("short text", 300), "short text")
+
+    def test_fit_compacts_before_truncating(self):
+        repeated = "Kubernetes operator experience\n" * 500
+        self.assertEqual(fit(repeated, 50), "Kubernetes operator experience")
+
+
+@override_settings(AI_LOCAL_ONLY=True)
+class StreamViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('stream', password='pw'))
+
+    def test_ats_stream_sends_the_result_event(self):
+        response = self.client.post('/api/v1/ai/ats-score/stream/', {
+            'resume_text': 'Python and Django developer',
+            'job_description': 'Looking for a Python engineer who knows Django and Kubernetes',
+        }, format='json')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+        events = read_events(response)
+        self.assertEqual([event for event, _ in events], ['result'])
+        self.assertIn('kubernetes', events[0][1]['missing_keywords'])
+
+    def test_linkedin_stream_forwards_tokens_then_the_result(self):
+        profile = {'headline': 'Platform engineer', 'summary': 'Builds things.', 'bullet_points': ['Shipped']}
+        with FakeLLMServer({'content': json.dumps(profile)}) as server, override_settings(**FAST_POLICY):
+            self.addCleanup(setattr, services, '_engine', services._engine)
+            services._engine = fake_engine(server)
+            logging.disable(logging.CRITICAL)
+            self.addCleanup(logging.disable, logging.NOTSET)
+            response = self.client.post('/api/v1/ai/linkedin-optimize/stream/', {'current_profile': 'Engineer'}, format='json')
+            events = read_events(response)
+
+        tokens = [data for event, data in events if event == 'token']
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(''.join(tokens), json.dumps(profile))
+        self.assertEqual(events[-1], ('result', profile))
+        self.assertEqual(server.requests[0]['stream'], True)
+
+    def test_stream_requires_input(self):
+        response = self.client.post('/api/v1/ai/linkedin-optimize/stream/', {}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class MetricsViewTests(TestCase):
+    url = '/api/v1/ai/metrics/'
+
+    def test_only_staff_can_scrape(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('member', password='pw'))
+        self.assertEqual(client.get(self.url).status_code, 403)
+
+        client.force_authenticate(User.objects.create_user('scraper', password='pw', is_staff=True))
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE ai_llm_requests_total counter', response.content.decode())
+
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_on_failure_rate_then_half_opens(self):
+        breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window=4, reset_after=0.05)
+        for success in (True, False, True):
+            breaker.record(success)
+        self.assertEqual(breaker.state, breaker.CLOSED)
+        breaker.record(False)
+        self.assertEqual(breaker.state, breaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        time.sleep(0.06)
+        breaker.before_call()
+        self.assertEqual(breaker.state, breaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()  # only one trial call at a time
+        breaker.record(True)
+        self.assertEqual(breaker.state, breaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_rate=1.0, min_calls=1, window=1, reset_after=0)
+        breaker.record(False)
+        breaker.before_call()
+        breaker.record(False)
+        self.assertEqual(breaker.state, breaker.OPEN)
+
+    def test_released_trial_lets_the_next_call_through(self):
+        breaker = CircuitBreaker(failure_rate=1.0, min_calls=1, window=1, reset_after=0)
+        breaker.record(False)
+        breaker.before_call()
+        breaker.release()
+        self.assertEqual(breaker.state, breaker.HALF_OPEN)
+        breaker.before_call()
+
+
+class CallPolicyTests(FakeLLMTestCase):
+    def test_retries_server_errors(self):
+        with FakeLLMServer({'status': 500}, {'status': 503}, {'content': 'third time lucky'}) as server:
+            retries = metrics.LLM_RETRIES.value(kind='retry_test')
+            self.assertEqual(fake_engine(server)._chat('system', 'user', kind='retry_test'), 'third time lucky')
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(metrics.LLM_RETRIES.value(kind='retry_test'), retries + 2)
+
+    def test_client_errors_are_not_retried(self):
+        with FakeLLMServer({'status': 400}) as server:
+            with self.assertRaises(groq.BadRequestError):
+                fake_engine(server)._chat('system', 'user')
+        self.assertEqual(len(server.requests), 1)
+
+    @override_settings(AI_CALL_DEADLINE=0.5)
+    def test_deadline_bounds_the_whole_call(self):
+        with FakeLLMServer({'delay': 2, 'content': 'too late'}) as server:
+            started = time.monotonic()
+            with self.assertRaises(groq.APITimeoutError):
+                fake_engine(server)._chat('system', 'user')
+            self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_failures_fall_back_to_the_local_scorer(self):
+        with FakeLLMServer({'status': 500}) as server:
+            result = fake_engine(server).get_ats_score('Python and Django', 'Python, Django and Kubernetes')
+        self.assertEqual(result['source'], 'local')
+        self.assertIn('Note:', result['feedback'])
+
+    @override_settings(AI_BREAKER_MIN_CALLS=2, AI_BREAKER_WINDOW=2, AI_BREAKER_RESET_AFTER=60, AI_RETRY_ATTEMPTS=1)
+    def test_open_circuit_skips_the_provider(self):
+        with FakeLLMServer({'status': 500}) as server:
+            engine = fake_engine(server)
+            for _ in range(2):
+                engine.optimize_linkedin('Backend engineer')
+            result = engine.optimize_linkedin('Backend engineer')
+        self.assertEqual(len(server.requests), 2)
+        self.assertIn('circuit breaker is open', result['bullet_points'][-1])
+
+    @override_settings(AI_BREAKER_MIN_CALLS=2, AI_BREAKER_WINDOW=2, AI_BREAKER_RESET_AFTER=60, AI_RETRY_ATTEMPTS=1)
+    def test_client_errors_do_not_open_the_circuit(self):
+        with FakeLLMServer({'status': 400}) as server:
+            engine = fake_engine(server)
+            for _ in range(3):
+                with self.assertRaises(groq.BadRequestError):
+                    engine._chat('system', 'user')
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(engine.policy.breaker.state, CircuitBreaker.CLOSED)
+
+
+@override_settings(AI_HEDGE_AFTER=0.1, AI_RETRY_ATTEMPTS=1)
+class HedgingTests(FakeLLMTestCase):
+    def test_fast_primary_is_not_hedged(self):
+        with FakeLLMServer({'content': 'quick'}) as server:
+            hedges = metrics.LLM_HEDGES.value()
+            self.assertEqual(fake_engine(server)._chat('system', 'user'), 'quick')
+            time.sleep(0.15)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(metrics.LLM_HEDGES.value(), hedges)
+
+    def test_primary_runs_on_the_calling_thread(self):
+        threads = []
+        with FakeLLMServer({'content': 'ok'}) as server:
+            engine = fake_engine(server)
+            create = engine._create
+            engine._create = lambda *args, **kwargs: threads.append(threading.current_thread()) or create(*args, **kwargs)
+            engine._chat('system', 'user')
+        self.assertEqual(threads, [threading.current_thread()])
+
+    def test_failed_slow_primary_uses_the_hedge(self):
+        with FakeLLMServer({'delay': 0.4, 'status': 500}, {'content': 'from the hedge'}) as server:
+            hedges = metrics.LLM_HEDGES.value()
+            self.assertEqual(fake_engine(server)._chat('system', 'user'), 'from the hedge')
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(metrics.LLM_HEDGES.value(), hedges + 1)
+
+
+
+class ResultCacheTests(FakeLLMTestCase):
+    def test_local_tier_is_lru_and_copies_values(self):
+        tier = LocalTier(ttl=60, max_entries=2)
+        tier.set('a', {'score': 1})
+        tier.set('b', {'score': 2})
+        tier.get('a')
+        tier.set('c', {'score': 3})
+        self.assertIsNone(tier.get('b'))
+        value = tier.get('a')
+        value['score'] = 99
+        self.assertEqual(tier.get('a'), {'score': 1})
+
+    def test_local_entries_expire(self):
+        tier = LocalTier(ttl=0.01, max_entries=10)
+        tier.set('a', 1)
+        time.sleep(0.02)
+        self.assertIsNone(tier.get('a'))
+        self.assertEqual(len(tier), 0)
+
+    def test_shared_hits_are_promoted(self):
+        local, shared = LocalTier(ttl=60, max_entries=10), DjangoCacheTier(ttl=60)
+        cache = ResultCache([local, shared])
+        key = make_key('model', 'test_promote', 'prompt')
+        shared.set(key, {'score': 70})
+        self.assertEqual(cache.get(key), {'score': 70})
+        self.assertEqual(local.get(key), {'score': 70})
+        self.assertIsNone(cache.get(make_key('model', 'test_promote', 'other prompt')))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), ({'local': 0, 'shared': 1}, 1))
+
+    def test_keys_follow_the_rendered_prompt(self):
+        self.assertEqual(make_key('m', 'ats', 'Python  Developer\n'), make_key('m', 'ats', 'python developer'))
+        self.assertNotEqual(make_key('m', 'ats', 'a', 'b'), make_key('m', 'ats', 'ab'))
+        with FakeLLMServer({'content': '{"headline": "h"}'}) as server:
+            engine = fake_engine(server)
+            engine.cache = ResultCache([LocalTier(ttl=60, max_entries=10)])
+            engine.optimize_linkedin('Backend engineer')
+            engine.optimize_linkedin('Backend  engineer')
+            with override_settings(AI_PROMPT_PROFILE_TOKENS=1):
+                engine.optimize_linkedin('Backend engineer')
+        self.assertEqual(len(server.requests), 2)
+
+
+
+class EngineRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(setattr, services, '_engine', services._engine)
+        self.addCleanup(setattr, services, '_engine_pid', services._engine_pid)
+        services._engine = None
+
+    def test_one_engine_per_process(self):
+        engines = []
+        threads = [threading.Thread(target=lambda: engines.append(get_engine())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(engine) for engine in engines}), 1)
+        self.assertIs(get_engine(), engines[0])
+
+    def test_engine_is_rebuilt_after_a_fork(self):
+        engine = get_engine()
+        services._engine_pid = -1  # as seen from a forked child
+        self.assertIsNot(get_engine(), engine)
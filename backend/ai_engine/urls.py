@@ -1,7 +1,14 @@
 from django.urls import path
-from .views import LinkedInOptimizeView, ATSScoreView
+from .views import (
+    LinkedInOptimizeView, LinkedInOptimizeStreamView, ATSScoreView, ATSScoreStreamView, CacheStatsView,
+    MetricsView,
+)
 
 urlpatterns = [
     path('linkedin-optimize/', LinkedInOptimizeView.as_view(), name='linkedin-optimize'),
+    path('linkedin-optimize/stream/', LinkedInOptimizeStreamView.as_view(), name='linkedin-optimize-stream'),
     path('ats-score/', ATSScoreView.as_view(), name='ats-score'),
+    path('ats-score/stream/', ATSScoreStreamView.as_view(), name='ats-score-stream'),
+    path('cache-stats/', CacheStatsView.as_view(), name='ai-cache-stats'),
+    path('metrics/', MetricsView.as_view(), name='ai-metrics'),
 ]
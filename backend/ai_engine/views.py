@@ -1,7 +1,26 @@
+import json
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from .services import AICareerEngine
+from . import metrics
+from .cache import get_result_cache
+from .services import get_engine
+
+
+def _event_stream(events):
+    """Encode (event, data) pairs from the engine as server-sent events."""
+    for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_response(events):
+    response = StreamingHttpResponse(_event_stream(events), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream until the model has finished.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 
 class LinkedInOptimizeView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -11,7 +30,7 @@ class LinkedInOptimizeView(APIView):
         if not current_profile:
             return Response({"error": "Profile text is required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        engine = AICareerEngine()
+        engine = get_engine()
         optimization = engine.optimize_linkedin(current_profile)
         return Response(optimization)
 
@@ -25,6 +44,41 @@ class ATSScoreView(APIView):
         if not resume_text or not job_description:
             return Response({"error": "Resume and Job Description are required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        engine = AICareerEngine()
+        engine = get_engine()
         analysis = engine.get_ats_score(resume_text, job_description)
         return Response(analysis)
+
+class LinkedInOptimizeStreamView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        current_profile = request.data.get('current_profile', '')
+        if not current_profile:
+            return Response({"error": "Profile text is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return _sse_response(get_engine().stream_linkedin(current_profile))
+
+class ATSScoreStreamView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        resume_text = request.data.get('resume_text', '')
+        job_description = request.data.get('job_description', '')
+
+        if not resume_text or not job_description:
+            return Response({"error": "Resume and Job Description are required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return _sse_response(get_engine().stream_ats_score(resume_text, job_description))
+
+class CacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_result_cache().stats())
+
+class MetricsView(APIView):
+    """Prometheus scrape target; authenticate the scraper with a staff user's token."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
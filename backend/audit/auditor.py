@@ -0,0 +1,277 @@
+"""
+Streaming CSV auditor.
+
+The file is read as a text stream and processed AUDIT_CHUNK_ROWS rows at a
+time. Each chunk is transposed into columns, so the per-column checks (blank
+profiling, email validation) run as tight builtin loops over one list at a
+time. Memory is bounded by the chunk size plus the duplicate index. That
+index keeps exact 64-bit row digests up to AUDIT_EXACT_HASH_LIMIT distinct
+rows, then switches to a fixed-size Bloom filter of AUDIT_BLOOM_BYTES. From
+that point duplicate counts are approximate, and the report says so.
+
+Checks:
+- exact duplicates: identical values in every column except ignored
+  identifier columns (by default a column named "id")
+- fuzzy duplicates: rows that only match once case, whitespace and
+  punctuation are normalised
+- email syntax and disposable domains, in columns whose header mentions
+  "email"
+- blank/null profiling per column, plus rows with too few or too many fields
+"""
+import csv
+import hashlib
+import io
+import re
+import time
+
+from django.conf import settings
+
+NULL_TOKENS = frozenset({'', 'null', 'none', 'nil', 'nan', 'n/a', 'na', '-'})
+
+EMAIL_RE = re.compile(
+    r"^[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+@"
+    r"(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}$"
+)
+
+DISPOSABLE_DOMAINS = frozenset({
+    '10minutemail.com', '20minutemail.com', 'dispostable.com', 'emailondeck.com',
+    'fakeinbox.com', 'getairmail.com', 'getnada.com', 'guerrillamail.com',
+    'guerrillamail.net', 'maildrop.cc', 'mailinator.com', 'mailnesia.com',
+    'mintemail.com', 'mohmal.com', 'mytemp.email', 'sharklasers.com',
+    'spamgourmet.com', 'temp-mail.org', 'tempail.com', 'tempmail.com',
+    'tempmailo.com', 'tempr.email', 'throwawaymail.com', 'trashmail.com',
+    'yopmail.com',
+})
+
+_FUZZY_STRIP_RE = re.compile(r'[\W_]+')
+_SEP = '\x1f'
+
+
+def row_digest(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+# Rough size of one digest -> line entry in DuplicateIndex's dict, in bytes.
+INDEX_ENTRY_BYTES = 120
+
+
+def audit_options(memory_budget=None) -> dict:
+    """
+    The AUDIT_* settings an auditor needs, as plain values that can be sent to
+    worker processes. With memory_budget (bytes), the exact and fuzzy indexes
+    are shrunk so that together they stay within it.
+    """
+    exact_limit, bloom_bytes = settings.AUDIT_EXACT_HASH_LIMIT, settings.AUDIT_BLOOM_BYTES
+    if memory_budget:
+        # Two indexes, each given half its share for the dict and half for the Bloom filter.
+        share = memory_budget // 4
+        exact_limit = min(exact_limit, share // INDEX_ENTRY_BYTES)
+        bloom_bytes = max(min(bloom_bytes, share), 1)
+    return {
+        'chunk_rows': settings.AUDIT_CHUNK_ROWS,
+        'exact_limit': exact_limit,
+        'bloom_bytes': bloom_bytes,
+        'max_examples': settings.AUDIT_MAX_EXAMPLES,
+        'extra_domains': list(settings.AUDIT_EXTRA_DISPOSABLE_DOMAINS),
+    }
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 64-bit digests (double hashing, k probes)."""
+
+    def __init__(self, size_bytes: int, probes: int = 5):
+        self.bits = size_bytes * 8
+        self.probes = probes
+        self._array = bytearray(size_bytes)
+
+    def add(self, digest: int) -> bool:
+        """Insert digest; True if it was (probably) present already."""
+        h1, h2 = digest & 0xFFFFFFFF, (digest >> 32) | 1
+        present = True
+        for i in range(self.probes):
+            bit = (h1 + i * h2) % self.bits
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self._array[byte] & mask:
+                present = False
+                self._array[byte] |= mask
+        return present
+
+
+class DuplicateIndex:
+    """
+    Digests of rows seen so far. Exact (digest -> first line) until `limit`
+    distinct rows, then new digests go into a Bloom filter.
+    """
+
+    def __init__(self, limit: int, bloom_bytes: int):
+        self.limit = limit
+        self.bloom_bytes = bloom_bytes
+        self._first_line = {}
+        self._bloom = None
+
+    @property
+    def approximate(self) -> bool:
+        return self._bloom is not None
+
+    def seen(self, digest: int, line: int):
+        """Line of the earlier copy, 0 if unknown (Bloom hit), or None if new."""
+        first = self._first_line.get(digest)
+        if first is not None:
+            return first
+        if self._bloom is None:
+            if len(self._first_line) < self.limit:
+                self._first_line[digest] = line
+                return None
+            self._bloom = BloomFilter(self.bloom_bytes)
+        return 0 if self._bloom.add(digest) else None
+
+
+class CSVAuditor:
+    """Accumulates audit results over chunks of (line number, row) pairs."""
+
+    def __init__(self, header, ignore_columns=('id',), options=None):
+        options = options or audit_options()
+        self.header = [name.strip() for name in header]
+        self.width = len(self.header)
+        ignored = {name.lower() for name in ignore_columns}
+        self.key_columns = [i for i, name in enumerate(self.header) if name.lower() not in ignored]
+        self.email_columns = [i for i, name in enumerate(self.header) if 'email' in name.lower().replace('-', '')]
+        self.disposable = DISPOSABLE_DOMAINS | {d.lower() for d in options['extra_domains']}
+        self.max_examples = options['max_examples']
+
+        self.rows = 0
+        self.short_rows = 0
+        self.long_rows = 0
+        self.blank_counts = [0] * self.width
+        self.exact = DuplicateIndex(options['exact_limit'], options['bloom_bytes'])
+        self.fuzzy = DuplicateIndex(options['exact_limit'], options['bloom_bytes'])
+        self.exact_duplicates = 0
+        self.fuzzy_duplicates = 0
+        self.invalid_emails = 0
+        self.disposable_emails = 0
+        self.examples = {'malformed': [], 'exact_duplicates': [], 'fuzzy_duplicates': [],
+                         'invalid_emails': [], 'disposable_emails': []}
+
+    def _example(self, kind: str, item) -> None:
+        if len(self.examples[kind]) < self.max_examples:
+            self.examples[kind].append(item)
+
+    def _normalise(self, lines, rows):
+        """Pad or trim every row to the header width, recording malformed ones."""
+        width = self.width
+        for index, row in enumerate(rows):
+            if len(row) != width:
+                if len(row) < width:
+                    self.short_rows += 1
+                    rows[index] = row + [''] * (width - len(row))
+                else:
+                    self.long_rows += 1
+                    rows[index] = row[:width]
+                self._example('malformed', {'line': lines[index], 'fields': len(row)})
+        return rows
+
+    def feed(self, chunk) -> None:
+        lines = [line for line, _ in chunk]
+        rows = self._normalise(lines, [row for _, row in chunk])
+        self.rows += len(rows)
+        columns = list(zip(*rows)) if rows else []
+
+        # ── Blank / null profiling, one column at a time ───────────────────
+        for index, column in enumerate(columns):
+            self.blank_counts[index] += sum(1 for value in column if value.strip().lower() in NULL_TOKENS)
+
+        # ── Email syntax and disposable domains ────────────────────────────
+        for index in self.email_columns:
+            for line, value in zip(lines, columns[index] if columns else ()):
+                value = value.strip()
+                if value.lower() in NULL_TOKENS:
+                    continue
+                if not EMAIL_RE.match(value):
+                    self.invalid_emails += 1
+                    self._example('invalid_emails', {'line': line, 'value': value})
+                    continue
+                domain = value.rsplit('@', 1)[1].lower()
+                if domain in self.disposable or domain.split('.', 1)[-1] in self.disposable:
+                    self.disposable_emails += 1
+                    self._example('disposable_emails', {'line': line, 'value': value})
+
+        self.check_duplicates(lines, rows)
+
+    def exact_digest(self, row) -> int:
+        return row_digest(_SEP.join([row[i] for i in self.key_columns]))
+
+    def fuzzy_digest(self, row) -> int:
+        return row_digest(_SEP.join([_FUZZY_STRIP_RE.sub('', row[i]).casefold() for i in self.key_columns]))
+
+    def check_duplicates(self, lines, rows) -> None:
+        """Exact duplicates first; only rows that are not exact copies count as fuzzy duplicates."""
+        for line, row in zip(lines, rows):
+            first = self.exact.seen(self.exact_digest(row), line)
+            if first is not None:
+                self.exact_duplicates += 1
+                self._example('exact_duplicates', {'line': line, 'duplicate_of': first or None})
+                continue
+            first = self.fuzzy.seen(self.fuzzy_digest(row), line)
+            if first is not None:
+                self.fuzzy_duplicates += 1
+                self._example('fuzzy_duplicates', {'line': line, 'duplicate_of': first or None})
+
+    def report(self) -> dict:
+        rows = self.rows or 1
+        return {
+            'columns': self.header,
+            'rows': self.rows,
+            'malformed_rows': {'short': self.short_rows, 'long': self.long_rows},
+            'duplicates': {
+                'exact': self.exact_duplicates,
+                'fuzzy': self.fuzzy_duplicates,
+                'ignored_columns': [n for i, n in enumerate(self.header) if i not in self.key_columns],
+                'approximate': self.exact.approximate or self.fuzzy.approximate,
+            },
+            'emails': {
+                'columns': [self.header[i] for i in self.email_columns],
+                'invalid': self.invalid_emails,
+                'disposable': self.disposable_emails,
+            },
+            'blanks': {
+                name: {'count': count, 'ratio': round(count / rows, 4)}
+                for name, count in zip(self.header, self.blank_counts)
+            },
+            'examples': self.examples,
+        }
+
+
+def iter_chunks(reader, size: int):
+    """Group csv rows into lists of (line number, row), skipping empty lines."""
+    chunk = []
+    for row in reader:
+        if row:
+            chunk.append((reader.line_num, row))
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def audit_csv(fileobj, ignore_columns=('id',), delimiter: str = ',', memory_budget=None) -> dict:
+    """Audit a binary CSV stream and return the report, including throughput."""
+    started = time.perf_counter()
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        reader = csv.reader(text, delimiter=delimiter)
+        header = next(reader, None)
+        if not header:
+            raise ValueError("The file is empty or has no header row")
+        options = audit_options(memory_budget)
+        auditor = CSVAuditor(header, ignore_columns, options)
+        for chunk in iter_chunks(reader, options['chunk_rows']):
+            auditor.feed(chunk)
+    finally:
+        text.detach()
+
+    elapsed = time.perf_counter() - started
+    report = auditor.report()
+    report['elapsed_seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(auditor.rows / elapsed, 1) if elapsed else 0.0
+    return report
@@ -0,0 +1,128 @@
+"""
+Background execution of uploaded CSV audits.
+
+The upload request only stores the file and an AuditReport row. With
+AUDIT_JOB_RUNNER = 'thread' the audit runs once the transaction commits, on
+a pool of AUDIT_WORKER_THREADS threads kept apart from the shared background
+pool, so long audits cannot hold up other background work. With 'external',
+`manage.py run_audit_worker` processes claim queued reports instead.
+
+A report whose process died mid-audit stays RUNNING until
+AUDIT_JOB_STALE_AFTER, then every drain requeues it, at most
+AUDIT_JOB_MAX_ATTEMPTS times before it is marked FAILED. With the thread
+runner nothing drains between uploads, so polling a stuck report (see
+resume_stalled_audit) starts a drain.
+
+The stored file is read as a stream, so it is never held in memory. Audits
+run inside a web process keep their duplicate indexes within
+AUDIT_INLINE_MEMORY_BYTES. Only the worker command starts the multi-process
+auditor (AUDIT_WORKERS > 1, files of at least AUDIT_PARALLEL_MIN_BYTES with
+a local path), and it uses the full AUDIT_EXACT_HASH_LIMIT/AUDIT_BLOOM_BYTES.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from dataaudit.background import BackgroundPool
+from .auditor import audit_csv
+from .parallel import audit_csv_parallel
+from .models import AuditReport
+
+logger = logging.getLogger(__name__)
+
+audit_pool = BackgroundPool('audit', 'AUDIT_WORKER_THREADS')
+
+# A report still QUEUED this long after upload has no drain working on it.
+QUEUED_GRACE = timedelta(seconds=30)
+
+
+def schedule_audit(report: AuditReport) -> None:
+    if settings.AUDIT_JOB_RUNNER == 'thread':
+        transaction.on_commit(lambda: audit_pool.submit(run_audit, report.pk))
+
+
+def _local_path(field_file):
+    try:
+        return field_file.path
+    except NotImplementedError:
+        return None
+
+
+def run_audit(report_id: int, in_worker: bool = False) -> None:
+    """Claim and audit one queued report; in_worker is True inside run_audit_worker."""
+    claimed = AuditReport.objects.filter(pk=report_id, status='QUEUED').update(
+        status='RUNNING', started_at=timezone.now(), attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return
+    report = AuditReport.objects.get(pk=report_id)
+    try:
+        path = _local_path(report.file)
+        parallel = in_worker and settings.AUDIT_WORKERS > 1 and report.size_bytes >= settings.AUDIT_PARALLEL_MIN_BYTES
+        if parallel and path:
+            result = audit_csv_parallel(path, settings.AUDIT_WORKERS)
+        else:
+            with report.file.open('rb') as fh:
+                result = audit_csv(fh, memory_budget=None if in_worker else settings.AUDIT_INLINE_MEMORY_BYTES)
+    except Exception as e:
+        logger.exception("Audit %s failed", report_id)
+        AuditReport.objects.filter(pk=report_id).update(
+            status='FAILED', error=str(e), finished_at=timezone.now(),
+        )
+        return
+    AuditReport.objects.filter(pk=report_id).update(
+        status='SUCCEEDED',
+        report=result,
+        rows=result['rows'],
+        rows_per_second=result['rows_per_second'],
+        finished_at=timezone.now(),
+    )
+
+
+def drain_audits(limit=None, in_worker: bool = False) -> int:
+    """Requeue stale audits, then run queued ones, oldest first, until none are left (or limit is reached)."""
+    requeue_stale_audits()
+    processed = 0
+    while limit is None or processed < limit:
+        pk = AuditReport.objects.filter(status='QUEUED').order_by('created_at').values_list('pk', flat=True).first()
+        if pk is None:
+            break
+        # run_audit claims the report itself; a report taken by another worker is skipped.
+        run_audit(pk, in_worker)
+        processed += 1
+    return processed
+
+
+def requeue_stale_audits() -> int:
+    """
+    Return RUNNING audits whose process died to the queue, or fail them once
+    they have used up AUDIT_JOB_MAX_ATTEMPTS. Returns how many were requeued.
+    """
+    now = timezone.now()
+    stale = AuditReport.objects.filter(
+        status='RUNNING', started_at__lt=now - timedelta(seconds=settings.AUDIT_JOB_STALE_AFTER),
+    )
+    stale.filter(attempts__gte=settings.AUDIT_JOB_MAX_ATTEMPTS).update(
+        status='FAILED',
+        error=f"Gave up after {settings.AUDIT_JOB_MAX_ATTEMPTS} attempts",
+        finished_at=now,
+    )
+    return stale.update(status='QUEUED', started_at=None)
+
+
+def resume_stalled_audit(report: AuditReport) -> None:
+    """With the thread runner, start a drain if report is queued or running with nobody working on it."""
+    if settings.AUDIT_JOB_RUNNER != 'thread':
+        return
+    now = timezone.now()
+    stuck = (
+        (report.status == 'QUEUED' and report.created_at < now - QUEUED_GRACE)
+        or (report.status == 'RUNNING' and report.started_at is not None
+            and report.started_at < now - timedelta(seconds=settings.AUDIT_JOB_STALE_AFTER))
+    )
+    if stuck:
+        audit_pool.submit(drain_audits)
@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from audit.auditor import audit_csv
+from audit.parallel import audit_csv_parallel
+
+
+class Command(BaseCommand):
+    help = "Audit a CSV file on disk (duplicates, emails, blanks) and print the report."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--ignore-column', action='append', dest='ignore', help="Identifier column left out of duplicate checks (repeatable; default: id).")
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--workers', type=int, default=1, help="Audit with this many processes (byte-range partitions).")
+
+    def handle(self, *args, **options):
+        ignore = options['ignore'] or ('id',)
+        try:
+            if options['workers'] > 1:
+                report = audit_csv_parallel(options['path'], options['workers'], ignore, options['delimiter'])
+            else:
+                with open(options['path'], 'rb') as fh:
+                    report = audit_csv(fh, ignore_columns=ignore, delimiter=options['delimiter'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(json.dumps(report, indent=2))
+        self.stderr.write(f"{report['rows']} rows in {report['elapsed_seconds']}s ({report['rows_per_second']} rows/s)")
@@ -0,0 +1,71 @@
+import os
+import random
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from audit.auditor import audit_csv
+from audit.parallel import audit_csv_parallel
+
+CHECKED_KEYS = ('rows', 'malformed_rows', 'duplicates', 'emails', 'blanks', 'examples')
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic CSV with duplicates, bad emails and blanks, audit it in "
+        "streaming mode and with each worker count, and report rows/s and speedup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000_000)
+        parser.add_argument('--workers', default=f"1,2,4,{os.cpu_count() or 1}",
+                            help="Comma-separated worker counts; 1 is the streaming auditor.")
+        parser.add_argument('--path', help="Audit this file instead of generating one.")
+
+    def handle(self, *args, **options):
+        counts = sorted({max(1, int(n)) for n in options['workers'].split(',')})
+        if options['path']:
+            self.run(options['path'], counts)
+            return
+        with tempfile.TemporaryDirectory(prefix='audit-bench-') as tmp:
+            path = os.path.join(tmp, 'bench.csv')
+            self.generate(path, options['rows'])
+            self.run(path, counts)
+
+    def generate(self, path, rows):
+        rng = random.Random(0)
+        domains = ['example.com', 'valid.org', 'mailinator.com', 'tempmail.com', 'broken']
+        statuses = ['Active', 'Pending', '', 'Inactive']
+        with open(path, 'w', newline='') as fh:
+            fh.write('id,name,email,company,status\n')
+            for i in range(rows):
+                # ~15% of rows repeat an earlier person; some of those differ only in case.
+                person = rng.randint(0, int(rows * 0.85))
+                name = f'Person {person}' if rng.random() > 0.05 else f'PERSON  {person}'
+                fh.write(f'{i},{name},user{person}@{rng.choice(domains)},Company {person % 5000},{rng.choice(statuses)}\n')
+        self.stdout.write(f"Generated {rows} rows ({os.path.getsize(path) / 1e6:.1f} MB) at {path}")
+
+    def run(self, path, counts):
+        self.stdout.write(f"CPUs available: {os.cpu_count()}")
+        baseline = None
+        reference = None
+        for workers in counts:
+            if workers == 1:
+                with open(path, 'rb') as fh:
+                    report = audit_csv(fh)
+            else:
+                report = audit_csv_parallel(path, workers)
+            rate = report['rows_per_second']
+            baseline = baseline or rate
+            reference = reference or report
+            # Compare against the first run, ignoring the exact/approximate flag, which only
+            # the streaming auditor can set.
+            same = all(
+                {k: v for k, v in report[key].items() if k != 'approximate'} == {k: v for k, v in reference[key].items() if k != 'approximate'}
+                if isinstance(report[key], dict) else report[key] == reference[key]
+                for key in CHECKED_KEYS
+            )
+            self.stdout.write(
+                f"workers={workers:<3} {report['elapsed_seconds']:>8.2f}s {rate:>12,.0f} rows/s "
+                f"speedup {rate / baseline:>5.2f}x  results {'match' if same else 'DIFFER'}"
+            )
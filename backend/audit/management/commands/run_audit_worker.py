@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from audit.jobs import drain_audits
+
+
+class Command(BaseCommand):
+    help = "Run queued CSV audits (use with AUDIT_JOB_RUNNER=external); large files use AUDIT_WORKERS processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                processed = drain_audits(in_worker=True)
+            finally:
+                connections.close_all()
+            if processed:
+                self.stdout.write(f"Processed {processed} audit(s).")
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:10
+# Not regenerated under the pinned Django 6.0.2 (it needs Python >= 3.12); the
+# operations use only APIs that 6.0 keeps unchanged.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditreport',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='auditreport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+class AuditReport(models.Model):
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='audit_reports')
+    file = models.FileField(upload_to='audits/')
+    original_name = models.CharField(max_length=255, blank=True)
+    size_bytes = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    report = models.JSONField(default=dict, blank=True)
+    rows = models.BigIntegerField(default=0)
+    rows_per_second = models.FloatField(default=0)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', '-created_at'], name='audit_report_user_created_idx')]
+
+    def __str__(self):
+        return f"Audit {self.pk} - {self.original_name} - {self.status}"
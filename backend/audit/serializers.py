@@ -0,0 +1,19 @@
+from rest_framework import serializers
+from .models import AuditReport
+
+class AuditReportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditReport
+        fields = [
+            'id', 'file', 'original_name', 'size_bytes', 'status', 'report', 'rows',
+            'rows_per_second', 'error', 'created_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'original_name', 'size_bytes', 'status', 'report', 'rows',
+            'rows_per_second', 'error', 'created_at', 'finished_at',
+        ]
+
+    def validate_file(self, value):
+        if not value.name.lower().endswith('.csv'):
+            raise serializers.ValidationError("Upload a .csv file.")
+        return value
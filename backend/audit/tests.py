@@ -0,0 +1,172 @@
+import io
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .auditor import INDEX_ENTRY_BYTES, audit_csv, audit_options
+from .parallel import audit_csv_parallel, split_ranges
+from .jobs import audit_pool, drain_audits, requeue_stale_audits, run_audit
+from .models import AuditReport
+
+FIXTURE = Path(settings.BASE_DIR).parent / 'test_data.csv'
+
+
+class AuditCSVTests(TestCase):
+    def test_fixture_report(self):
+        with open(FIXTURE, 'rb') as fh:
+            report = audit_csv(fh)
+
+        self.assertEqual(report['rows'], 8)
+        self.assertEqual(report['duplicates']['exact'], 1)
+        self.assertEqual(report['examples']['exact_duplicates'][0], {'line': 6, 'duplicate_of': 2})
+        self.assertEqual((report['emails']['invalid'], report['emails']['disposable']), (2, 2))
+        self.assertEqual(report['blanks']['email']['count'], 1)
+        self.assertEqual(report['blanks']['status']['count'], 2)
+        self.assertEqual(report['malformed_rows'], {'short': 0, 'long': 1})
+
+    def test_fuzzy_duplicates_and_chunking(self):
+        content = 'id,name,email\n1,John Doe,john@example.com\n2,  john doe ,JOHN@example.com\n3,Jane,jane@example.com\n'
+        with self.settings(AUDIT_CHUNK_ROWS=1):
+            report = audit_csv(io.BytesIO(content.encode()))
+        self.assertEqual(report['duplicates']['exact'], 0)
+        self.assertEqual(report['duplicates']['fuzzy'], 1)
+
+    def test_bloom_fallback_is_flagged(self):
+        content = 'id,value\n' + ''.join(f'{i},{i % 50}\n' for i in range(200))
+        with self.settings(AUDIT_EXACT_HASH_LIMIT=10, AUDIT_BLOOM_BYTES=4096):
+            report = audit_csv(io.BytesIO(content.encode()))
+        self.assertTrue(report['duplicates']['approximate'])
+        self.assertEqual(report['duplicates']['exact'], 150)
+
+    @override_settings(AUDIT_EXACT_HASH_LIMIT=500000, AUDIT_BLOOM_BYTES=64 * 1024 * 1024)
+    def test_memory_budget_shrinks_the_indexes(self):
+        options = audit_options(memory_budget=4 * 1024 * 1024)
+        self.assertEqual(options['bloom_bytes'], 1024 * 1024)
+        self.assertEqual(options['exact_limit'], 1024 * 1024 // INDEX_ENTRY_BYTES)
+        self.assertEqual(audit_options()['exact_limit'], 500000)
+
+
+class ParallelAuditTests(TestCase):
+    def test_ranges_end_on_line_boundaries(self):
+        data = FIXTURE.read_bytes()
+        header_end = data.index(b'\n') + 1
+        ranges = split_ranges(FIXTURE, header_end, 4)
+        self.assertEqual((ranges[0][0], ranges[-1][1]), (header_end, len(data)))
+        for start, _ in ranges:
+            self.assertEqual(data[start - 1:start], b'\n')
+
+    def test_matches_streaming_audit(self):
+        rows = ''.join(f'{i},Name {i % 700},USER{i % 700}@example.com,Co\n' for i in range(3000))
+        rows += ''.join(f'{i},name  {i % 700},user{i % 700}@example.com,co\n' for i in range(3000, 3100))
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write('id,name,email,company\n' + rows)
+        self.addCleanup(Path(fh.name).unlink)
+
+        with open(fh.name, 'rb') as stream:
+            expected = audit_csv(stream)
+        with self.settings(AUDIT_PARALLEL_BUCKETS=5):
+            actual = audit_csv_parallel(fh.name, 3)
+        for key in ('rows', 'duplicates', 'emails', 'blanks', 'examples'):
+            self.assertEqual(actual[key], expected[key], key)
+        self.assertEqual(expected['duplicates']['exact'], 2300)
+        self.assertEqual(expected['duplicates']['fuzzy'], 100)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AuditReportViewTests(TestCase):
+    url = '/api/v1/audit/'
+
+    def setUp(self):
+        self.user = User.objects.create_user('auditor', 'auditor@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_upload_then_poll(self):
+        upload = SimpleUploadedFile('people.csv', FIXTURE.read_bytes())
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(callbacks), 1)
+
+        run_audit(response.data['id'])
+        data = self.client.get(f"{self.url}{response.data['id']}/").data
+        self.assertEqual(data['status'], 'SUCCEEDED')
+        self.assertEqual(data['rows'], 8)
+        self.assertEqual(data['report']['duplicates']['exact'], 1)
+
+    def test_audits_use_their_own_pool(self):
+        upload = SimpleUploadedFile('people.csv', FIXTURE.read_bytes())
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, {'file': upload}, format='multipart')
+        with patch.object(audit_pool, 'submit') as audit_submit, patch('dataaudit.background._shared.submit') as shared:
+            callbacks[0]()
+        audit_submit.assert_called_once_with(run_audit, response.data['id'])
+        shared.assert_not_called()
+
+    @override_settings(AUDIT_JOB_RUNNER='external')
+    def test_external_runner_leaves_the_report_for_the_worker(self):
+        upload = SimpleUploadedFile('people.csv', FIXTURE.read_bytes())
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(callbacks, [])
+
+        out = io.StringIO()
+        call_command('run_audit_worker', '--once', stdout=out)
+        self.assertIn("Processed 1 audit(s).", out.getvalue())
+        self.assertEqual(AuditReport.objects.get(pk=response.data['id']).status, 'SUCCEEDED')
+
+    @override_settings(AUDIT_WORKERS=2, AUDIT_PARALLEL_MIN_BYTES=1)
+    def test_only_the_worker_starts_processes(self):
+        report = AuditReport.objects.create(
+            user=self.user, file=SimpleUploadedFile('people.csv', FIXTURE.read_bytes()), size_bytes=100,
+        )
+        with patch('audit.jobs.audit_csv_parallel') as parallel:
+            run_audit(report.pk)
+        parallel.assert_not_called()
+        self.assertEqual(AuditReport.objects.get(pk=report.pk).status, 'SUCCEEDED')
+
+        report = AuditReport.objects.create(
+            user=self.user, file=SimpleUploadedFile('people.csv', FIXTURE.read_bytes()), size_bytes=100,
+        )
+        with patch('audit.jobs.audit_csv_parallel', return_value={'rows': 8, 'rows_per_second': 1.0}) as parallel:
+            call_command('run_audit_worker', '--once', stdout=io.StringIO())
+        parallel.assert_called_once_with(report.file.path, 2)
+
+    @override_settings(AUDIT_JOB_MAX_ATTEMPTS=2)
+    def test_stale_audits_are_retried_then_failed(self):
+        report = AuditReport.objects.create(
+            user=self.user, file=SimpleUploadedFile('people.csv', FIXTURE.read_bytes()), size_bytes=100,
+        )
+        stale = timezone.now() - timedelta(hours=2)
+        AuditReport.objects.filter(pk=report.pk).update(status='RUNNING', started_at=stale, attempts=1)
+        self.assertEqual(drain_audits(), 1)
+        report.refresh_from_db()
+        self.assertEqual((report.status, report.attempts), ('SUCCEEDED', 2))
+
+        AuditReport.objects.filter(pk=report.pk).update(status='RUNNING', started_at=stale)
+        self.assertEqual(requeue_stale_audits(), 0)
+        report.refresh_from_db()
+        self.assertEqual((report.status, report.error), ('FAILED', 'Gave up after 2 attempts'))
+
+    def test_polling_a_stuck_report_starts_a_drain(self):
+        report = AuditReport.objects.create(user=self.user, file='audits/x.csv')
+        with patch.object(audit_pool, 'submit') as submit:
+            self.client.get(f'{self.url}{report.pk}/')
+            submit.assert_not_called()
+            AuditReport.objects.filter(pk=report.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+            self.client.get(f'{self.url}{report.pk}/')
+        submit.assert_called_once_with(drain_audits)
+
+    def test_rejects_other_users_reports(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pw')
+        report = AuditReport.objects.create(user=other, file='audits/x.csv')
+        self.assertEqual(self.client.get(f'{self.url}{report.pk}/').status_code, 404)
@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from .views import AuditReportViewSet
+
+router = DefaultRouter()
+router.register(r'', AuditReportViewSet, basename='audit-report')
+
+urlpatterns = router.urls
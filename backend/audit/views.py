@@ -0,0 +1,30 @@
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.parsers import MultiPartParser
+from .jobs import resume_stalled_audit, schedule_audit
+from .models import AuditReport
+from .serializers import AuditReportSerializer
+
+class AuditReportViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                         mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Upload a CSV to audit it in the background, then poll the report."""
+    serializer_class = AuditReportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def get_queryset(self):
+        return AuditReport.objects.filter(user=self.request.user).order_by('-created_at')
+
+    def get_object(self):
+        report = super().get_object()
+        resume_stalled_audit(report)
+        return report
+
+    def perform_create(self, serializer):
+        upload = serializer.validated_data['file']
+        report = serializer.save(user=self.request.user, original_name=upload.name, size_bytes=upload.size)
+        schedule_audit(report)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
@@ -0,0 +1,64 @@
+"""
+In-process thread pools for work that must not block a request/response cycle.
+
+Each pool is created lazily and re-created after a fork, so every gunicorn
+worker owns its own threads. Each task closes the database connections it
+opened, since Django connections are per-thread and would otherwise leak.
+
+`submit` uses the shared pool (BACKGROUND_WORKER_THREADS). Long-running job
+types get a BackgroundPool of their own, so they cannot occupy every shared
+thread and hold up short tasks.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def _run(fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(fn, '__name__', fn))
+    finally:
+        connections.close_all()
+
+
+class BackgroundPool:
+    """A per-process thread pool named `name`, sized by the setting called `size_setting`."""
+
+    def __init__(self, name: str, size_setting: str):
+        self.name = name
+        self.size_setting = size_setting
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, self.size_setting),
+                        thread_name_prefix=self.name,
+                    )
+                    self._pid = pid
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on this pool and return its Future."""
+        return self._get_executor().submit(_run, fn, args, kwargs)
+
+
+_shared = BackgroundPool('background', 'BACKGROUND_WORKER_THREADS')
+
+
+def submit(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) on the shared background pool and return its Future."""
+    return _shared.submit(fn, *args, **kwargs)
@@ -0,0 +1,32 @@
+"""
+Whether a Django cache alias is shared between worker processes.
+
+Version counters (users/stats.py) and cross-worker result sharing
+(ai_engine/cache.py) are only correct when every gunicorn worker reads and
+writes the same store. LocMemCache lives inside one process and DummyCache
+stores nothing, so callers skip those aliases instead of serving another
+worker's stale view.
+
+`manage.py check --deploy` fails while the default alias is process-local.
+"""
+from django.core.cache import caches
+from django.core.checks import Error, Tags, register
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared(alias: str = 'default') -> bool:
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_default_cache(app_configs, **kwargs):
+    if is_shared('default'):
+        return []
+    return [Error(
+        "The default cache is process-local, so each worker keeps its own dashboard versions.",
+        hint="Set REDIS_URL so all workers share one cache.",
+        id='dataaudit.E001',
+    )]
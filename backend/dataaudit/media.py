@@ -0,0 +1,174 @@
+"""
+Delivery of uploaded media (MEDIA_URL) in every environment.
+
+serve_media answers single-range requests (`Range: bytes=...`) with 206 and
+only the requested bytes. If-Range, If-None-Match and If-Modified-Since are
+honoured against a strong ETag built from the file's mtime and size. Bodies
+are a FileResponse over the open file, positioned at the range start and
+capped at its length. WSGI servers that provide wsgi.file_wrapper (gunicorn)
+hand that file descriptor to sendfile(), so seeking in a large video costs
+the requested bytes and no copying through Python.
+
+With MEDIA_ACCEL_REDIRECT set (e.g. '/protected-media/'), the view only
+checks access and replies with X-Accel-Redirect. nginx then serves the file
+from an `internal` location and does the range handling itself.
+
+Files under PRIVATE_MEDIA prefixes are only served to their owner (or
+staff), authenticated by session or API token. Everything else is public.
+Paths with `.`, `..` or empty segments get a 404 before any prefix check,
+so a public prefix cannot be used to reach a private file.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from audit.models import AuditReport
+from resumes.models import Resume
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Storage prefix -> queryset of rows that own files under it.
+PRIVATE_MEDIA = {
+    'resumes/': lambda user: Resume.objects.filter(user=user),
+    'audits/': lambda user: AuditReport.objects.filter(user=user),
+}
+
+
+class RangeFile:
+    """Read at most `length` bytes of fh from its current position; keeps fileno() for sendfile."""
+
+    def __init__(self, fh, length: int):
+        self._fh = fh
+        self.remaining = length
+        self.name = fh.name
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._fh.fileno()
+
+    def close(self):
+        self._fh.close()
+
+
+def parse_range(header: str, size: int):
+    """
+    (start, end) inclusive for a single satisfiable byte range, None to send
+    the whole file (absent, malformed or multi-range header), or raise
+    ValueError if the range cannot be satisfied.
+    """
+    match = _RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        if not suffix or not size:
+            raise ValueError("Empty suffix range")
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range starts past the end of the file")
+    return start, end
+
+
+def _request_user(request):
+    if request.user.is_authenticated:
+        return request.user
+    try:
+        found = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return found[0] if found else None
+
+
+def can_access(request, name: str) -> bool:
+    for prefix, owned in PRIVATE_MEDIA.items():
+        if name.startswith(prefix):
+            user = _request_user(request)
+            if user is None:
+                return False
+            return user.is_staff or owned(user).filter(file=name).exists()
+    return True
+
+
+def serve_media(request, path):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    name = path.lstrip('/')
+    # Prefix checks below must see the name the storage will resolve.
+    if posixpath.normpath(name) != name or any(part in ('.', '..') for part in name.split('/')):
+        raise Http404("Invalid path")
+    try:
+        full_path = default_storage.path(name)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid path")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+    # Private files get the same 404 as missing ones, so their names cannot be probed.
+    if not can_access(request, name):
+        raise Http404("File not found")
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    private = any(name.startswith(prefix) for prefix in PRIVATE_MEDIA)
+    cache_control = 'private, no-cache' if private else f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT + quote(name)
+        response['Cache-Control'] = cache_control
+        return response
+
+    stat = os.stat(full_path)
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    last_modified = int(stat.st_mtime)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified['Cache-Control'] = cache_control
+        return not_modified
+
+    byte_range = None
+    if_range = request.headers.get('If-Range', '')
+    if 'Range' in request.headers and (not if_range or if_range == etag or parse_http_date_safe(if_range) == last_modified):
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    else:
+        fh = open(full_path, 'rb')
+        fh.seek(start)
+        response = FileResponse(RangeFile(fh, length), content_type=content_type)
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = length
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+    return response
@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     'tracking',
     'ai_engine',
     'engine',
+    'audit',
 ]
 
 MIDDLEWARE = [
@@ -95,6 +96,30 @@ DATABASES = {
     }
 }
 
+# Caches: per-process locmem by default (tests, single-worker dev). Set REDIS_URL
+# (and install redis-py) so every gunicorn worker shares cached results and the
+# dashboard version counters. Without it the dashboard payload cache and the
+# shared AI result tier are skipped, and `check --deploy` reports an error.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+            'KEY_PREFIX': 'revenuflow',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'revenuflow',
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('LOCMEM_CACHE_MAX_ENTRIES', '5000'))},
+        }
+    }
+
+# Dashboard stats payload cache (see users/stats.py), keyed by a per-user version
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '300'))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
@@ -106,6 +131,142 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Groq API key, and the client connection pool shared by every request in a worker process
+GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
+GROQ_POOL_SIZE = int(os.getenv('GROQ_POOL_SIZE', '10'))
+GROQ_TIMEOUT = float(os.getenv('GROQ_TIMEOUT', '60'))
+GROQ_CONNECT_TIMEOUT = float(os.getenv('GROQ_CONNECT_TIMEOUT', '5'))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv('GROQ_KEEPALIVE_EXPIRY', '30'))
+
+# LLM call policy (see ai_engine/resilience.py). AI_CALL_DEADLINE bounds a whole call
+# including retries; AI_HEDGE_AFTER > 0 starts a second request after that many seconds,
+# on a per-process pool of AI_HEDGE_POOL_SIZE threads (first attempts never use it).
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL', '')
+AI_CALL_DEADLINE = float(os.getenv('AI_CALL_DEADLINE', '30'))
+AI_RETRY_ATTEMPTS = int(os.getenv('AI_RETRY_ATTEMPTS', '3'))
+AI_RETRY_BASE_DELAY = float(os.getenv('AI_RETRY_BASE_DELAY', '0.5'))
+AI_RETRY_MAX_DELAY = float(os.getenv('AI_RETRY_MAX_DELAY', '4'))
+AI_HEDGE_AFTER = float(os.getenv('AI_HEDGE_AFTER', '0'))
+AI_HEDGE_POOL_SIZE = int(os.getenv('AI_HEDGE_POOL_SIZE', '8'))
+AI_BREAKER_FAILURE_RATE = float(os.getenv('AI_BREAKER_FAILURE_RATE', '0.5'))
+AI_BREAKER_MIN_CALLS = int(os.getenv('AI_BREAKER_MIN_CALLS', '10'))
+AI_BREAKER_WINDOW = int(os.getenv('AI_BREAKER_WINDOW', '30'))
+AI_BREAKER_RESET_AFTER = float(os.getenv('AI_BREAKER_RESET_AFTER', '30'))
+
+# AI result cache: an in-process LRU tier in front of the Django cache alias below.
+# The alias is only used when it is shared between processes (not locmem); set it
+# to an empty string to keep results process-local only.
+AI_RESULT_CACHE_TTL = int(os.getenv('AI_RESULT_CACHE_TTL', '86400'))
+AI_RESULT_CACHE_MAX_ENTRIES = int(os.getenv('AI_RESULT_CACHE_MAX_ENTRIES', '512'))
+AI_RESULT_CACHE_ALIAS = os.getenv('AI_RESULT_CACHE_ALIAS', 'default')
+
+# Token budgets for user text embedded in LLM prompts (see ai_engine/prompting.py)
+AI_PROMPT_RESUME_TOKENS = int(os.getenv('AI_PROMPT_RESUME_TOKENS', '3000'))
+AI_PROMPT_JOB_TOKENS = int(os.getenv('AI_PROMPT_JOB_TOKENS', '1500'))
+AI_PROMPT_PROFILE_TOKENS = int(os.getenv('AI_PROMPT_PROFILE_TOKENS', '2000'))
+
+# Local keyword scorer. Resumes scoring below AI_LOCAL_SCORE_SKIP_BELOW locally are
+# answered without the LLM; AI_LOCAL_ONLY=True never calls the LLM (offline mode).
+AI_LOCAL_ONLY = os.getenv('AI_LOCAL_ONLY', 'False') == 'True'
+AI_LOCAL_SCORE_SKIP_BELOW = int(os.getenv('AI_LOCAL_SCORE_SKIP_BELOW', '15'))
+
+# Batch ATS scoring (one resume against many applications). AI_BATCH_DEADLINE bounds
+# the whole request and must stay below the gunicorn worker timeout (120 s).
+AI_BATCH_CONCURRENCY = int(os.getenv('AI_BATCH_CONCURRENCY', '4'))
+AI_BATCH_MAX_APPLICATIONS = int(os.getenv('AI_BATCH_MAX_APPLICATIONS', '100'))
+AI_BATCH_DEADLINE = float(os.getenv('AI_BATCH_DEADLINE', '90'))
+
+# Bulk CSV / JSON Lines import of job applications (see tracking/bulk.py)
+TRACKING_IMPORT_BATCH_SIZE = int(os.getenv('TRACKING_IMPORT_BATCH_SIZE', '1000'))
+TRACKING_IMPORT_MAX_ROWS = int(os.getenv('TRACKING_IMPORT_MAX_ROWS', '50000'))
+TRACKING_IMPORT_MAX_ERRORS = int(os.getenv('TRACKING_IMPORT_MAX_ERRORS', '500'))
+
+# Background work. ANALYSIS_JOB_RUNNER is 'thread' to run resume analyses on the
+# in-process pool, or 'external' when `manage.py run_analysis_worker` drains the queue.
+# A job running longer than ANALYSIS_JOB_STALE_AFTER seconds is presumed dead and retried,
+# up to ANALYSIS_JOB_MAX_ATTEMPTS runs in total.
+BACKGROUND_WORKER_THREADS = int(os.getenv('BACKGROUND_WORKER_THREADS', '4'))
+ANALYSIS_JOB_RUNNER = os.getenv('ANALYSIS_JOB_RUNNER', 'thread')
+ANALYSIS_JOB_STALE_AFTER = int(os.getenv('ANALYSIS_JOB_STALE_AFTER', '600'))
+ANALYSIS_JOB_MAX_ATTEMPTS = int(os.getenv('ANALYSIS_JOB_MAX_ATTEMPTS', '3'))
+
+# Resume text extraction limits (see resumes/extraction.py)
+RESUME_MAX_PAGES = int(os.getenv('RESUME_MAX_PAGES', '50'))
+RESUME_MAX_TEXT_CHARS = int(os.getenv('RESUME_MAX_TEXT_CHARS', '100000'))
+
+# CSV data audits (see audit/auditor.py). Duplicate detection is exact for the first
+# AUDIT_EXACT_HASH_LIMIT distinct rows, then approximate in a Bloom filter of AUDIT_BLOOM_BYTES.
+AUDIT_CHUNK_ROWS = int(os.getenv('AUDIT_CHUNK_ROWS', '10000'))
+AUDIT_EXACT_HASH_LIMIT = int(os.getenv('AUDIT_EXACT_HASH_LIMIT', '500000'))
+AUDIT_BLOOM_BYTES = int(os.getenv('AUDIT_BLOOM_BYTES', str(64 * 1024 * 1024)))
+AUDIT_MAX_EXAMPLES = int(os.getenv('AUDIT_MAX_EXAMPLES', '20'))
+AUDIT_EXTRA_DISPOSABLE_DOMAINS = [d.strip() for d in os.getenv('AUDIT_EXTRA_DISPOSABLE_DOMAINS', '').split(',') if d.strip()]
+# Files of at least AUDIT_PARALLEL_MIN_BYTES are audited by AUDIT_WORKERS processes
+# (see audit/parallel.py); AUDIT_PARALLEL_BUCKETS=0 sizes the duplicate spill buckets
+# at one per AUDIT_PARALLEL_BUCKET_BYTES of input (at least 4 per worker).
+AUDIT_WORKERS = int(os.getenv('AUDIT_WORKERS', '1'))
+AUDIT_PARALLEL_MIN_BYTES = int(os.getenv('AUDIT_PARALLEL_MIN_BYTES', str(64 * 1024 * 1024)))
+AUDIT_PARALLEL_BUCKETS = int(os.getenv('AUDIT_PARALLEL_BUCKETS', '0'))
+AUDIT_PARALLEL_BUCKET_BYTES = int(os.getenv('AUDIT_PARALLEL_BUCKET_BYTES', str(64 * 1024 * 1024)))
+AUDIT_PARALLEL_START_METHOD = os.getenv('AUDIT_PARALLEL_START_METHOD', 'spawn')
+# AUDIT_JOB_RUNNER is 'thread' to run uploaded audits on their own in-process pool of
+# AUDIT_WORKER_THREADS threads, or 'external' when `manage.py run_audit_worker` runs them.
+# Only that command uses AUDIT_WORKERS processes. Audits run inside a web process keep
+# their duplicate indexes (dicts and Bloom filters) within AUDIT_INLINE_MEMORY_BYTES.
+# An audit RUNNING longer than AUDIT_JOB_STALE_AFTER seconds is presumed dead (its process
+# restarted) and requeued, up to AUDIT_JOB_MAX_ATTEMPTS runs in total.
+AUDIT_JOB_RUNNER = os.getenv('AUDIT_JOB_RUNNER', 'thread')
+AUDIT_WORKER_THREADS = int(os.getenv('AUDIT_WORKER_THREADS', '1'))
+AUDIT_JOB_STALE_AFTER = int(os.getenv('AUDIT_JOB_STALE_AFTER', '1800'))
+AUDIT_JOB_MAX_ATTEMPTS = int(os.getenv('AUDIT_JOB_MAX_ATTEMPTS', '3'))
+AUDIT_INLINE_MEMORY_BYTES = int(os.getenv('AUDIT_INLINE_MEMORY_BYTES', str(32 * 1024 * 1024)))
+
+# Video view counting (see engine/counters.py): 'buffered' batches views per worker and
+# flushes them with F('views') + n updates; 'atomic' writes every view immediately.
+VIDEO_VIEW_COUNTER = os.getenv('VIDEO_VIEW_COUNTER', 'buffered')
+VIDEO_VIEW_FLUSH_INTERVAL = float(os.getenv('VIDEO_VIEW_FLUSH_INTERVAL', '10'))
+VIDEO_VIEW_FLUSH_THRESHOLD = int(os.getenv('VIDEO_VIEW_FLUSH_THRESHOLD', '500'))
+
+# Video search (see engine/search.py): 'auto' uses FTS5 on SQLite and a tsvector GIN
+# index on PostgreSQL; 'basic' is the unindexed icontains filter.
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+SEARCH_POSTGRES_CONFIG = os.getenv('SEARCH_POSTGRES_CONFIG', 'english')
+SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', '24'))
+
+# Video feeds (see engine/feeds.py): page size, and how long the category list may be
+# cached by workers that did not make the change themselves (locmem cache only).
+FEED_PAGE_SIZE = int(os.getenv('FEED_PAGE_SIZE', '24'))
+CATEGORY_CACHE_TTL = int(os.getenv('CATEGORY_CACHE_TTL', '3600'))
+
+# Related videos (see engine/recommendations.py): list length, browser history used for
+# co-views, weight of title/description similarity against co-views, and the share of
+# videos above which a word is too common to compare on.
+RECOMMEND_NEIGHBORS = int(os.getenv('RECOMMEND_NEIGHBORS', '12'))
+RECOMMEND_HISTORY = int(os.getenv('RECOMMEND_HISTORY', '5'))
+RECOMMEND_TEXT_WEIGHT = float(os.getenv('RECOMMEND_TEXT_WEIGHT', '0.5'))
+RECOMMEND_MAX_DF = float(os.getenv('RECOMMEND_MAX_DF', '0.2'))
+
+# Uploaded video processing (see engine/media.py): WebP quality of the resized thumbnails.
+# A video still PROCESSING after VIDEO_PROCESSING_STALE_AFTER seconds is presumed abandoned
+# (e.g. its worker was restarted) and may be claimed again.
+VIDEO_THUMBNAIL_QUALITY = int(os.getenv('VIDEO_THUMBNAIL_QUALITY', '80'))
+VIDEO_PROCESSING_STALE_AFTER = int(os.getenv('VIDEO_PROCESSING_STALE_AFTER', '900'))
+
+# Logging: per-call LLM records are emitted as JSON lines on "ai_engine.calls".
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'ai_engine': {
+            'handlers': ['console'],
+            'level': os.getenv('AI_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 # CORS settings for React
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -156,6 +317,13 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Built React app, served from memory by dataaudit/spa.py. With SPA_AUTO_RELOAD the files
+# are rescanned at most every SPA_RELOAD_INTERVAL seconds and reloaded after a rebuild.
+FRONTEND_DIST_DIR = os.getenv('FRONTEND_DIST_DIR', os.path.join(BASE_DIR, '..', 'frontend', 'dist'))
+SPA_AUTO_RELOAD = os.getenv('SPA_AUTO_RELOAD', str(DEBUG)) == 'True'
+SPA_RELOAD_INTERVAL = float(os.getenv('SPA_RELOAD_INTERVAL', '1'))
+SPA_ROOT_FILE_MAX_AGE = int(os.getenv('SPA_ROOT_FILE_MAX_AGE', '86400'))
+
 # Only include frontend/dist/assets if it exists (avoids crash before first npm build)
 _FRONTEND_ASSETS = os.path.join(BASE_DIR, '..', 'frontend', 'dist', 'assets')
 STATICFILES_DIRS = [_FRONTEND_ASSETS] if os.path.isdir(_FRONTEND_ASSETS) else []
@@ -163,6 +331,10 @@ STATICFILES_DIRS = [_FRONTEND_ASSETS] if os.path.isdir(_FRONTEND_ASSETS) else []
 # Media files (Videos, Thumbnails)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Set to nginx's internal location (e.g. '/protected-media/') to let nginx send files
+# after Django has checked access; see scripts/nginx.conf.
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', '')
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', '86400'))
 
 # WhiteNoise configuration for static files compression and caching
 STORAGES = {
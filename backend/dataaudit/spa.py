@@ -0,0 +1,199 @@
+"""
+In-memory server for the built React app (FRONTEND_DIST_DIR).
+
+Every file of the Vite build is read once into an AssetStore together with
+its gzip variant and, when the optional `brotli` package is installed, its
+brotli variant. Compressed variants are kept only for compressible types,
+and only when they are smaller. Each file gets a strong ETag from a content
+hash (suffixed per encoding). Requests are answered from memory with the best encoding the client
+accepts, and with 304 when If-None-Match matches:
+
+- index.html (the SPA shell, served for every client-side route):
+  `no-cache`, so browsers revalidate it and pick up a new build at once.
+- assets/* (Vite content-hashed names): `immutable`, cached for a year.
+- other files at the root of dist (favicon etc.): SPA_ROOT_FILE_MAX_AGE.
+
+The store is loaded when the WSGI application starts. With
+SPA_AUTO_RELOAD (on by default when DEBUG), it rescans the directory's
+modification times at most once per SPA_RELOAD_INTERVAL seconds and
+reloads after a rebuild. Otherwise no request touches the filesystem.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+SHELL = 'index.html'
+IMMUTABLE_PREFIX = 'assets/'
+
+COMPRESSIBLE_TYPES = frozenset({
+    'application/javascript', 'text/javascript', 'application/json', 'application/manifest+json',
+    'image/svg+xml', 'application/xml', 'application/wasm', 'font/ttf', 'font/otf',
+})
+
+
+def _compressible(content_type: str) -> bool:
+    return content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES
+
+
+def accepted_encodings(header: str) -> set:
+    """Codings listed in an Accept-Encoding header with a non-zero q value."""
+    accepted = set()
+    for part in header.lower().split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip())
+    return accepted
+
+
+class Asset:
+    __slots__ = ('content_type', 'variants')
+
+    def __init__(self, name: str, body: bytes):
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        encoded = []
+        if _compressible(content_type):
+            # Built once per file, so the slowest, smallest settings are worth it.
+            if brotli is not None:
+                encoded.append(('br', brotli.compress(body, quality=11)))
+            encoded.append(('gzip', gzip.compress(body, compresslevel=9, mtime=0)))
+        # (encoding, body, etag), preferred first; identity is always last.
+        self.variants = [
+            (encoding, data, f'"{digest}-{encoding}"') for encoding, data in encoded if len(data) < len(body)
+        ]
+        self.variants.append(('identity', body, f'"{digest}"'))
+
+    def negotiate(self, accept_encoding: str):
+        """(encoding, body, etag) of the best variant the client accepts."""
+        accepted = accepted_encodings(accept_encoding)
+        for variant in self.variants:
+            if variant[0] == 'identity' or variant[0] in accepted or '*' in accepted:
+                return variant
+
+
+class AssetStore:
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.assets = {}
+        self.signature = None
+        self.checked_at = 0.0
+        self.load()
+
+    def _scan(self):
+        """{relative path: (mtime_ns, size)} of every file under root."""
+        files = {}
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                files[os.path.relpath(path, self.root).replace(os.sep, '/')] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def load(self) -> None:
+        signature = self._scan()
+        assets = {}
+        for name in signature:
+            with open(os.path.join(self.root, name), 'rb') as fh:
+                assets[name] = Asset(name, fh.read())
+        self.assets, self.signature = assets, signature
+        self.checked_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Reload if files changed; checks at most once per SPA_RELOAD_INTERVAL seconds."""
+        if time.monotonic() - self.checked_at < settings.SPA_RELOAD_INTERVAL:
+            return
+        self.checked_at = time.monotonic()
+        if self._scan() != self.signature:
+            self.load()
+
+    def get(self, name: str):
+        return self.assets.get(name)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> AssetStore:
+    global _store
+    root = os.path.abspath(settings.FRONTEND_DIST_DIR)
+    if _store is None or _store.root != root:
+        with _store_lock:
+            if _store is None or _store.root != root:
+                _store = AssetStore(root)
+    elif settings.SPA_AUTO_RELOAD:
+        with _store_lock:
+            _store.refresh()
+    return _store
+
+
+def _respond(request, asset: Asset, cache_control: str) -> HttpResponse:
+    encoding, body, etag = asset.negotiate(request.headers.get('Accept-Encoding', ''))
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['Cache-Control'] = cache_control
+        patch_vary_headers(not_modified, ['Accept-Encoding'])
+        return not_modified
+
+    response = HttpResponse(b'' if request.method == 'HEAD' else body, content_type=asset.content_type)
+    response['Content-Length'] = len(body)
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def _cache_control(name: str) -> str:
+    if name == SHELL:
+        return 'no-cache'
+    if name.startswith(IMMUTABLE_PREFIX):
+        return 'public, max-age=31536000, immutable'
+    return f'public, max-age={settings.SPA_ROOT_FILE_MAX_AGE}'
+
+
+def serve_shell(request):
+    """
+    A file from the root of dist if the path names one (favicon etc.), else
+    index.html. None if the frontend has not been built.
+    """
+    store = get_store()
+    name = request.path.lstrip('/')
+    if name.startswith(IMMUTABLE_PREFIX) or store.get(name) is None:
+        name = SHELL
+    asset = store.get(name)
+    if asset is None:
+        return None
+    return _respond(request, asset, _cache_control(name))
+
+
+def serve_asset(request, path):
+    asset = get_store().get(IMMUTABLE_PREFIX + path)
+    if asset is None:
+        raise Http404("Asset not found")
+    return _respond(request, asset, _cache_control(IMMUTABLE_PREFIX))
+
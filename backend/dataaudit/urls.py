@@ -17,29 +17,26 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
-from django.views.static import serve
+from dataaudit.media import serve_media
+from dataaudit.spa import serve_asset
 from engine import views as engine_views
-import os
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     
-    # Static Assets serving (Prioritize over SPA)
-    path('assets/<path:path>', serve, {
-        'document_root': os.path.join(settings.BASE_DIR, '..', 'frontend', 'dist', 'assets'),
-    }),
-    path('vite.svg', serve, {
-        'document_root': os.path.join(settings.BASE_DIR, '..', 'frontend', 'dist'),
-        'path': 'vite.svg'
-    }),
+    # Built frontend assets, served from memory (Prioritize over SPA)
+    path('assets/<path:path>', serve_asset),
 
     # API Routes
     path('api/v1/users/', include('users.urls')),
     path('api/v1/resumes/', include('resumes.urls')),
     path('api/v1/tracking/', include('tracking.urls')),
     path('api/v1/ai/', include('ai_engine.urls')),
+    path('api/v1/audit/', include('audit.urls')),
     
+    # Uploaded media: Range/206 and ownership checks (see dataaudit/media.py)
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+
     # Specific engine routes
     path('engine/', include('engine.urls')),
     
@@ -49,6 +46,3 @@ urlpatterns = [
     # Catch-all for SPA navigation (Dashboard, etc.)
     re_path(r'^.*$', engine_views.home, name='home'),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
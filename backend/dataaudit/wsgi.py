@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dataaudit.settings')
 
 application = get_wsgi_application()
+
+# Read and compress the built frontend before the first request arrives.
+from dataaudit.spa import get_store  # noqa: E402
+
+get_store()
@@ -0,0 +1,79 @@
+"""
+Video feeds for the category pages and their JSON endpoints.
+
+Feeds are keyset-paginated on (created_at, id), newest first. The cursor
+is an opaque token holding the last row's key. The next page is
+`WHERE (created_at, id) < cursor ORDER BY created_at DESC, id DESC LIMIT n`,
+served by the video_created_idx / video_category_created_idx indexes. Every
+page costs the same no matter how deep it is or how large the category
+grows, and rows inserted meanwhile never shift later pages. Rows come with
+their category and uploader through select_related.
+
+The category list changes rarely and appears on every page, so it is cached
+until a Category is saved or deleted (see engine/signals.py).
+"""
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.urls import reverse
+
+from .models import Category, Video
+
+CATEGORIES_CACHE_KEY = 'engine:categories'
+
+
+def encode_cursor(video) -> str:
+    raw = f'{video.created_at.isoformat()}|{video.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    """(created_at, id) from a cursor token; ValueError if it was not made by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def feed_page(queryset, cursor: str = '', size: int = None):
+    """One page of queryset, newest first, after cursor. Returns (videos, next cursor or None)."""
+    size = size or settings.FEED_PAGE_SIZE
+    queryset = queryset.select_related('category', 'uploader').order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    videos = list(queryset[:size + 1])
+    if len(videos) > size:
+        return videos[:size], encode_cursor(videos[size - 1])
+    return videos, None
+
+
+def get_categories():
+    categories = cache.get(CATEGORIES_CACHE_KEY)
+    if categories is None:
+        categories = list(Category.objects.order_by('name'))
+        cache.set(CATEGORIES_CACHE_KEY, categories, settings.CATEGORY_CACHE_TTL)
+    return categories
+
+
+def invalidate_categories() -> None:
+    cache.delete(CATEGORIES_CACHE_KEY)
+
+
+def video_payload(video: Video) -> dict:
+    return {
+        'id': video.pk,
+        'title': video.title,
+        'url': reverse('watch', args=[video.pk]),
+        'thumbnail': video.thumbnail_card_url or None,
+        'duration': video.duration,
+        'views': video.views,
+        'created_at': video.created_at.isoformat(),
+        'category': {'name': video.category.name, 'slug': video.category.slug} if video.category else None,
+        'uploader': video.uploader.username if video.uploader else None,
+    }
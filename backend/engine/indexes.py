@@ -0,0 +1,23 @@
+"""
+Index types that only exist on PostgreSQL.
+
+Models declare them like any other index, so they are part of the migration
+state on every database. Other databases get a statement that does nothing,
+since schema editors (e.g. SQLite rebuilding a table) execute whatever
+create_sql returns.
+"""
+from django.contrib.postgres.indexes import GinIndex
+
+NOOP_SQL = 'SELECT 1'
+
+
+class PostgresGinIndex(GinIndex):
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return NOOP_SQL
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return NOOP_SQL
+        return super().remove_sql(model, schema_editor, **kwargs)
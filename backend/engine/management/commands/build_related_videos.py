@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from engine.recommendations import build_related_videos
+
+
+class Command(BaseCommand):
+    help = "Rebuild related-video lists for videos whose co-views or text changed (all videos with --full)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every video, not only stale ones.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        built = build_related_videos(full=options['full'])
+        self.stdout.write(f"Built related videos for {built} video(s) in {time.perf_counter() - started:.2f}s.")
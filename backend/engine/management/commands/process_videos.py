@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from engine.media import process_video, stuck_processing
+from engine.models import Video
+
+
+class Command(BaseCommand):
+    help = "Read durations and render thumbnail variants for videos that have not been processed yet (or got stuck)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--video', type=int, action='append', dest='videos', help="Limit to this video id (repeatable).")
+        parser.add_argument('--failed', action='store_true', help="Also retry videos whose processing failed.")
+        parser.add_argument('--all', action='store_true', help="Reprocess every video.")
+
+    def handle(self, *args, **options):
+        videos = Video.objects.order_by('id')
+        if options['videos']:
+            videos = videos.filter(pk__in=options['videos'])
+        elif not options['all']:
+            statuses = ['PENDING', 'FAILED'] if options['failed'] else ['PENDING']
+            videos = videos.filter(Q(processing_status__in=statuses) | stuck_processing())
+
+        video_ids = list(videos.values_list('id', flat=True))
+        for video_id in video_ids:
+            process_video(video_id)
+        failed = Video.objects.filter(pk__in=video_ids, processing_status='FAILED').count()
+        self.stdout.write(f"Processed {len(video_ids)} video(s), {failed} failed.")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from engine.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the video search index from the video table, e.g. after bulk writes that skipped signals."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        indexed = backend.rebuild()
+        self.stdout.write(f"Rebuilt the '{backend.name}' search index ({indexed} video(s)).")
@@ -0,0 +1,258 @@
+"""
+Off-request processing of uploaded videos.
+
+upload_video stores the files and schedules process_video on the background
+pool once the transaction commits. Processing:
+
+- reads the duration from the container header, never the media stream:
+  the `mvhd` box of MP4/MOV files, or Segment/Info of Matroska/WebM files.
+  Other containers keep an empty duration.
+- renders the uploaded thumbnail into the fixed 16:9 THUMBNAIL_VARIANTS,
+  re-encoded as WebP (JPEG if Pillow lacks WebP) at VIDEO_THUMBNAIL_QUALITY.
+  JPEG sources are decoded at reduced scale with Image.draft. Sources
+  smaller than a variant are only cropped, never upscaled.
+- records the result on the video: processing_status moves from PENDING
+  through PROCESSING to READY or FAILED. A video left PROCESSING for
+  VIDEO_PROCESSING_STALE_AFTER seconds (its worker died) can be claimed
+  again, by the next upload-triggered run or `manage.py process_videos`.
+
+Pages render the variants through Video.thumbnail_card_url and friends,
+which fall back to the original upload until processing has finished.
+"""
+import io
+import logging
+import struct
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from dataaudit.background import submit
+from .models import Video
+
+logger = logging.getLogger(__name__)
+
+# name -> (width, height); every variant is cropped to 16:9.
+THUMBNAIL_VARIANTS = {
+    'small': (320, 180),
+    'card': (640, 360),
+    'poster': (1280, 720),
+}
+
+
+class UnknownContainer(ValueError):
+    pass
+
+
+# ── Duration from container headers ─────────────────────────────────────────
+
+def _read_exact(fh, size: int) -> bytes:
+    data = fh.read(size)
+    if len(data) != size:
+        raise UnknownContainer("Truncated header")
+    return data
+
+
+def _iter_mp4_boxes(fh, end=None):
+    """Yield (type, payload offset, payload size) for each box, seeking over payloads."""
+    position = fh.tell()
+    while end is None or position + 8 <= end:
+        header = fh.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', _read_exact(fh, 8))[0]
+            header_size = 16
+        elif size == 0:
+            fh.seek(0, io.SEEK_END)
+            size = fh.tell() - position
+        if size < header_size:
+            raise UnknownContainer("Invalid MP4 box size")
+        yield kind, position + header_size, size - header_size
+        position += size
+        fh.seek(position)
+
+
+def mp4_duration(fh) -> float:
+    for kind, offset, size in _iter_mp4_boxes(fh):
+        if kind != b'moov':
+            continue
+        for child, child_offset, _ in _iter_mp4_boxes(fh, offset + size):
+            if child != b'mvhd':
+                continue
+            fh.seek(child_offset)
+            version = _read_exact(fh, 4)[0]
+            if version == 1:
+                timescale, duration = struct.unpack('>16xIQ', _read_exact(fh, 28))
+            else:
+                timescale, duration = struct.unpack('>8xII', _read_exact(fh, 16))
+            if not timescale:
+                raise UnknownContainer("mvhd has no timescale")
+            return duration / timescale
+        raise UnknownContainer("moov has no mvhd box")
+    raise UnknownContainer("No moov box")
+
+
+_EBML_HEADER = 0x1A45DFA3
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_CLUSTER = 0x1F43B675
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+
+
+def _ebml_vint(fh, keep_marker: bool):
+    first = _read_exact(fh, 1)[0]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise UnknownContainer("Invalid EBML number")
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in _read_exact(fh, length - 1):
+        value = value << 8 | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, None if unknown else value
+
+
+def _iter_ebml(fh, end=None):
+    """Yield (element id, payload offset, payload size or None if unknown)."""
+    while end is None or fh.tell() < end:
+        try:
+            element, _ = _ebml_vint(fh, keep_marker=True)
+        except UnknownContainer:
+            return
+        _, size = _ebml_vint(fh, keep_marker=False)
+        offset = fh.tell()
+        yield element, offset, size
+        if size is None:
+            return
+        fh.seek(offset + size)
+
+
+def matroska_duration(fh) -> float:
+    elements = _iter_ebml(fh)
+    if next(elements, (None,))[0] != _EBML_HEADER:
+        raise UnknownContainer("Not an EBML file")
+    for element, offset, size in elements:
+        if element != _EBML_SEGMENT:
+            continue
+        for child, child_offset, child_size in _iter_ebml(fh, None if size is None else offset + size):
+            if child == _EBML_CLUSTER:
+                break
+            if child != _EBML_INFO or child_size is None:
+                continue
+            scale, duration = 1_000_000, None
+            for field, field_offset, field_size in _iter_ebml(fh, child_offset + child_size):
+                fh.seek(field_offset)
+                data = _read_exact(fh, field_size or 0)
+                if field == _EBML_TIMECODE_SCALE:
+                    scale = int.from_bytes(data, 'big')
+                elif field == _EBML_DURATION and field_size in (4, 8):
+                    duration = struct.unpack('>f' if field_size == 4 else '>d', data)[0]
+            if duration is None:
+                raise UnknownContainer("Segment info has no duration")
+            return duration * scale / 1e9
+        break
+    raise UnknownContainer("No segment info")
+
+
+def container_duration(fh):
+    """Seconds of media described by the file's container header, or None if unknown."""
+    magic = fh.read(12)
+    fh.seek(0)
+    try:
+        if magic[4:8] in (b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip'):
+            return mp4_duration(fh)
+        if magic[:4] == b'\x1a\x45\xdf\xa3':
+            return matroska_duration(fh)
+    except (UnknownContainer, struct.error):
+        logger.info("Could not read a duration from the container header", exc_info=True)
+    return None
+
+
+def format_duration(seconds) -> str:
+    if seconds is None:
+        return ''
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02d}:{secs:02d}' if hours else f'{minutes}:{secs:02d}'
+
+
+# ── Thumbnail variants ──────────────────────────────────────────────────────
+
+def _thumbnail_format():
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def _fit_size(image_size, size):
+    """size, scaled down with its aspect ratio kept if the image is too small to fill it."""
+    scale = min(1.0, image_size[0] / size[0], image_size[1] / size[1])
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def render_thumbnails(field_file, video_id: int) -> dict:
+    """Save every THUMBNAIL_VARIANTS rendering of an image; returns {name: storage path}."""
+    image_format, extension = _thumbnail_format()
+    largest = max(THUMBNAIL_VARIANTS.values())
+    with field_file.open('rb') as fh, Image.open(fh) as source:
+        source.draft('RGB', largest)
+        image = ImageOps.exif_transpose(source).convert('RGB')
+
+    variants = {}
+    for name, size in THUMBNAIL_VARIANTS.items():
+        rendered = ImageOps.fit(image, _fit_size(image.size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        rendered.save(buffer, image_format, quality=settings.VIDEO_THUMBNAIL_QUALITY, optimize=True)
+        path = f'thumbnails/variants/{video_id}/{name}.{extension}'
+        default_storage.delete(path)
+        variants[name] = default_storage.save(path, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def delete_thumbnail_variants(video: Video) -> None:
+    for path in video.thumbnail_variants.values():
+        default_storage.delete(path)
+
+
+# ── Pipeline ────────────────────────────────────────────────────────────────
+
+def stuck_processing() -> Q:
+    """Videos PROCESSING for longer than VIDEO_PROCESSING_STALE_AFTER."""
+    cutoff = timezone.now() - timedelta(seconds=settings.VIDEO_PROCESSING_STALE_AFTER)
+    return Q(processing_status='PROCESSING') & (
+        Q(processing_started_at__lt=cutoff) | Q(processing_started_at__isnull=True)
+    )
+
+
+def process_video(video_id: int) -> None:
+    claimable = ~Q(processing_status='PROCESSING') | stuck_processing()
+    claimed = Video.objects.filter(claimable, pk=video_id).update(
+        processing_status='PROCESSING', processing_error='', processing_started_at=timezone.now(),
+    )
+    if not claimed:
+        return
+    video = Video.objects.get(pk=video_id)
+    try:
+        with video.video_file.open('rb') as fh:
+            duration = format_duration(container_duration(fh))
+        variants = render_thumbnails(video.thumbnail, video.pk) if video.thumbnail else {}
+    except Exception as e:
+        logger.exception("Processing failed for video %s", video_id)
+        Video.objects.filter(pk=video_id).update(processing_status='FAILED', processing_error=str(e))
+        return
+    # update() rather than save(): no search reindex, and no race with the view counter.
+    Video.objects.filter(pk=video_id).update(
+        processing_status='READY', duration=duration or video.duration, thumbnail_variants=variants,
+    )
+
+
+def schedule_processing(video: Video) -> None:
+    transaction.on_commit(lambda: submit(process_video, video.pk))
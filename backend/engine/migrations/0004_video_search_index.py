@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+from engine.indexes import PostgresGinIndex
+
+# Kept inline rather than imported from engine.search, so later changes to
+# that module cannot change what this migration does.
+FTS_TABLE = 'engine_video_fts'
+
+
+def search_index():
+    config = settings.SEARCH_POSTGRES_CONFIG
+    return PostgresGinIndex(
+        SearchVector('title', weight='A', config=config) + SearchVector('description', weight='B', config=config),
+        name='engine_video_search_gin',
+    )
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"title, description, tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+            f"SELECT id, title, description FROM engine_video"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('engine', 'Video'), search_index())
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('engine', 'Video'), search_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0003_video_uploader'),
+    ]
+
+    operations = [
+        # The GIN index is part of the model state on every database, so
+        # makemigrations sees it, but only PostgreSQL gets it created.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(create_search_index, drop_search_index)],
+            state_operations=[migrations.AddIndex(model_name='video', index=search_index())],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:12
+# Not regenerated under the pinned Django 6.0.2 (it needs Python >= 3.12); the
+# operations use only APIs that 6.0 keeps unchanged.
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0005_video_processing'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['-created_at', '-id'], name='video_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='video_category_created_idx'),
+        ),
+    ]
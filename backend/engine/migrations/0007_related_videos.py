@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:14
+# Not regenerated under the pinned Django 6.0.2 (it needs Python >= 3.12); the
+# operations use only APIs that 6.0 keeps unchanged.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0006_video_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='related_stale',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name='CoView',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('video_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='engine.video')),
+                ('video_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='engine.video')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('video_a', 'video_b'), name='engine_coview_pair_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedVideo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_in', to='engine.video')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='engine.video')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('video', 'rank'), name='engine_related_video_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+# Not regenerated under the pinned Django 6.0.2 (it needs Python >= 3.12); the
+# operations use only APIs that 6.0 keeps unchanged.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0007_related_videos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
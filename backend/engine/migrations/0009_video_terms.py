@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:58
+# Not regenerated under the pinned Django 6.0.2 (it needs Python >= 3.12); the
+# operations use only APIs that 6.0 keeps unchanged.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_related_stale(apps, schema_editor):
+    # The next build indexes every video's terms; incremental builds only index stale ones.
+    apps.get_model('engine', 'Video').objects.update(related_stale=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engine', '0008_video_processing_started_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('count', models.PositiveIntegerField()),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='engine.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='engine_video_term_idx')],
+                'constraints': [models.UniqueConstraint(fields=('video', 'term'), name='engine_video_term_uniq')],
+            },
+        ),
+        migrations.RunPython(mark_related_stale, migrations.RunPython.noop),
+    ]
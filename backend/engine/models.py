@@ -1,5 +1,9 @@
-from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVector
+from django.db import models
+
+from .indexes import PostgresGinIndex
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -9,6 +13,13 @@ class Category(models.Model):
         return self.name
 
 class Video(models.Model):
+    PROCESSING_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     video_file = models.FileField(upload_to='videos/')
@@ -18,6 +29,82 @@ class Video(models.Model):
     views = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     duration = models.CharField(max_length=10, blank=True)
+    processing_status = models.CharField(max_length=10, choices=PROCESSING_CHOICES, default='PENDING')
+    processing_error = models.TextField(blank=True)
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    # Variant name -> storage path of the resized thumbnails (engine/media.py).
+    thumbnail_variants = models.JSONField(default=dict, blank=True)
+    # Set when co-views or text changed since the related list was built (engine/recommendations.py).
+    related_stale = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the feeds (engine/feeds.py), overall and per category.
+            models.Index(fields=['-created_at', '-id'], name='video_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='video_category_created_idx'),
+            # Full-text search on PostgreSQL; must match engine.search.search_vector().
+            PostgresGinIndex(
+                SearchVector('title', weight='A', config=settings.SEARCH_POSTGRES_CONFIG)
+                + SearchVector('description', weight='B', config=settings.SEARCH_POSTGRES_CONFIG),
+                name='engine_video_search_gin',
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+    def thumbnail_variant_url(self, name):
+        path = self.thumbnail_variants.get(name)
+        if path:
+            return self.thumbnail.storage.url(path)
+        return self.thumbnail.url if self.thumbnail else ''
+
+    @property
+    def thumbnail_card_url(self):
+        return self.thumbnail_variant_url('card')
+
+    @property
+    def thumbnail_small_url(self):
+        return self.thumbnail_variant_url('small')
+
+    @property
+    def thumbnail_poster_url(self):
+        return self.thumbnail_variant_url('poster')
+
+
+class CoView(models.Model):
+    """How often two videos were watched in the same browser; video_a is the lower id."""
+    video_a = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='+')
+    video_b = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video_a', 'video_b'], name='engine_coview_pair_uniq'),
+        ]
+
+
+class RelatedVideo(models.Model):
+    """Precomputed neighbour list of a video, read by the watch page in rank order."""
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='recommended_in')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video', 'rank'], name='engine_related_video_rank_uniq'),
+        ]
+
+
+class VideoTerm(models.Model):
+    """Word count of one term in a video's text; the recommender's inverted index."""
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=64)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video', 'term'], name='engine_video_term_uniq'),
+        ]
+        indexes = [models.Index(fields=['term'], name='engine_video_term_idx')]
@@ -0,0 +1,323 @@
+"""
+Related-video recommendations for the watch page.
+
+Co-views: the watch page keeps the last RECOMMEND_HISTORY video ids in a
+signed cookie. Watching a video that is not already in that list counts
+one co-view between it and each listed video. Counts are tallied in
+memory and flushed like view counts (engine/counters.py): one
+`count = count + n` update per group of pairs. No write happens on the
+request itself. Every video in a flushed pair is marked related_stale.
+
+Building (`manage.py build_related_videos`, incremental unless --full)
+scores candidates for every stale video:
+
+    score = co-view cosine + RECOMMEND_TEXT_WEIGHT * TF-IDF cosine
+            (+ CATEGORY_BONUS when both share a category)
+
+The co-view cosine is count(a, b) / sqrt(total(a) * total(b)). The text
+vectors are sparse dicts over title (counted twice) and description
+words. Word counts are stored per video in VideoTerm, an inverted index
+that each build refreshes for the videos it recomputes. Only videos that
+share one of a video's QUERY_TERMS strongest terms are compared. Terms
+found in more than RECOMMEND_MAX_DF of the catalog are skipped. Lists
+shorter than RECOMMEND_NEIGHBORS are topped up with the newest videos of
+the same category. The top entries are stored in RelatedVideo, which the
+watch page reads in one indexed query.
+
+Incremental builds only recompute stale videos: new uploads, videos
+with new co-views, and videos whose title or description changed. They
+read the text of those videos, the VideoTerm rows of their strongest
+terms and of the videos found through them, and the CoView rows that
+involve them, never the whole catalog. An older video's list only picks
+up a newly uploaded neighbour on a --full build.
+"""
+import atexit
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .counters import BufferedViewCounter
+from .models import CoView, RelatedVideo, Video, VideoTerm
+
+logger = logging.getLogger(__name__)
+
+HISTORY_COOKIE = 'recently_watched'
+CATEGORY_BONUS = 0.05
+# Candidates are gathered through a video's strongest terms only; weaker ones add little score.
+QUERY_TERMS = 16
+# Longer "words" (URLs, hashes) are not indexed; matches VideoTerm.term.
+MAX_TERM_LENGTH = 64
+# Ids per `__in` lookup, well below SQLite's bound-parameter limit.
+IN_BATCH = 500
+_WORD_RE = re.compile(r'[^\W\d_]{3,}')
+
+STOPWORDS = frozenset("""
+about above after again all also and any are because been before being below between both but can
+could did does doing down during each few for from further had has have having her here hers him his
+how into its itself just more most not now off once only other our ours out over own same she should
+some such than that the their theirs them then there these they this those through too under until very
+was were what when where which while who whom why will with would you your yours
+""".split())
+
+
+# ── Co-view collection ──────────────────────────────────────────────────────
+
+class CoViewCounter(BufferedViewCounter):
+    """Buffered tally of (lower id, higher id) pairs watched in the same browser."""
+
+    def write(self, batch: Counter) -> None:
+        video_ids = {pk for pair in batch for pk in pair}
+        existing = set(Video.objects.filter(pk__in=video_ids).values_list('pk', flat=True))
+        batch = {pair: n for pair, n in batch.items() if pair[0] in existing and pair[1] in existing}
+        if not batch:
+            return
+        CoView.objects.bulk_create(
+            [CoView(video_a_id=a, video_b_id=b) for a, b in sorted(batch)], ignore_conflicts=True,
+        )
+        by_count = defaultdict(list)
+        for pair, count in batch.items():
+            by_count[count].append(pair)
+        for count, pairs in by_count.items():
+            match = reduce(or_, (Q(video_a_id=a, video_b_id=b) for a, b in sorted(pairs)))
+            CoView.objects.filter(match).update(count=F('count') + count)
+        Video.objects.filter(pk__in={pk for pair in batch for pk in pair}).update(related_stale=True)
+
+
+_counter = None
+_counter_pid = None
+_counter_lock = threading.Lock()
+
+
+def get_coview_counter() -> CoViewCounter:
+    """This process's co-view counter, re-created after a fork."""
+    global _counter, _counter_pid
+    pid = os.getpid()
+    if _counter is None or _counter_pid != pid:
+        with _counter_lock:
+            if _counter is None or _counter_pid != pid:
+                _counter = CoViewCounter(settings.VIDEO_VIEW_FLUSH_INTERVAL, settings.VIDEO_VIEW_FLUSH_THRESHOLD)
+                _counter_pid = pid
+                atexit.register(_flush_at_exit, _counter)
+    return _counter
+
+
+def _flush_at_exit(counter: CoViewCounter) -> None:
+    if _counter_pid == os.getpid():
+        try:
+            counter.flush()
+        except Exception:
+            logger.exception("Could not flush pending co-views at exit")
+
+
+def remember_watch(request, response, video: Video) -> None:
+    """Count co-views of video with the browser's recent videos and update the history cookie."""
+    try:
+        history = [int(pk) for pk in request.get_signed_cookie(HISTORY_COOKIE, salt=HISTORY_COOKIE).split(',')]
+    except (KeyError, signing.BadSignature, ValueError):
+        history = []
+    if video.pk in history:
+        return
+    pairs = Counter((min(pk, video.pk), max(pk, video.pk)) for pk in set(history))
+    if pairs:
+        if settings.VIDEO_VIEW_COUNTER == 'atomic':
+            CoViewCounter(0, 0).write(pairs)
+        else:
+            counter = get_coview_counter()
+            for pair in pairs:
+                counter.record(pair)
+    history = [video.pk] + history[:settings.RECOMMEND_HISTORY - 1]
+    response.set_signed_cookie(
+        HISTORY_COOKIE, ','.join(map(str, history)), salt=HISTORY_COOKIE,
+        max_age=30 * 24 * 3600, httponly=True, samesite='Lax',
+    )
+
+
+# ── Serving ─────────────────────────────────────────────────────────────────
+
+def related_videos(video: Video, limit: int = 4) -> list:
+    """Precomputed neighbours in rank order; newest videos of the same category until built."""
+    related = list(
+        Video.objects.select_related('uploader')
+        .filter(recommended_in__video=video)
+        .order_by('recommended_in__rank')[:limit]
+    )
+    if related or video.category_id is None:
+        return related
+    return list(
+        Video.objects.select_related('uploader')
+        .filter(category_id=video.category_id).exclude(pk=video.pk)
+        .order_by('-created_at', '-id')[:limit]
+    )
+
+
+# ── Building ────────────────────────────────────────────────────────────────
+
+def video_terms(title: str, description: str) -> Counter:
+    """Word counts of a video's text; title words count twice."""
+    terms = Counter()
+    for weight, text in ((2, title), (1, description)):
+        for word in _WORD_RE.findall(text.lower()):
+            if word not in STOPWORDS and len(word) <= MAX_TERM_LENGTH:
+                terms[word] += weight
+    return terms
+
+
+def _vector(terms, df, total: int) -> dict:
+    """Unit-length TF-IDF vector {term: weight} of one video's term counts."""
+    vector = {term: (1 + math.log(n)) * math.log((1 + total) / (1 + df[term])) for term, n in terms.items()}
+    norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+    return {term: w / norm for term, w in vector.items() if w}
+
+
+def _in_batches(queryset, field: str, values) -> list:
+    """queryset restricted to field__in values, IN_BATCH values per query; unrestricted if values is None."""
+    if values is None:
+        return [queryset]
+    values = list(values)
+    return [queryset.filter(**{f'{field}__in': values[i:i + IN_BATCH]}) for i in range(0, len(values), IN_BATCH)]
+
+
+def index_terms(video_ids=None) -> dict:
+    """Rewrite the VideoTerm rows of video_ids (every video if None); returns {video id: term counts}."""
+    counts = {}
+    for rows in _in_batches(Video.objects.values_list('id', 'title', 'description'), 'pk', video_ids):
+        for pk, title, description in rows:
+            counts[pk] = video_terms(title, description)
+    with transaction.atomic():
+        for rows in _in_batches(VideoTerm.objects.all(), 'video_id', video_ids):
+            rows.delete()
+        VideoTerm.objects.bulk_create(
+            [VideoTerm(video_id=pk, term=term, count=n) for pk, terms in counts.items() for term, n in terms.items()],
+            batch_size=1000,
+        )
+    return counts
+
+
+def _stored_terms(video_ids) -> dict:
+    counts = defaultdict(Counter)
+    for rows in _in_batches(VideoTerm.objects.all(), 'video_id', video_ids):
+        for pk, term, n in rows.values_list('video_id', 'term', 'count'):
+            counts[pk][term] = n
+    return counts
+
+
+def _document_frequencies(terms) -> Counter:
+    """{term: number of videos using it} for terms (every term if None)."""
+    df = Counter()
+    for rows in _in_batches(VideoTerm.objects.all(), 'term', terms):
+        df.update(dict(rows.values_list('term').annotate(n=Count('pk'))))
+    return df
+
+
+def _coview_scores(video_ids) -> dict:
+    """{target id: {other id: co-view cosine}} for video_ids (every video if None)."""
+    coviews = CoView.objects.filter(count__gt=0)
+    pairs = {}
+    for column in ('video_a_id', 'video_b_id'):
+        for rows in _in_batches(coviews, column, video_ids):
+            pairs.update(((a, b), n) for a, b, n in rows.values_list('video_a_id', 'video_b_id', 'count'))
+        if video_ids is None:
+            break
+    totals = Counter()
+    partners = None if video_ids is None else {pk for pair in pairs for pk in pair}
+    for column in ('video_a_id', 'video_b_id'):
+        for rows in _in_batches(coviews, column, partners):
+            totals.update(dict(rows.values_list(column).annotate(n=Sum('count'))))
+    scores = defaultdict(dict)
+    for (a, b), count in pairs.items():
+        cosine = count / math.sqrt(totals[a] * totals[b])
+        if video_ids is None or a in video_ids:
+            scores[a][b] = cosine
+        if video_ids is None or b in video_ids:
+            scores[b][a] = cosine
+    return scores
+
+
+def build_related_videos(full: bool = False) -> int:
+    """Recompute neighbour lists for stale videos (all videos with full=True); returns how many."""
+    stale = Video.objects.all() if full else Video.objects.filter(related_stale=True)
+    targets = set(stale.values_list('pk', flat=True))
+    if not targets:
+        return 0
+    # Cleared before reading, so co-views flushed during the build mark videos stale again.
+    (Video.objects.all() if full else Video.objects.filter(pk__in=targets)).update(related_stale=False)
+    scope = None if full else targets
+
+    # Text: the targets' vectors, then only the videos sharing one of their strongest terms.
+    counts = index_terms(scope)
+    total = Video.objects.count()
+    limit = max(2, int(settings.RECOMMEND_MAX_DF * total))
+    df = _document_frequencies(None if full else {term for terms in counts.values() for term in terms})
+    vectors = {pk: _vector(terms, df, total) for pk, terms in counts.items()}
+    query_terms = {}
+    for pk in targets:
+        vector = vectors[pk]
+        strongest = heapq.nlargest(QUERY_TERMS, vector, key=vector.get)
+        # Terms of one video only, or too common to tell videos apart, are skipped.
+        query_terms[pk] = [term for term in strongest if 1 < df[term] <= limit]
+    wanted = {term for terms in query_terms.values() for term in terms}
+    postings = defaultdict(list)
+    for rows in _in_batches(VideoTerm.objects.all(), 'term', None if full else wanted):
+        for pk, term in rows.values_list('video_id', 'term'):
+            if term in wanted:
+                postings[term].append(pk)
+    others = _stored_terms({pk for docs in postings.values() for pk in docs} - vectors.keys())
+    df.update(_document_frequencies({term for terms in others.values() for term in terms} - df.keys()))
+    vectors.update((pk, _vector(terms, df, total)) for pk, terms in others.items())
+
+    coviews = _coview_scores(scope)
+    categories = {}
+    candidates = vectors.keys() | {pk for scores in coviews.values() for pk in scores}
+    for rows in _in_batches(Video.objects.all(), 'pk', None if full else candidates):
+        categories.update(rows.values_list('id', 'category_id'))
+    size, text_weight = settings.RECOMMEND_NEIGHBORS, settings.RECOMMEND_TEXT_WEIGHT
+
+    newest_in_category = {}
+
+    def newest(category):
+        if category not in newest_in_category:
+            newest_in_category[category] = list(
+                Video.objects.filter(category_id=category).order_by('-created_at', '-id')
+                .values_list('id', flat=True)[:2 * size + 1]
+            )
+        return newest_in_category[category]
+
+    entries = []
+    for pk in targets:
+        scores = defaultdict(float, coviews.get(pk, {}))
+        vector = vectors[pk]
+        for term in query_terms[pk]:
+            weight = vector[term]
+            for other in postings[term]:
+                scores[other] += text_weight * weight * vectors[other].get(term, 0.0)
+        scores.pop(pk, None)
+        category = categories.get(pk)
+        if category is not None:
+            for other in scores:
+                if categories.get(other) == category:
+                    scores[other] += CATEGORY_BONUS
+        best = heapq.nlargest(size, scores.items(), key=lambda item: (item[1], item[0]))
+        if len(best) < size and category is not None:
+            chosen = {other for other, _ in best} | {pk}
+            fill = [other for other in newest(category) if other not in chosen]
+            best += [(other, 0.0) for other in fill[:size - len(best)]]
+        entries.extend(
+            RelatedVideo(video_id=pk, related_id=other, rank=rank, score=round(score, 6))
+            for rank, (other, score) in enumerate(best)
+        )
+
+    with transaction.atomic():
+        (RelatedVideo.objects.all() if full else RelatedVideo.objects.filter(video_id__in=targets)).delete()
+        RelatedVideo.objects.bulk_create(entries, batch_size=1000)
+    return len(targets)
@@ -0,0 +1,187 @@
+"""
+Video search backed by an inverted index instead of icontains scans.
+
+SEARCH_BACKEND picks the implementation; 'auto' (default) follows the
+database vendor:
+
+- 'sqlite': an FTS5 table (engine_video_fts) keyed by video id, kept in
+  step with Video saves and deletes by engine/signals.py. Ranked by bm25
+  with title matches weighted above description matches.
+- 'postgres': an expression GIN index over a weighted tsvector of title
+  and description (declared on Video, created by migration 0004). The
+  index is maintained by the database, and results are ranked with ts_rank.
+- 'basic': the old icontains filter, newest first. Used for any other
+  database.
+
+Every backend returns something Paginator can page through: a queryset,
+or a SearchResults that fetches one page of ids from the index at a time.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Video
+
+FTS_TABLE = 'engine_video_fts'
+# bm25 column weights for (title, description).
+FTS_WEIGHTS = (10.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 expression: every word must match, as a prefix."""
+    return ' '.join(f'"{token}"*' for token in _TOKEN_RE.findall(text))
+
+
+class SearchResults:
+    """Lazy ranked result list; count() and slicing each run one indexed query."""
+
+    def __init__(self, backend, query: str):
+        self.backend = backend
+        self.query = query
+        self._count = None
+
+    def count(self) -> int:
+        if self._count is None:
+            self._count = self.backend.count(self.query)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start, stop = item.start or 0, item.stop
+        ids = self.backend.ranked_ids(self.query, start, None if stop is None else stop - start)
+        videos = Video.objects.select_related('category').in_bulk(ids)
+        return [videos[pk] for pk in ids if pk in videos]
+
+
+# ── Backends ────────────────────────────────────────────────────────────────
+
+class BasicSearchBackend:
+    name = 'basic'
+
+    def search(self, query: str):
+        if not query.strip():
+            return Video.objects.none()
+        return (
+            Video.objects.select_related('category')
+            .filter(Q(title__icontains=query) | Q(description__icontains=query))
+            .order_by('-created_at', '-id')
+        )
+
+    def index(self, video) -> None:
+        pass
+
+    def remove(self, video_id: int) -> None:
+        pass
+
+    def rebuild(self) -> int:
+        return 0
+
+
+class SQLiteSearchBackend(BasicSearchBackend):
+    name = 'sqlite'
+
+    def search(self, query: str):
+        if not fts_query(query):
+            return Video.objects.none()
+        return SearchResults(self, query)
+
+    def count(self, query: str) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [fts_query(query)])
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, query: str, offset: int, limit):
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, {weights}), rowid DESC LIMIT %s OFFSET %s',
+                [fts_query(query), -1 if limit is None else limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index(self, video) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [video.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)',
+                [video.pk, video.title, video.description],
+            )
+
+    def remove(self, video_id: int) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [video_id])
+
+    def rebuild(self) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, description) '
+                f'SELECT id, title, description FROM {Video._meta.db_table}'
+            )
+            return cursor.rowcount
+
+
+GIN_INDEX = 'engine_video_search_gin'
+
+
+def search_vector():
+    """The weighted tsvector; queries only use the GIN index while this matches its expression."""
+    from django.contrib.postgres.search import SearchVector
+    config = settings.SEARCH_POSTGRES_CONFIG
+    return SearchVector('title', weight='A', config=config) + SearchVector('description', weight='B', config=config)
+
+
+def search_index():
+    return next(index for index in Video._meta.indexes if index.name == GIN_INDEX)
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+    name = 'postgres'
+
+    def search(self, query: str):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        if not query.strip():
+            return Video.objects.none()
+        vector = search_vector()
+        terms = SearchQuery(query, search_type='websearch', config=settings.SEARCH_POSTGRES_CONFIG)
+        return (
+            Video.objects.select_related('category')
+            .annotate(document=vector, rank=SearchRank(vector, terms))
+            .filter(document=terms)
+            .order_by('-rank', '-id')
+        )
+
+    def rebuild(self) -> int:
+        """Recreate the GIN index, e.g. after changing SEARCH_POSTGRES_CONFIG."""
+        with connection.schema_editor() as editor:
+            editor.remove_index(Video, search_index())
+            editor.add_index(Video, search_index())
+        return Video.objects.count()
+
+
+BACKENDS = {
+    'basic': BasicSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+    'postgres': PostgresSearchBackend,
+}
+VENDOR_BACKENDS = {'sqlite': 'sqlite', 'postgresql': 'postgres'}
+
+
+def get_search_backend():
+    name = settings.SEARCH_BACKEND
+    if name == 'auto':
+        name = VENDOR_BACKENDS.get(connection.vendor, 'basic')
+    return BACKENDS[name]()
+
+
+def search_videos(query: str):
+    return get_search_backend().search(query)
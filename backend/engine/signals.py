@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .feeds import invalidate_categories
+from .models import Category, Video
+from .search import get_search_backend
+
+SEARCHABLE_FIELDS = {'title', 'description'}
+
+
+# Written in the same transaction as the video row, so a rollback undoes both.
+@receiver(post_save, sender=Video)
+def video_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is None or SEARCHABLE_FIELDS & set(update_fields):
+        get_search_backend().index(instance)
+        if not created:
+            # New videos start stale; edits need their related list rebuilt.
+            Video.objects.filter(pk=instance.pk).update(related_stale=True)
+
+@receiver(post_delete, sender=Video)
+def video_deleted(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_categories)
@@ -1,3 +1,474 @@
-from django.test import TestCase
+import gzip
+import io
+import os
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from django.core.management import call_command
+from django.db import connection
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .counters import BufferedViewCounter, get_view_counter, record_view
+from .media import container_duration, format_duration, process_video
+from .recommendations import build_related_videos, get_coview_counter, related_videos
+from .feeds import get_categories
+from .indexes import NOOP_SQL
+from .models import Category, CoView, RelatedVideo, Video
+from .search import get_search_backend, search_index, search_vector, search_videos
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        self.hot = Video.objects.create(title='Hot', video_file='videos/hot.mp4')
+        self.cold = Video.objects.create(title='Cold', video_file='videos/cold.mp4')
+
+    def test_buffered_views_are_flushed_with_increments(self):
+        counter = BufferedViewCounter(interval=3600, threshold=10**6)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: counter.record(self.hot.pk), range(1000)))
+        counter.record(self.cold.pk)
+        self.assertEqual(counter.pending(self.hot.pk), 1000)
+
+        # A concurrent writer's change to another column must survive the flush.
+        Video.objects.filter(pk=self.hot.pk).update(title='Renamed')
+        with self.assertNumQueries(2):
+            self.assertEqual(counter.flush(), 1001)
+
+        self.hot.refresh_from_db()
+        self.assertEqual((self.hot.views, self.hot.title), (1000, 'Renamed'))
+        self.assertEqual(Video.objects.get(pk=self.cold.pk).views, 1)
+        self.assertEqual(counter.pending(self.hot.pk), 0)
+
+    @override_settings(VIDEO_VIEW_COUNTER='atomic')
+    def test_atomic_mode_writes_each_view(self):
+        stale = Video.objects.get(pk=self.hot.pk)
+        record_view(self.hot)
+        record_view(stale)
+        self.assertEqual(Video.objects.get(pk=self.hot.pk).views, 2)
+
+
+class VideoSearchTests(TestCase):
+    def setUp(self):
+        self.guitar = Video.objects.create(title='Guitar lessons', description='Chords for beginners', video_file='videos/a.mp4')
+        self.cooking = Video.objects.create(title='Cooking pasta', description='Best played with guitar music', video_file='videos/b.mp4')
+        Video.objects.create(title='Hiking', description='Mountain trails', video_file='videos/c.mp4')
+
+    def titles(self, query):
+        return [video.title for video in search_videos(query)[:10]]
+
+    def test_results_are_ranked_with_title_matches_first(self):
+        self.assertEqual(get_search_backend().name, 'sqlite')
+        self.assertEqual(self.titles('guitar'), ['Guitar lessons', 'Cooking pasta'])
+        self.assertEqual(self.titles('guit'), ['Guitar lessons', 'Cooking pasta'])
+        self.assertEqual(self.titles('guitar chords'), ['Guitar lessons'])
+        self.assertEqual(self.titles('"); DROP'), [])
+        self.assertEqual(search_videos('guitar').count(), 2)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.cooking.title = 'Baking bread'
+        self.cooking.description = ''
+        self.cooking.save()
+        self.guitar.delete()
+        self.assertEqual(self.titles('guitar'), [])
+        self.assertEqual(self.titles('bread'), ['Baking bread'])
+
+    def test_rebuild_restores_rows_written_without_signals(self):
+        Video.objects.filter(pk=self.guitar.pk).update(title='Violin lessons')
+        self.assertEqual(self.titles('violin'), [])
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.titles('violin'), ['Violin lessons'])
+
+    @override_settings(SEARCH_PAGE_SIZE=1)
+    def test_search_view_paginates(self):
+        response = self.client.get(reverse('search'), {'q': 'guitar', 'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['videos']), [self.cooking])
+        self.assertEqual(response.context['page'].paginator.count, 2)
+
+    @override_settings(SEARCH_BACKEND='basic')
+    def test_basic_backend_falls_back_to_icontains(self):
+        self.assertEqual(set(self.titles('GUITAR')), {'Guitar lessons', 'Cooking pasta'})
+
+    def test_gin_index_matches_queries_and_is_skipped_off_postgres(self):
+        index = search_index()
+        self.assertEqual(index.expressions, (search_vector(),))
+        self.assertEqual(index.create_sql(Video, connection.schema_editor()), NOOP_SQL)
+
+
+def mp4_box(kind, payload, large=False):
+    if large:
+        return struct.pack('>I4sQ', 1, kind, len(payload) + 16) + payload
+    return struct.pack('>I4s', len(payload) + 8, kind) + payload
+
+
+def sample_mp4(timescale=1000, duration=95_500, version=0):
+    if version == 1:
+        mvhd = bytes([1, 0, 0, 0]) + struct.pack('>QQIQ', 0, 0, timescale, duration) + bytes(80)
+    else:
+        mvhd = bytes(4) + struct.pack('>III', 0, 0, timescale) + struct.pack('>I', duration) + bytes(80)
+    # moov after a (large-size) mdat, as most encoders write it.
+    return (mp4_box(b'ftyp', b'isom\x00\x00\x02\x00') + mp4_box(b'mdat', bytes(4096), large=True)
+            + mp4_box(b'moov', mp4_box(b'mvhd', mvhd)))
+
+
+def sample_webm(seconds=3725.0):
+    def element(element_id, payload):
+        return element_id + bytes([0x80 | len(payload)]) + payload
+    info = element(b'\x2a\xd7\xb1', (1_000_000).to_bytes(3, 'big')) + element(b'\x44\x89', struct.pack('>d', seconds * 1000))
+    segment = element(b'\x15\x49\xa9\x66', info)
+    # Segment with unknown size, as live encoders write it.
+    return element(b'\x1a\x45\xdf\xa3', element(b'\x42\x82', b'webm')) + b'\x18\x53\x80\x67\x01\xff\xff\xff\xff\xff\xff\xff' + segment
+
+
+def sample_image(size=(1920, 1200)):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+class ContainerDurationTests(TestCase):
+    def test_reads_duration_from_headers(self):
+        self.assertAlmostEqual(container_duration(io.BytesIO(sample_mp4())), 95.5)
+        self.assertAlmostEqual(container_duration(io.BytesIO(sample_mp4(600, 600 * 4000, version=1))), 4000)
+        self.assertAlmostEqual(container_duration(io.BytesIO(sample_webm())), 3725.0)
+        self.assertIsNone(container_duration(io.BytesIO(b'RIFF....AVI LIST')))
+        self.assertIsNone(container_duration(io.BytesIO(sample_mp4()[:-96])))
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(95.5), '1:36')
+        self.assertEqual(format_duration(3725), '1:02:05')
+        self.assertEqual(format_duration(None), '')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class VideoProcessingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('uploader', password='pw')
+        self.client.force_login(self.user)
+
+    def test_upload_schedules_processing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('upload_video'), {
+                'title': 'Clip',
+                'video_file': SimpleUploadedFile('clip.mp4', sample_mp4()),
+                'thumbnail': SimpleUploadedFile('thumb.jpg', sample_image()),
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(callbacks), 1)
+        video = Video.objects.get(title='Clip')
+        self.assertEqual((video.processing_status, video.duration), ('PENDING', ''))
+        self.assertEqual(video.thumbnail_card_url, video.thumbnail.url)
+
+        process_video(video.pk)
+        video.refresh_from_db()
+        self.assertEqual((video.processing_status, video.duration), ('READY', '1:36'))
+        self.assertEqual(set(video.thumbnail_variants), {'small', 'card', 'poster'})
+
+        from PIL import Image
+        with video.thumbnail.storage.open(video.thumbnail_variants['card']) as fh, Image.open(fh) as card:
+            self.assertEqual(card.size, (640, 360))
+        self.assertLess(video.thumbnail.storage.size(video.thumbnail_variants['small']), video.thumbnail.size / 10)
+        self.assertIn('/small.', video.thumbnail_small_url)
+
+    def test_unreadable_thumbnail_marks_failure(self):
+        video = Video.objects.create(
+            title='Broken', video_file=SimpleUploadedFile('b.mp4', sample_mp4()),
+            thumbnail=SimpleUploadedFile('b.jpg', b'not an image'),
+        )
+        with self.assertLogs('engine.media', 'ERROR'):
+            process_video(video.pk)
+        video.refresh_from_db()
+        self.assertEqual(video.processing_status, 'FAILED')
+        self.assertTrue(video.processing_error)
+
+    def test_small_thumbnails_are_not_upscaled(self):
+        video = Video.objects.create(
+            title='Small', video_file=SimpleUploadedFile('s.mp4', sample_mp4()),
+            thumbnail=SimpleUploadedFile('s.jpg', sample_image((400, 300))),
+        )
+        process_video(video.pk)
+        video.refresh_from_db()
+
+        from PIL import Image
+        sizes = {}
+        for name, path in video.thumbnail_variants.items():
+            with video.thumbnail.storage.open(path) as fh, Image.open(fh) as variant:
+                sizes[name] = variant.size
+        self.assertEqual(sizes, {'small': (320, 180), 'card': (400, 225), 'poster': (400, 225)})
+
+    def test_stuck_processing_is_claimed_again(self):
+        video = Video.objects.create(
+            title='Stuck', video_file=SimpleUploadedFile('s.mp4', sample_mp4()),
+            processing_status='PROCESSING', processing_started_at=timezone.now(),
+        )
+        call_command('process_videos', stdout=io.StringIO())
+        process_video(video.pk)
+        video.refresh_from_db()
+        self.assertEqual(video.processing_status, 'PROCESSING')
+
+        Video.objects.filter(pk=video.pk).update(processing_started_at=timezone.now() - timedelta(hours=1))
+        out = io.StringIO()
+        call_command('process_videos', stdout=out)
+        self.assertIn("Processed 1 video(s), 0 failed.", out.getvalue())
+        video.refresh_from_db()
+        self.assertEqual((video.processing_status, video.duration), ('READY', '1:36'))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MediaDeliveryTests(TestCase):
+    def setUp(self):
+        self.payload = bytes(range(256)) * 40
+        self.video = Video.objects.create(title='Clip', video_file=SimpleUploadedFile('clip.mp4', self.payload))
+        self.url = self.video.video_file.url
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        return response, b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_full_file_advertises_ranges(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.payload)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+
+    def test_range_requests_return_only_the_requested_bytes(self):
+        size = len(self.payload)
+        for header, start, end in [('bytes=100-199', 100, 199), ('bytes=10000-', 10000, size - 1), ('bytes=-24', size - 24, size - 1)]:
+            response, body = self.get(Range=header)
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{size}')
+            self.assertEqual(int(response['Content-Length']), end - start + 1)
+            self.assertEqual(body, self.payload[start:end + 1])
+
+        response, _ = self.get(Range=f'bytes={size}-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, f'bytes */{size}'))
+
+    def test_if_range_and_conditional_requests(self):
+        etag = self.get()[0]['ETag']
+        self.assertEqual(self.get(Range='bytes=0-9', **{'If-Range': etag})[0].status_code, 206)
+        self.assertEqual(self.get(Range='bytes=0-9', **{'If-Range': '"stale"'})[0].status_code, 200)
+        self.assertEqual(self.get(**{'If-None-Match': etag})[0].status_code, 304)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect_hands_off_to_nginx(self):
+        response, body = self.get(Range='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.video.video_file.name}')
+        self.assertEqual(body, b'')
+
+    def test_rejects_paths_outside_media_root(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/videos/missing.mp4').status_code, 404)
+
+
+@override_settings(FEED_PAGE_SIZE=4)
+class VideoFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.music = Category.objects.create(name='Music', slug='music')
+        self.user = User.objects.create_user('uploader', password='pw')
+        Video.objects.bulk_create([
+            Video(title=f'Video {i}', video_file=f'videos/{i}.mp4', category=self.music, uploader=self.user)
+            for i in range(10)
+        ])
+        # Identical timestamps: the id tiebreaker must still give a total order.
+        Video.objects.update(created_at=Video.objects.first().created_at)
+        Video.objects.create(title='Other', video_file='videos/other.mp4')
+
+    def test_json_feed_walks_every_video_once(self):
+        self.client.force_login(self.user)
+        get_categories()
+        seen, url = [], reverse('category_feed', args=['music'])
+        while url:
+            with self.assertNumQueries(3):  # session, user, one feed page
+                data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 4)
+            seen += [video['id'] for video in data['results']]
+            url = data['next']
+        expected = list(Video.objects.filter(category=self.music).order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(data['results'][0]['uploader'], 'uploader')
+
+        self.assertEqual(len(self.client.get(reverse('video_feed')).json()['results']), 4)
+        self.assertEqual(self.client.get(reverse('video_feed'), {'cursor': 'junk'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('category_feed', args=['nope'])).status_code, 404)
+
+    def test_category_routes_require_login(self):
+        for url in (reverse('category_feed', args=['music']), reverse('category_list'),
+                    reverse('category_videos', args=['music'])):
+            self.assertEqual(self.client.get(url).status_code, 302, url)
+        self.assertEqual(self.client.get(reverse('video_feed')).status_code, 200)
+
+    def test_category_page_rejects_bad_cursor(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('category_videos', args=['music']), {'cursor': 'junk'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_category_page_query_count_is_constant(self):
+        self.client.force_login(self.user)
+        get_categories()
+        with self.assertNumQueries(4):  # session, user, category, one feed page
+            response = self.client.get(reverse('category_videos', args=['music']))
+        self.assertEqual(len(response.context['videos']), 4)
+        self.assertTrue(response.context['next_cursor'])
+
+    def test_category_list_cache_follows_changes(self):
+        self.assertEqual([c.slug for c in get_categories()], ['music'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Art', slug='art')
+        self.client.force_login(self.user)
+        with self.assertNumQueries(3):  # session, user, categories
+            self.client.get(reverse('category_list'))
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('category_list'))
+        self.assertEqual([c['slug'] for c in response.json()['results']], ['art', 'music'])
+
+
+class RelatedVideoTests(TestCase):
+    def setUp(self):
+        self.music = Category.objects.create(name='Music', slug='music')
+        make = lambda title, description='', category=None: Video.objects.create(
+            title=title, description=description, video_file='videos/x.mp4', category=category,
+        )
+        self.jazz = make('Jazz piano basics', 'Learn jazz chords on the piano', self.music)
+        self.jazz2 = make('Advanced jazz piano', 'Voicings and jazz improvisation', self.music)
+        self.drums = make('Drum grooves', 'Rock beats for drummers', self.music)
+        self.cooking = make('Pasta night', 'Fresh tomato sauce')
+        self.baking = make('Bread baking', 'Sourdough starter')
+        self.fillers = [make(f'Filler clip {word}', 'unrelated', None) for word in ('alpha', 'beta', 'gamma', 'delta', 'epsilon')]
+        # Views from watch() must not be left for the exit-time flush.
+        self.addCleanup(lambda: get_view_counter().flush())
+
+    def watch(self, video):
+        self.assertEqual(self.client.get(reverse('watch', args=[video.pk])).status_code, 200)
+
+    def ids(self, video):
+        return [v.pk for v in related_videos(video, limit=10)]
+
+    def test_text_similarity_and_category_fill(self):
+        self.assertEqual(build_related_videos(), 10)
+        self.assertEqual(self.ids(self.jazz), [self.jazz2.pk, self.drums.pk])
+        self.assertEqual(self.ids(self.cooking), [])
+        self.assertFalse(Video.objects.filter(related_stale=True).exists())
+        self.assertEqual(build_related_videos(), 0)
+
+    @override_settings(VIDEO_VIEW_COUNTER='buffered', VIDEO_VIEW_FLUSH_INTERVAL=3600, VIDEO_VIEW_FLUSH_THRESHOLD=10**6)
+    def test_coviews_are_buffered_and_rebuilt_incrementally(self):
+        build_related_videos()
+        counter = get_coview_counter()
+        counter.flush()
+        for _ in range(3):
+            self.client.cookies.clear()
+            self.watch(self.cooking)
+            self.watch(self.baking)
+            self.watch(self.baking)  # a reload is not another co-view
+        self.assertEqual(counter.pending((self.cooking.pk, self.baking.pk)), 3)
+        self.assertEqual(counter.flush(), 3)
+        self.assertEqual(CoView.objects.get().count, 3)
+
+        self.assertEqual(build_related_videos(), 2)
+        self.assertEqual(self.ids(self.cooking), [self.baking.pk])
+        with self.assertNumQueries(1):
+            related_videos(self.baking)
+
+    @override_settings(RECOMMEND_MAX_DF=0.5)
+    def test_editing_text_marks_the_video_stale(self):
+        build_related_videos()
+        self.cooking.title = 'Jazz dinner party'
+        self.cooking.save()
+        self.assertEqual(build_related_videos(), 1)
+        self.assertIn(self.jazz.pk, self.ids(self.cooking))
+        self.assertEqual(RelatedVideo.objects.filter(video=self.jazz).count(), 2)
+
+    @override_settings(RECOMMEND_MAX_DF=0.5)
+    def test_incremental_build_reads_only_stale_videos_and_neighbours(self):
+        build_related_videos()
+        CoView.objects.create(video_a=self.jazz, video_b=self.cooking, count=2)
+        self.cooking.title = 'Jazz dinner party'
+        self.cooking.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(build_related_videos(), 1)
+        unrestricted = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and ' WHERE ' not in query['sql'] and 'COUNT(*)' not in query['sql']
+        ]
+        self.assertEqual(unrestricted, [])
+
+        incremental = self.ids(self.cooking)
+        build_related_videos(full=True)
+        self.assertEqual(self.ids(self.cooking), incremental)
+        self.assertEqual(incremental[0], self.jazz.pk)
+
+    @override_settings(VIDEO_VIEW_COUNTER='buffered', VIDEO_VIEW_FLUSH_INTERVAL=3600, VIDEO_VIEW_FLUSH_THRESHOLD=10**6)
+    def test_command_leaves_other_processes_counters_alone(self):
+        counter = get_coview_counter()
+        counter.flush()
+        counter.record((self.cooking.pk, self.baking.pk))
+        call_command('build_related_videos', stdout=io.StringIO())
+        self.assertEqual(counter.pending((self.cooking.pk, self.baking.pk)), 1)
+        counter.flush()
+
+
+class SpaShellTests(TestCase):
+    def setUp(self):
+        self.dist = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.dist, 'assets'))
+        self.script = b'console.log("app");' * 200
+        self.write('index.html', b'<!doctype html><div id="root"></div><script src="/assets/index-abc123.js"></script>')
+        self.write('assets/index-abc123.js', self.script)
+        self.write('vite.svg', b'<svg xmlns="http://www.w3.org/2000/svg"></svg>')
+        override = override_settings(FRONTEND_DIST_DIR=self.dist, SPA_AUTO_RELOAD=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def write(self, name, body):
+        with open(os.path.join(self.dist, name), 'wb') as fh:
+            fh.write(body)
+
+    def test_client_routes_get_the_shell_from_memory(self):
+        self.client.get('/')
+        with mock.patch('os.stat') as stat, mock.patch('builtins.open') as opened:
+            response = self.client.get('/dashboard/applications')
+        self.assertFalse(stat.called or opened.called)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'id="root"', response.content)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(self.client.get('/', headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+    def test_assets_are_precompressed_and_immutable(self):
+        response = self.client.get('/assets/index-abc123.js', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.script)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        plain = self.client.get('/assets/index-abc123.js', headers={'Accept-Encoding': 'gzip;q=0'})
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(plain.content, self.script)
+        self.assertNotEqual(plain['ETag'], response['ETag'])
+
+        self.assertEqual(self.client.get('/vite.svg')['Content-Type'], 'image/svg+xml')
+        self.assertEqual(self.client.get('/assets/missing.js').status_code, 404)
+
+    def test_auto_reload_picks_up_a_rebuild(self):
+        self.assertNotIn(b'v2', self.client.get('/').content)
+        self.write('index.html', b'<!doctype html><div id="root">v2</div>')
+        self.assertNotIn(b'v2', self.client.get('/').content)
+        with override_settings(SPA_AUTO_RELOAD=True, SPA_RELOAD_INTERVAL=0):
+            self.assertIn(b'v2', self.client.get('/').content)
+
+    @override_settings(FRONTEND_DIST_DIR='/nonexistent/dist')
+    def test_falls_back_to_api_status_before_the_first_build(self):
+        self.assertEqual(self.client.get('/').json()['api_docs'], '/api/v1/')
@@ -7,6 +7,9 @@ urlpatterns = [
     path('search/', views.search, name='search'),
     path('upload/', views.upload_video, name='upload_video'),
     path('category/<slug:category_slug>/', views.category_videos, name='category_videos'),
+    path('feed/', views.video_feed, name='video_feed'),
+    path('feed/category/<slug:category_slug>/', views.category_feed, name='category_feed'),
+    path('feed/categories/', views.category_list, name='category_list'),
     path('delete-video/<int:video_id>/', views.delete_video, name='delete_video'),
     path('login/', views.login_view, name='login'),
     path('signup/', views.signup_view, name='signup'),
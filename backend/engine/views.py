@@ -1,21 +1,26 @@
-import os
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from dataaudit.spa import serve_shell
+from .counters import record_view
+from .feeds import feed_page, get_categories, video_payload
+from .media import delete_thumbnail_variants, schedule_processing
+from .recommendations import related_videos, remember_watch
 from .models import Video, Category
-from django.db.models import Q
+from .search import search_videos
 from django.contrib import messages
 
 
 def home(request):
     """Serve React SPA. Falls back to API status if frontend is not built yet."""
-    index_path = os.path.join(settings.BASE_DIR, '..', 'frontend', 'dist', 'index.html')
-    if os.path.exists(index_path):
-        return render(request, 'index.html')
+    response = serve_shell(request)
+    if response is not None:
+        return response
     # Frontend not built yet — return helpful API status instead of 500
-    from django.http import JsonResponse
     return JsonResponse({
         'status': 'Django API is running ✓',
         'version': '1.0.0',
@@ -59,15 +64,15 @@ def logout_view(request):
 
 def watch(request, video_id):
     video = get_object_or_404(Video, id=video_id)
-    video.views += 1
-    video.save()
-    related = Video.objects.filter(category=video.category).exclude(id=video.id)[:4]
-    return render(request, 'engine/watch.html', {'video': video, 'related': related})
+    record_view(video)
+    response = render(request, 'engine/watch.html', {'video': video, 'related': related_videos(video)})
+    remember_watch(request, response, video)
+    return response
 
 def search(request):
     query = request.GET.get('q', '')
-    videos = Video.objects.filter(Q(title__icontains=query) | Q(description__icontains=query)) if query else Video.objects.none()
-    return render(request, 'engine/search_results.html', {'videos': videos, 'query': query})
+    page = Paginator(search_videos(query), settings.SEARCH_PAGE_SIZE).get_page(request.GET.get('page'))
+    return render(request, 'engine/search_results.html', {'videos': page.object_list, 'page': page, 'query': query})
 
 @login_required
 def upload_video(request):
@@ -88,22 +93,51 @@ def upload_video(request):
             category=category,
             uploader=request.user
         )
+        schedule_processing(video)
         return redirect('watch', video_id=video.id)
         
-    categories = Category.objects.all()
-    return render(request, 'engine/upload.html', {'categories': categories})
+    return render(request, 'engine/upload.html', {'categories': get_categories()})
 
 @login_required
 def category_videos(request, category_slug):
     category = get_object_or_404(Category, slug=category_slug)
-    videos = category.videos.all().order_by('-created_at')
-    categories = Category.objects.all()
+    try:
+        videos, next_cursor = feed_page(category.videos.all(), request.GET.get('cursor', ''))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
     return render(request, 'engine/home.html', {
         'videos': videos,
-        'categories': categories,
-        'category_name': category.name
+        'categories': get_categories(),
+        'category_name': category.name,
+        'next_cursor': next_cursor,
     })
 
+def video_feed(request, category_slug=None):
+    """JSON feed for infinite scroll: {results, next}, where next is the URL of the following page."""
+    videos = Video.objects.all()
+    if category_slug:
+        category = next((c for c in get_categories() if c.slug == category_slug), None)
+        if category is None:
+            raise Http404("Unknown category")
+        videos = videos.filter(category=category)
+    try:
+        page, next_cursor = feed_page(videos, request.GET.get('cursor', ''))
+    except ValueError:
+        return JsonResponse({'detail': 'Invalid cursor.'}, status=400)
+    return JsonResponse({
+        'results': [video_payload(video) for video in page],
+        'next': f'{request.path}?cursor={next_cursor}' if next_cursor else None,
+    })
+
+@login_required
+def category_feed(request, category_slug):
+    """video_feed of one category; signed-in users only, like category_videos."""
+    return video_feed(request, category_slug)
+
+@login_required
+def category_list(request):
+    return JsonResponse({'results': [{'name': c.name, 'slug': c.slug} for c in get_categories()]})
+
 @login_required
 def delete_video(request, video_id):
     video = get_object_or_404(Video, id=video_id)
@@ -111,5 +145,6 @@ def delete_video(request, video_id):
     if video.uploader == request.user or request.user.is_superuser:
         if video.video_file: video.video_file.delete()
         if video.thumbnail: video.thumbnail.delete()
+        delete_thumbnail_variants(video)
         video.delete()
     return redirect('home')
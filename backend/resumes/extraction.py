@@ -0,0 +1,127 @@
+"""
+Text extraction for uploaded resume files.
+
+Extraction runs on the background pool after the upload response has been
+sent. Documents are read incrementally: PDFs one page at a time, and DOCX
+files by streaming word/document.xml out of the zip with iterparse instead of
+building the whole document tree. The collected text stops at
+RESUME_MAX_TEXT_CHARS, so a huge upload cannot exhaust worker memory. A
+SHA-256 of the file is stored with the text, and an unchanged file is never
+parsed twice.
+"""
+import hashlib
+import logging
+import os
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+from django.conf import settings
+from django.db import transaction
+from PyPDF2 import PdfReader
+
+from dataaudit.background import submit
+from .jobs import resume_waiting_jobs
+from .models import Resume
+
+logger = logging.getLogger(__name__)
+
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def hash_file(field_file) -> str:
+    """SHA-256 of a stored file, read in chunks."""
+    digest = hashlib.sha256()
+    with field_file.open('rb') as fh:
+        for chunk in iter(lambda: fh.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_pdf_text(fh):
+    """Yield the text of each PDF page in order."""
+    reader = PdfReader(fh)
+    for index, page in enumerate(reader.pages):
+        if index >= settings.RESUME_MAX_PAGES:
+            break
+        yield page.extract_text() or ''
+
+
+def iter_docx_text(fh):
+    """Yield the text of each DOCX paragraph in order."""
+    with zipfile.ZipFile(fh) as archive, archive.open('word/document.xml') as xml:
+        parts = []
+        for _, element in iterparse(xml, events=('end',)):
+            if element.tag == f'{_W_NS}t' and element.text:
+                parts.append(element.text)
+            elif element.tag == f'{_W_NS}tab':
+                parts.append('\t')
+            elif element.tag == f'{_W_NS}p':
+                yield ''.join(parts)
+                parts = []
+                element.clear()
+
+
+EXTRACTORS = {
+    '.pdf': iter_pdf_text,
+    '.docx': iter_docx_text,
+}
+
+
+def _collect(chunks) -> str:
+    """Join extracted chunks, stopping once RESUME_MAX_TEXT_CHARS is reached."""
+    limit = settings.RESUME_MAX_TEXT_CHARS
+    collected, size = [], 0
+    for chunk in chunks:
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        collected.append(chunk[:limit - size])
+        size += len(collected[-1]) + 1
+        if size >= limit:
+            break
+    return '\n'.join(collected)
+
+
+def extract_resume_text(resume_id: int, keep_text: bool = False) -> None:
+    """
+    Extract text from a resume's file unless it was already extracted for
+    this content. A file without a text layer (a scanned PDF) clears
+    content_text, since the old text belongs to the previous file, unless
+    keep_text says the client sent text along with this upload. Analyses
+    queued meanwhile are started afterwards.
+    """
+    _extract(resume_id, keep_text)
+    resume_waiting_jobs(resume_id)
+
+
+def _extract(resume_id: int, keep_text: bool) -> None:
+    resume = Resume.objects.filter(pk=resume_id).first()
+    if resume is None or not resume.file:
+        return
+
+    extractor = EXTRACTORS.get(os.path.splitext(resume.file.name)[1].lower())
+    if extractor is None:
+        Resume.objects.filter(pk=resume_id).update(extraction_status='UNSUPPORTED')
+        return
+
+    content_hash = hash_file(resume.file)
+    if content_hash == resume.content_hash and resume.extraction_status == 'DONE':
+        return
+
+    try:
+        with resume.file.open('rb') as fh:
+            text = _collect(extractor(fh))
+    except Exception:
+        logger.exception("Text extraction failed for resume %s", resume_id)
+        Resume.objects.filter(pk=resume_id).update(content_hash=content_hash, extraction_status='FAILED')
+        return
+
+    fields = {'content_hash': content_hash, 'extraction_status': 'DONE'}
+    if text or not keep_text:
+        fields['content_text'] = text
+    Resume.objects.filter(pk=resume_id).update(**fields)
+
+
+def schedule_extraction(resume, keep_text: bool = False) -> None:
+    """Extract resume's text on the background pool once the current transaction commits."""
+    transaction.on_commit(lambda: submit(extract_resume_text, resume.pk, keep_text))
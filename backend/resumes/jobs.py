@@ -0,0 +1,176 @@
+"""
+DB-backed queue for resume analysis.
+
+`analyze` only inserts an AnalysisJob row. The row is then picked up by
+either the in-process background pool (ANALYSIS_JOB_RUNNER = 'thread') or by
+`manage.py run_analysis_worker` processes polling the table ('external').
+Claiming is a conditional UPDATE on status, so any number of workers can
+share one queue without double-processing a job.
+
+Jobs whose worker died stay RUNNING until ANALYSIS_JOB_STALE_AFTER, then
+every drain puts them back in the queue, at most ANALYSIS_JOB_MAX_ATTEMPTS
+times before they are marked FAILED. With the thread runner nothing drains
+between enqueues, so polling a job that is stuck (see resume_stalled)
+starts a drain as well.
+
+A job waits in the queue while its resume's text is still being extracted
+(extraction_status PENDING); finishing the extraction starts a drain. If
+extraction failed, or is still pending after ANALYSIS_JOB_STALE_AFTER, the
+job fails instead of scoring missing or outdated text.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ai_engine.services import get_engine
+from dataaudit.background import submit
+from .models import AnalysisJob, Resume
+from .scoring import resume_term_vector
+
+logger = logging.getLogger(__name__)
+
+# A job still QUEUED this long after it was created has no drain working on it.
+QUEUED_GRACE = timedelta(seconds=30)
+
+
+def enqueue_analysis(resume, job_description: str) -> AnalysisJob:
+    """Queue an ATS analysis of resume against job_description."""
+    job = AnalysisJob.objects.create(
+        resume=resume,
+        user=resume.user,
+        job_description=job_description,
+    )
+    if settings.ANALYSIS_JOB_RUNNER == 'thread':
+        transaction.on_commit(lambda: submit(drain_queue))
+    return job
+
+
+def _extracting():
+    """Jobs whose resume file is still being extracted, and not for too long."""
+    cutoff = timezone.now() - timedelta(seconds=settings.ANALYSIS_JOB_STALE_AFTER)
+    return (
+        Q(resume__extraction_status='PENDING', resume__updated_at__gte=cutoff)
+        & ~Q(resume__file='')
+    )
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job whose resume is ready to RUNNING and return it, or None."""
+    candidates = (
+        AnalysisJob.objects.filter(status='QUEUED').exclude(_extracting())
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = AnalysisJob.objects.filter(pk=pk, status='QUEUED').update(
+            status='RUNNING',
+            progress=10,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return AnalysisJob.objects.select_related('resume').get(pk=pk)
+    return None
+
+
+def _extraction_error(resume):
+    if resume.extraction_status == 'FAILED':
+        return "Text could not be extracted from the resume file. Upload it again or paste the text."
+    if resume.extraction_status == 'PENDING' and resume.file:
+        return "Text extraction of the resume file did not finish. Upload it again or paste the text."
+    return None
+
+
+def run_job(job: AnalysisJob) -> None:
+    """Execute one claimed job and record its outcome on the job and resume."""
+    error = _extraction_error(job.resume)
+    if error:
+        job.status = 'FAILED'
+        job.error = error
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return
+    try:
+        resume = job.resume
+        analysis = get_engine().get_ats_score(
+            resume.content_text, job.job_description, resume_terms=resume_term_vector(resume),
+        )
+        AnalysisJob.objects.filter(pk=job.pk).update(progress=90)
+
+        with transaction.atomic():
+            # Re-read the row: the resume may have been edited or re-extracted
+            # while the model was answering.
+            resume = Resume.objects.select_for_update().get(pk=resume.pk)
+            resume.last_score = analysis['score']
+            resume.parsed_data = {**analysis, 'term_vector': resume.parsed_data.get('term_vector')}
+            resume.save(update_fields=['last_score', 'parsed_data', 'updated_at'])
+
+            job.status = 'SUCCEEDED'
+            job.progress = 100
+            job.result = analysis
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'progress', 'result', 'finished_at'])
+    except Exception as e:
+        logger.exception("Analysis job %s failed", job.pk)
+        job.status = 'FAILED'
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+
+
+def drain_queue(limit=None) -> int:
+    """Requeue stale jobs, then run queued jobs until the queue is empty (or limit is reached)."""
+    requeue_stale_jobs()
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Return RUNNING jobs whose worker died mid-flight to the queue, or fail
+    them once they have used up ANALYSIS_JOB_MAX_ATTEMPTS. Returns how many
+    were requeued.
+    """
+    now = timezone.now()
+    stale = AnalysisJob.objects.filter(
+        status='RUNNING', started_at__lt=now - timedelta(seconds=settings.ANALYSIS_JOB_STALE_AFTER),
+    )
+    stale.filter(attempts__gte=settings.ANALYSIS_JOB_MAX_ATTEMPTS).update(
+        status='FAILED',
+        error=f"Gave up after {settings.ANALYSIS_JOB_MAX_ATTEMPTS} attempts",
+        finished_at=now,
+    )
+    return stale.update(
+        status='QUEUED',
+        progress=0,
+        started_at=None,
+    )
+
+
+def resume_stalled(job: AnalysisJob) -> None:
+    """With the thread runner, start a drain if job is queued or running with nobody working on it."""
+    if settings.ANALYSIS_JOB_RUNNER != 'thread':
+        return
+    now = timezone.now()
+    stuck = (
+        (job.status == 'QUEUED' and job.created_at < now - QUEUED_GRACE)
+        or (job.status == 'RUNNING' and job.started_at < now - timedelta(seconds=settings.ANALYSIS_JOB_STALE_AFTER))
+    )
+    if stuck:
+        submit(drain_queue)
+
+
+def resume_waiting_jobs(resume_id: int) -> None:
+    """Called when a resume's extraction finishes: drain jobs that waited for it (thread runner)."""
+    if settings.ANALYSIS_JOB_RUNNER == 'thread' and AnalysisJob.objects.filter(resume_id=resume_id, status='QUEUED').exists():
+        submit(drain_queue)
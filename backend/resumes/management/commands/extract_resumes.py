@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from resumes.extraction import extract_resume_text
+from resumes.models import Resume
+
+
+class Command(BaseCommand):
+    help = "Extract text from resume files that have not been extracted yet (e.g. uploaded before extraction existed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resume', type=int, action='append', dest='resumes', help="Limit to this resume id (repeatable).")
+        parser.add_argument('--failed', action='store_true', help="Also retry resumes whose extraction failed.")
+
+    def handle(self, *args, **options):
+        resumes = Resume.objects.exclude(file='').order_by('id')
+        if options['resumes']:
+            resumes = resumes.filter(pk__in=options['resumes'])
+        else:
+            resumes = resumes.filter(extraction_status__in=['PENDING', 'FAILED'] if options['failed'] else ['PENDING'])
+
+        resume_ids = list(resumes.values_list('id', flat=True))
+        for resume_id in resume_ids:
+            # Rows from before extraction only have the text their client sent.
+            extract_resume_text(resume_id, keep_text=True)
+        failed = Resume.objects.filter(pk__in=resume_ids, extraction_status='FAILED').count()
+        self.stdout.write(f"Extracted {len(resume_ids)} resume(s), {failed} failed.")
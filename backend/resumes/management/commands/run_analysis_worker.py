@@ -0,0 +1,40 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from resumes.jobs import drain_queue, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued resume analysis jobs from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help="Concurrent jobs per worker process.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            while True:
+                processed = sum(pool.map(lambda _: self._drain(), range(threads)))
+                if processed:
+                    self.stdout.write(f"Processed {processed} job(s).")
+                if options['once']:
+                    break
+                if not processed:
+                    # The next drain also requeues jobs that went stale meanwhile.
+                    time.sleep(options['poll_interval'])
+
+    @staticmethod
+    def _drain():
+        try:
+            return drain_queue()
+        finally:
+            connections.close_all()
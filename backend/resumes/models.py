@@ -2,14 +2,30 @@ from django.db import models
 from django.contrib.auth.models import User
 
 class Resume(models.Model):
+    EXTRACTION_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+        ('UNSUPPORTED', 'Unsupported'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumes')
     file = models.FileField(upload_to='resumes/')
     content_text = models.TextField(blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    extraction_status = models.CharField(max_length=12, choices=EXTRACTION_CHOICES, default='PENDING')
     parsed_data = models.JSONField(default=dict, blank=True)
     last_score = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Most recently updated scored resumes per user (dashboard rolling score);
+            # last_score in the key lets the score filter run on the index alone.
+            models.Index(fields=['user', '-updated_at', 'last_score'], name='resume_user_updated_score_idx'),
+        ]
+
     def __str__(self):
         return f"Resume - {self.user.username} - {self.created_at.date()}"
 
@@ -22,3 +38,30 @@ class ResumeVersion(models.Model):
 
     class Meta:
         ordering = ['-version_number']
+
+class AnalysisJob(models.Model):
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='analysis_jobs')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='analysis_jobs')
+    job_description = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    progress = models.PositiveSmallIntegerField(default=0)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Analysis job {self.pk} - {self.status}"
@@ -0,0 +1,96 @@
+"""
+Batch ATS scoring of one resume against many job applications.
+
+Calls fan out over a bounded thread pool so the LLM sees at most
+AI_BATCH_CONCURRENCY requests from one batch. Retries and per-call
+deadlines come from the engine's CallPolicy, and the whole batch stops
+waiting after AI_BATCH_DEADLINE seconds, so it finishes within the worker
+timeout. Applications that fail or are not scored in time are reported
+rather than failing the whole batch. Worker threads never touch the
+database: inputs are loaded up front and every score is written back in one
+bulk_update.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from ai_engine.keywords import term_vector
+from ai_engine.services import get_engine
+from tracking.models import JobApplication
+from users.stats import bump_stats_version
+from .models import Resume
+
+
+def resume_term_vector(resume) -> dict:
+    """
+    Keyword vector for resume.content_text, cached in parsed_data["term_vector"]
+    under the file's content_hash. Extraction sets a new hash whenever it
+    replaces the text; edits to content_text alone call forget_term_vector.
+    """
+    cached = (resume.parsed_data or {}).get('term_vector') or {}
+    if 'terms' in cached and cached.get('hash') == resume.content_hash:
+        return cached['terms']
+
+    terms = term_vector(resume.content_text)
+    resume.parsed_data = {**(resume.parsed_data or {}), 'term_vector': {'hash': resume.content_hash, 'terms': terms}}
+    Resume.objects.filter(pk=resume.pk).update(parsed_data=resume.parsed_data)
+    return terms
+
+
+def forget_term_vector(resume) -> None:
+    """Drop the cached keyword vector after content_text changed without a new file."""
+    if 'term_vector' in (resume.parsed_data or {}):
+        resume.parsed_data = {k: v for k, v in resume.parsed_data.items() if k != 'term_vector'}
+        Resume.objects.filter(pk=resume.pk).update(parsed_data=resume.parsed_data)
+
+
+def _score(resume_text: str, job_description: str, resume_terms: dict) -> dict:
+    return get_engine().get_ats_score(resume_text, job_description, raise_errors=True, resume_terms=resume_terms)
+
+
+def score_applications(resume, applications):
+    """
+    Score resume against each application, persist match_score, and return
+    (ranked, errors). ranked is sorted by score, best match first.
+    """
+    applications = list(applications)
+    if not applications:
+        return [], []
+
+    resume_terms = resume_term_vector(resume)
+    workers = min(settings.AI_BATCH_CONCURRENCY, len(applications))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ats-batch')
+    futures = [
+        (app, pool.submit(_score, resume.content_text, app.job_description, resume_terms))
+        for app in applications
+    ]
+    wait([future for _, future in futures], timeout=settings.AI_BATCH_DEADLINE)
+    # Unstarted calls are dropped; ones in flight end within their own call deadline.
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    ranked, errors, scored_apps = [], [], []
+    for app, future in futures:
+        if not future.done() or future.cancelled():
+            errors.append({'application_id': app.pk, 'error': 'Not scored before the batch deadline'})
+            continue
+        try:
+            analysis = future.result()
+            app.match_score = int(analysis['score'])
+        except Exception as e:
+            errors.append({'application_id': app.pk, 'error': str(e)})
+            continue
+        scored_apps.append(app)
+        ranked.append({
+            'application_id': app.pk,
+            'company': app.company,
+            'job_title': app.job_title,
+            'score': app.match_score,
+            'missing_keywords': analysis.get('missing_keywords', []),
+        })
+
+    JobApplication.objects.bulk_update(scored_apps, ['match_score'])
+    if scored_apps:
+        # bulk_update skips model signals; match_score shows on the dashboard.
+        bump_stats_version(resume.user_id)
+    ranked.sort(key=lambda row: row['score'], reverse=True)
+    return ranked, errors
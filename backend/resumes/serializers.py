@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Resume, ResumeVersion
+from .models import AnalysisJob, Resume, ResumeVersion
 
 class ResumeVersionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,4 +11,19 @@ class ResumeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Resume
-        fields = ['id', 'file', 'content_text', 'parsed_data', 'last_score', 'versions', 'created_at']
+        fields = [
+            'id', 'file', 'content_text', 'content_hash', 'extraction_status',
+            'parsed_data', 'last_score', 'versions', 'created_at',
+        ]
+        # parsed_data holds analysis results and the cached keyword vector; only the server writes it.
+        read_only_fields = ['content_hash', 'extraction_status', 'parsed_data']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['parsed_data'] = {k: v for k, v in (data['parsed_data'] or {}).items() if k != 'term_vector'}
+        return data
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnalysisJob
+        fields = ['id', 'resume', 'status', 'progress', 'result', 'error', 'created_at', 'started_at', 'finished_at']
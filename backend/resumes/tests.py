@@ -1,3 +1,319 @@
-from django.test import TestCase
+import io
+import logging
+import tempfile
+import time
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ai_engine import services
+from ai_engine.tests import FAST_POLICY, FakeLLMServer, fake_engine
+from tracking.models import JobApplication
+from .extraction import extract_resume_text
+from .jobs import claim_next_job, drain_queue, enqueue_analysis, requeue_stale_jobs, resume_waiting_jobs, run_job
+from .models import AnalysisJob, Resume
+from .scoring import resume_term_vector
+
+
+def make_pdf(lines) -> bytes:
+    """A one-page PDF showing each line as text; no lines gives a page without a text layer."""
+    stream = ''.join(f'BT /F1 12 Tf 72 {720 - 20 * i} Td ({line}) Tj ET\n' for i, line in enumerate(lines)).encode()
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'endstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b'%010d 00000 n \n' % offset)
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(paragraphs) -> bytes:
+    ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document xmlns:w="{ns}"><w:body>{body}</w:body></w:document>')
+    return out.getvalue()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ResumeFileAccessTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.resume = Resume.objects.create(user=self.owner, file=SimpleUploadedFile('cv.pdf', b'%PDF-1.4 resume'))
+        self.url = self.resume.file.url
+
+    def test_only_the_owner_can_download(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 resume')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_traversal_cannot_reach_private_files(self):
+        name = self.resume.file.name
+        for path in (f'/media/thumbnails/../{name}', f'/media/./{name}', f'/media/thumbnails//../{name}'):
+            self.assertEqual(self.client.get(path).status_code, 404, path)
+
+    def test_api_token_is_accepted(self):
+        token = Token.objects.create(user=self.owner)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 200)
+
+
+# AI_LOCAL_ONLY answers every analysis with the keyword scorer, so no LLM is needed.
+@override_settings(AI_LOCAL_ONLY=True, ANALYSIS_JOB_RUNNER='external')
+class AnalysisJobTests(TestCase):
+    job_description = 'Senior Python engineer: Django, PostgreSQL, Docker and AWS.'
+
+    def setUp(self):
+        self.user = User.objects.create_user('jobs', password='pw')
+        self.resume = Resume.objects.create(
+            user=self.user, file='cv.pdf', extraction_status='DONE',
+            content_text='Python developer. Built Django services on PostgreSQL, shipped with Docker.',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _make_stale(self, job):
+        started = timezone.now() - timedelta(hours=1)
+        AnalysisJob.objects.filter(pk=job.pk).update(started_at=started)
+
+    def test_analyze_queues_a_job_that_a_drain_runs(self):
+        response = self.client.post(
+            f'/api/v1/resumes/{self.resume.pk}/analyze/', {'job_description': self.job_description}, format='json',
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'QUEUED')
+
+        self.assertEqual(drain_queue(), 1)
+        job = AnalysisJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual((job.status, job.progress, job.attempts), ('SUCCEEDED', 100, 1))
+        self.resume.refresh_from_db()
+        self.assertEqual(self.resume.last_score, job.result['score'])
+        self.assertEqual(self.client.get(response.data['status_url']).data['status'], 'SUCCEEDED')
+
+    def test_claim_takes_the_oldest_unclaimed_job(self):
+        first = enqueue_analysis(self.resume, self.job_description)
+        second = enqueue_analysis(self.resume, self.job_description)
+        AnalysisJob.objects.filter(pk=first.pk).update(status='RUNNING')
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+
+    def test_run_job_keeps_concurrent_resume_edits(self):
+        enqueue_analysis(self.resume, self.job_description)
+        job = claim_next_job()
+        Resume.objects.filter(pk=self.resume.pk).update(content_hash='replaced-meanwhile')
+        run_job(job)
+        self.resume.refresh_from_db()
+        self.assertEqual(self.resume.content_hash, 'replaced-meanwhile')
+        self.assertGreater(self.resume.last_score, 0)
+
+    @override_settings(ANALYSIS_JOB_MAX_ATTEMPTS=2)
+    def test_stale_jobs_are_retried_then_failed(self):
+        enqueue_analysis(self.resume, self.job_description)
+        job = claim_next_job()
+        self._make_stale(job)
+        self.assertEqual(requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'QUEUED')
+
+        job = claim_next_job()
+        self._make_stale(job)
+        self.assertEqual(requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+        self.assertEqual(drain_queue(), 0)
+
+    def test_jobs_wait_for_text_extraction(self):
+        Resume.objects.filter(pk=self.resume.pk).update(extraction_status='PENDING')
+        job = enqueue_analysis(self.resume, self.job_description)
+        self.assertEqual(drain_queue(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'QUEUED')
+
+        Resume.objects.filter(pk=self.resume.pk).update(extraction_status='DONE')
+        with self.settings(ANALYSIS_JOB_RUNNER='thread'), mock.patch('resumes.jobs.submit') as submit:
+            resume_waiting_jobs(self.resume.pk)
+        submit.assert_called_once_with(drain_queue)
+        self.assertEqual(drain_queue(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'SUCCEEDED')
+
+    def test_failed_or_abandoned_extraction_fails_the_job(self):
+        Resume.objects.filter(pk=self.resume.pk).update(extraction_status='FAILED')
+        failed = enqueue_analysis(self.resume, self.job_description)
+        self.assertEqual(drain_queue(), 1)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, 'FAILED')
+        self.assertIn("could not be extracted", failed.error)
+
+        Resume.objects.filter(pk=self.resume.pk).update(
+            extraction_status='PENDING', updated_at=timezone.now() - timedelta(hours=1),
+        )
+        abandoned = enqueue_analysis(self.resume, self.job_description)
+        self.assertEqual(drain_queue(), 1)
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.status, 'FAILED')
+        self.assertIn("did not finish", abandoned.error)
+        self.assertEqual(Resume.objects.get(pk=self.resume.pk).last_score, 0)
+
+
+@override_settings(AI_LOCAL_ONLY=True)
+class BatchScoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('batch', password='pw')
+        self.resume = Resume.objects.create(
+            user=self.user, file='cv.pdf', extraction_status='DONE',
+            content_text='Python developer: Django, PostgreSQL, Docker, AWS and React.',
+        )
+        self.close = JobApplication.objects.create(
+            user=self.user, job_title='Backend', company='Acme',
+            job_description='Python engineer with Django, PostgreSQL and Docker experience.',
+        )
+        self.far = JobApplication.objects.create(
+            user=self.user, job_title='iOS', company='Fruit',
+            job_description='iOS developer: Swift, SwiftUI, Xcode and Objective-C.',
+        )
+        JobApplication.objects.create(user=self.user, job_title='No description', company='Blank')
+        self.url = f'/api/v1/resumes/{self.resume.pk}/batch-score/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_ranks_applications_and_stores_match_scores(self):
+        data = self.client.post(self.url, {}, format='json').data
+        self.assertEqual([row['application_id'] for row in data['results']], [self.close.pk, self.far.pk])
+        self.assertEqual(data['errors'], [])
+        self.close.refresh_from_db()
+        self.assertEqual(self.close.match_score, data['results'][0]['score'])
+
+    def test_application_ids_are_validated(self):
+        for bad in ('1,2', ['1'], [1, 'x'], [True]):
+            response = self.client.post(self.url, {'application_ids': bad}, format='json')
+            self.assertEqual(response.status_code, 400, bad)
+        data = self.client.post(self.url, {'application_ids': [self.far.pk]}, format='json').data
+        self.assertEqual([row['application_id'] for row in data['results']], [self.far.pk])
+
+    @override_settings(**FAST_POLICY, AI_BATCH_DEADLINE=0.3)
+    def test_deadline_returns_what_was_scored(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.addCleanup(setattr, services, '_engine', services._engine)
+        with FakeLLMServer({'delay': 1, 'content': '{"score": 90}'}) as server:
+            services._engine = fake_engine(server)
+            started = time.monotonic()
+            data = self.client.post(self.url, {}, format='json').data
+            self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(data['results'], [])
+        self.assertEqual(
+            sorted(row['application_id'] for row in data['errors']), sorted([self.close.pk, self.far.pk]),
+        )
+        self.assertEqual(data['errors'][0]['error'], 'Not scored before the batch deadline')
+
+
+class ResumeTermVectorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('vector', password='pw')
+        self.resume = Resume.objects.create(
+            user=self.user, file='cv.pdf', content_hash='a' * 64, content_text='Python and Django',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/v1/resumes/{self.resume.pk}/'
+
+    def test_vector_is_cached_under_the_content_hash(self):
+        self.assertIn('django', resume_term_vector(self.resume))
+        with self.assertNumQueries(0):
+            resume_term_vector(self.resume)
+
+        self.resume.content_hash, self.resume.content_text = 'b' * 64, 'Rust and Kafka'
+        self.assertIn('kafka', resume_term_vector(self.resume))
+
+    def test_api_hides_and_protects_the_vector(self):
+        resume_term_vector(self.resume)
+        response = self.client.patch(self.url, {
+            'parsed_data': {'term_vector': {'hash': 'a' * 64, 'terms': {'forged': 1}}},
+            'content_text': 'Swift and Xcode',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('term_vector', response.data['parsed_data'])
+
+        self.resume.refresh_from_db()
+        self.assertNotIn('term_vector', self.resume.parsed_data)
+        self.assertIn('swift', resume_term_vector(self.resume))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ResumeExtractionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('extract', password='pw')
+
+    def _resume(self, name, content, **fields):
+        return Resume.objects.create(user=self.user, file=SimpleUploadedFile(name, content), **fields)
+
+    def test_pdf_and_docx_text(self):
+        pdf = self._resume('cv.pdf', make_pdf(['Senior Python developer', 'Django and PostgreSQL']))
+        docx = self._resume('cv.docx', make_docx(['Data engineer', 'Airflow, Spark']))
+        for resume, expected in ((pdf, 'Senior Python developer\nDjango and PostgreSQL'),
+                                 (docx, 'Data engineer\nAirflow, Spark')):
+            extract_resume_text(resume.pk)
+            resume.refresh_from_db()
+            self.assertEqual(resume.extraction_status, 'DONE')
+            self.assertEqual(resume.content_text, expected)
+            self.assertEqual(len(resume.content_hash), 64)
+
+    def test_text_is_capped(self):
+        resume = self._resume('long.docx', make_docx(['word ' * 100] * 10))
+        with override_settings(RESUME_MAX_TEXT_CHARS=250):
+            extract_resume_text(resume.pk)
+        resume.refresh_from_db()
+        self.assertLessEqual(len(resume.content_text), 250)
+
+    def test_replacement_without_text_layer_clears_old_text(self):
+        resume = self._resume('cv.pdf', make_pdf(['Old resume text']))
+        extract_resume_text(resume.pk)
+        resume.file.save('scan.pdf', ContentFile(make_pdf([])))
+        extract_resume_text(resume.pk)
+        resume.refresh_from_db()
+        self.assertEqual((resume.extraction_status, resume.content_text), ('DONE', ''))
+
+        Resume.objects.filter(pk=resume.pk).update(content_text='Typed by the user', content_hash='')
+        extract_resume_text(resume.pk, keep_text=True)
+        resume.refresh_from_db()
+        self.assertEqual(resume.content_text, 'Typed by the user')
+
+    def test_command_backfills_pending_resumes(self):
+        pending = self._resume('cv.docx', make_docx(['Backfilled']))
+        unsupported = self._resume('cv.txt', b'plain text')
+        call_command('extract_resumes', stdout=io.StringIO())
+        pending.refresh_from_db()
+        unsupported.refresh_from_db()
+        self.assertEqual((pending.extraction_status, pending.content_text), ('DONE', 'Backfilled'))
+        self.assertEqual(unsupported.extraction_status, 'UNSUPPORTED')
@@ -1,7 +1,10 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import ResumeViewSet
+from .views import AnalysisJobDetailView, ResumeViewSet
 
 router = DefaultRouter()
 router.register(r'', ResumeViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('jobs/<int:pk>/', AnalysisJobDetailView.as_view(), name='analysis-job-detail'),
+] + router.urls
@@ -1,9 +1,14 @@
-from rest_framework import viewsets, permissions, status
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import generics, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Resume
-from .serializers import ResumeSerializer
-from ai_engine.services import AICareerEngine
+from .extraction import schedule_extraction
+from .jobs import enqueue_analysis, resume_stalled
+from .models import AnalysisJob, Resume
+from .scoring import forget_term_vector, score_applications
+from .serializers import AnalysisJobSerializer, ResumeSerializer
+from tracking.models import JobApplication
 
 class ResumeViewSet(viewsets.ModelViewSet):
     queryset = Resume.objects.all()
@@ -14,7 +19,19 @@ class ResumeViewSet(viewsets.ModelViewSet):
         return Resume.objects.filter(user=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        resume = serializer.save(user=self.request.user)
+        schedule_extraction(resume, keep_text='content_text' in serializer.validated_data)
+
+    def perform_update(self, serializer):
+        if 'file' in serializer.validated_data:
+            # Analyses wait for the new file's text instead of scoring the old one.
+            resume = serializer.save(extraction_status='PENDING')
+        else:
+            resume = serializer.save()
+        if 'file' in serializer.validated_data:
+            schedule_extraction(resume, keep_text='content_text' in serializer.validated_data)
+        elif 'content_text' in serializer.validated_data:
+            forget_term_vector(resume)
 
     @action(detail=True, methods=['post'])
     def analyze(self, request, pk=None):
@@ -23,12 +40,44 @@ class ResumeViewSet(viewsets.ModelViewSet):
         
         if not job_description:
             return Response({"error": "Job description is required"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        engine = AICareerEngine()
-        analysis = engine.get_ats_score(resume.content_text, job_description)
-        
-        resume.last_score = analysis['score']
-        resume.parsed_data = analysis
-        resume.save()
-        
-        return Response(analysis)
+
+        job = enqueue_analysis(resume, job_description)
+        status_url = request.build_absolute_uri(reverse('analysis-job-detail', args=[job.pk]))
+        return Response(
+            {"job_id": job.pk, "status": job.status, "status_url": status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": status_url},
+        )
+
+    @action(detail=True, methods=['post'], url_path='batch-score')
+    def batch_score(self, request, pk=None):
+        """Score this resume against many applications (all with a job description by default)."""
+        resume = self.get_object()
+        applications = JobApplication.objects.filter(user=request.user).exclude(job_description='')
+
+        application_ids = request.data.get('application_ids')
+        if application_ids is not None:
+            if not isinstance(application_ids, list) or not all(
+                isinstance(pk, int) and not isinstance(pk, bool) for pk in application_ids
+            ):
+                return Response(
+                    {"error": "application_ids must be a list of integers"}, status=status.HTTP_400_BAD_REQUEST,
+                )
+            applications = applications.filter(pk__in=application_ids)
+
+        applications = applications.order_by('-created_at')[:settings.AI_BATCH_MAX_APPLICATIONS]
+        ranked, errors = score_applications(resume, applications)
+        return Response({"results": ranked, "errors": errors})
+
+
+class AnalysisJobDetailView(generics.RetrieveAPIView):
+    serializer_class = AnalysisJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return AnalysisJob.objects.filter(user=self.request.user)
+
+    def get_object(self):
+        job = super().get_object()
+        resume_stalled(job)
+        return job
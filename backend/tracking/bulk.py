@@ -0,0 +1,163 @@
+"""
+Bulk import and export of job applications as CSV or JSON Lines.
+
+Imports read the uploaded file as a text stream one row at a time, so
+memory use depends on TRACKING_IMPORT_BATCH_SIZE, not on the file size.
+Rows are validated by JobApplicationImportSerializer. Each batch of valid
+rows is written with one bulk_create. Invalid rows are skipped and
+reported by line number. Exports stream rows straight from a server-side
+iterator into a StreamingHttpResponse.
+
+bulk_create bypasses model signals, so an import finishes by rebuilding
+the user's dashboard stats.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from users.stats import rebuild_dashboard_stats
+from .models import JobApplication
+from .serializers import JobApplicationImportSerializer
+
+FORMATS = ('csv', 'jsonl')
+
+EXPORT_FIELDS = [
+    'id', 'job_title', 'company', 'status', 'job_description', 'match_score',
+    'applied_at', 'created_at', 'updated_at',
+]
+
+
+class ImportFileError(ValueError):
+    """The upload cannot be read at all, as opposed to individual bad rows."""
+
+
+def detect_format(filename: str, requested: str = '') -> str:
+    kind = (requested or filename.rsplit('.', 1)[-1]).lower()
+    if kind in ('ndjson', 'json'):
+        kind = 'jsonl'
+    if kind not in FORMATS:
+        raise ImportFileError(f"Unsupported import format {kind!r}; use one of: {', '.join(FORMATS)}")
+    return kind
+
+
+# ── Import ──────────────────────────────────────────────────────────────────
+
+def iter_csv_rows(text):
+    """Yield (line number, row dict) with blank cells dropped so field defaults apply."""
+    reader = csv.DictReader(text)
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in (None, '')}
+
+
+def iter_jsonl_rows(text):
+    """Yield (line number, object) for each non-blank line; unparsable lines yield an error string."""
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, f"Invalid JSON: {e.msg}"
+            continue
+        yield line_no, row if isinstance(row, dict) else "Each line must be a JSON object"
+
+
+ROW_READERS = {'csv': iter_csv_rows, 'jsonl': iter_jsonl_rows}
+
+
+def import_applications(user, fileobj, kind: str) -> dict:
+    """
+    Import every valid row of fileobj (a binary file) for user. Returns
+    counts and a per-row error report, capped at TRACKING_IMPORT_MAX_ERRORS.
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    rows = islice(ROW_READERS[kind](text), settings.TRACKING_IMPORT_MAX_ROWS + 1)
+    validator = JobApplicationImportSerializer()
+    report = {'created': 0, 'failed': 0, 'errors': [], 'truncated': False}
+
+    def add_error(line_no, detail):
+        report['failed'] += 1
+        if len(report['errors']) < settings.TRACKING_IMPORT_MAX_ERRORS:
+            report['errors'].append({'line': line_no, 'errors': detail})
+
+    seen = 0
+    try:
+        while not report['truncated']:
+            batch, consumed = [], 0
+            for line_no, row in islice(rows, settings.TRACKING_IMPORT_BATCH_SIZE):
+                consumed += 1
+                seen += 1
+                if seen > settings.TRACKING_IMPORT_MAX_ROWS:
+                    report['truncated'] = True
+                    break
+                if isinstance(row, str):
+                    add_error(line_no, {'non_field_errors': [row]})
+                    continue
+                try:
+                    batch.append(JobApplication(user=user, **validator.run_validation(row)))
+                except ValidationError as e:
+                    add_error(line_no, e.detail)
+            if batch:
+                with transaction.atomic():
+                    JobApplication.objects.bulk_create(batch)
+                report['created'] += len(batch)
+            if not consumed:
+                break
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Could not read the file after {report['created']} rows: {e}") from e
+    finally:
+        text.detach()
+        if report['created']:
+            rebuild_dashboard_stats(user.id)
+    return report
+
+
+# ── Export ──────────────────────────────────────────────────────────────────
+
+class _Echo:
+    """File-like object whose write() returns the text, for csv.writer in a generator."""
+
+    def write(self, value):
+        return value
+
+
+def _export_rows(user):
+    return (
+        JobApplication.objects.filter(user=user)
+        .order_by('-created_at')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=2000)
+    )
+
+
+def _joined(lines, size=500):
+    """Group lines into larger chunks; one write per row is slow through WSGI."""
+    while True:
+        chunk = ''.join(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_csv(user):
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow(row) for row in _export_rows(user))
+    yield writer.writerow(EXPORT_FIELDS)
+    yield from _joined(lines)
+
+
+def export_jsonl(user):
+    lines = (json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + '\n' for row in _export_rows(user))
+    yield from _joined(lines)
+
+
+EXPORTERS = {
+    'csv': (export_csv, 'text/csv'),
+    'jsonl': (export_jsonl, 'application/x-ndjson'),
+}
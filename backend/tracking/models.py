@@ -20,6 +20,14 @@ class JobApplication(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Per-user lists (cursor pages, id as tiebreak) and recent/daily windows, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='tracking_app_user_created_idx'),
+            # Per-user status counts and status filters
+            models.Index(fields=['user', 'status'], name='tracking_app_user_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.job_title} at {self.company}"
 
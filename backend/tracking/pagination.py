@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ApplicationCursorPagination(CursorPagination):
+    """
+    Newest-first cursor pages. Cursors stay stable while applications are
+    added, and each page is one indexed range query instead of an OFFSET scan.
+    The id tiebreak keeps the order total when timestamps are equal (bulk
+    imports), so no row is skipped or repeated across pages.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
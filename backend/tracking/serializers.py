@@ -1,12 +1,29 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from .models import JobApplication, Interview
 
+class SparseFieldsetMixin:
+    """
+    Limit output to the comma-separated names in the `fields` query
+    parameter, e.g. ?fields=id,company,status. Unknown names are ignored.
+    Only applies to reads: on writes, dropped fields would silently skip
+    validation of the submitted data.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request and request.method in SAFE_METHODS else None
+        if requested:
+            keep = {name.strip() for name in requested.split(',')}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
 class InterviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Interview
         fields = '__all__'
 
-class JobApplicationSerializer(serializers.ModelSerializer):
+class JobApplicationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     interviews = InterviewSerializer(many=True, read_only=True)
 
     class Meta:
@@ -14,6 +31,23 @@ class JobApplicationSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['user']
 
+class JobApplicationListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """List representation: no job description text and an interview count instead of nested interviews."""
+    interview_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = JobApplication
+        fields = [
+            'id', 'company', 'job_title', 'status', 'match_score', 'applied_at',
+            'interview_count', 'created_at', 'updated_at',
+        ]
+
+class JobApplicationImportSerializer(serializers.ModelSerializer):
+    """Validates one imported row; see tracking.bulk."""
+    class Meta:
+        model = JobApplication
+        fields = ['job_title', 'company', 'status', 'job_description', 'match_score', 'applied_at']
+
 class RecentApplicationSerializer(serializers.ModelSerializer):
     """Lightweight serializer used exclusively by the dashboard stats endpoint."""
     class Meta:
@@ -1,3 +1,112 @@
+import csv
+import io
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import JobApplication, Interview
+
+
+class JobApplicationViewSetTests(TestCase):
+    url = '/api/v1/tracking/'
+
+    def setUp(self):
+        self.user = User.objects.create_user('track', 'track@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(12):
+            app = JobApplication.objects.create(
+                user=self.user, job_title=f'Role {i}', company='Acme', job_description='x' * 5000,
+            )
+            Interview.objects.create(application=app, date=timezone.now())
+
+    def test_list_is_paginated_and_light(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url, {'page_size': 5}).data
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNotNone(data['next'])
+        self.assertEqual(data['results'][0]['job_title'], 'Role 11')
+        self.assertEqual(data['results'][0]['interview_count'], 1)
+        self.assertNotIn('job_description', data['results'][0])
+
+        seen = [row['id'] for row in data['results']]
+        while data['next']:
+            data = self.client.get(data['next']).data
+            seen += [row['id'] for row in data['results']]
+        self.assertEqual(len(set(seen)), 12)
+
+    def test_pages_are_stable_when_timestamps_tie(self):
+        JobApplication.objects.filter(user=self.user).update(created_at=timezone.now())
+        seen, data = [], self.client.get(self.url, {'page_size': 5}).data
+        seen += [row['id'] for row in data['results']]
+        while data['next']:
+            data = self.client.get(data['next']).data
+            seen += [row['id'] for row in data['results']]
+        expected = list(JobApplication.objects.filter(user=self.user).order_by('-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_sparse_fieldset(self):
+        data = self.client.get(self.url, {'fields': 'id,status'}).data
+        self.assertEqual(set(data['results'][0]), {'id', 'status'})
+
+    def test_sparse_fieldset_is_ignored_on_writes(self):
+        response = self.client.post(f'{self.url}?fields=id', {'company': 'Acme'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('job_title', response.data)
+
+        app = JobApplication.objects.filter(user=self.user).first()
+        response = self.client.patch(f'{self.url}{app.pk}/?fields=id', {'status': 'OFFER'}, format='json')
+        self.assertEqual(response.data['status'], 'OFFER')
+
+    def test_detail_prefetches_interviews(self):
+        app = JobApplication.objects.filter(user=self.user).first()
+        with self.assertNumQueries(2):
+            data = self.client.get(f'{self.url}{app.pk}/').data
+        self.assertEqual(len(data['interviews']), 1)
+        self.assertEqual(len(data['job_description']), 5000)
+
+
+class JobApplicationBulkTests(TestCase):
+    url = '/api/v1/tracking/'
+
+    def setUp(self):
+        self.user = User.objects.create_user('bulk', 'bulk@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _upload(self, name, content):
+        upload = SimpleUploadedFile(name, content.encode('utf-8'))
+        return self.client.post(f'{self.url}import/', {'file': upload}, format='multipart')
+
+    def test_csv_import_reports_bad_rows(self):
+        content = 'job_title,company,status,applied_at\n' + ''.join(
+            f'Role {i},Acme,APPLIED,2024-01-0{i % 9 + 1}\n' for i in range(2500)
+        ) + 'Broken,,BOGUS,\n'
+        with self.settings(TRACKING_IMPORT_BATCH_SIZE=1000):
+            response = self._upload('apps.csv', content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2500, 1))
+        self.assertEqual(response.data['errors'][0]['line'], 2502)
+        self.assertEqual(set(response.data['errors'][0]['errors']), {'company', 'status'})
+        self.assertEqual(self.user.dashboard_stats.status_counts['APPLIED'], 2500)
+
+    def test_jsonl_round_trip(self):
+        JobApplication.objects.create(user=self.user, job_title='Dev', company='Acme', job_description='Line one\nline two')
+        response = self.client.get(f'{self.url}export/', {'type': 'jsonl'})
+        exported = b''.join(response.streaming_content).decode()
+
+        JobApplication.objects.all().delete()
+        response = self._upload('apps.jsonl', exported + 'not json\n')
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual(JobApplication.objects.get().job_description, 'Line one\nline two')
 
-# Create your tests here.
+    def test_csv_export(self):
+        JobApplication.objects.create(user=self.user, job_title='Dev, Senior', company='Acme')
+        response = self.client.get(f'{self.url}export/')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'job_title', 'company'])
+        self.assertEqual(rows[1][1], 'Dev, Senior')
@@ -1,14 +1,59 @@
-from rest_framework import viewsets, permissions
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from .bulk import EXPORTERS, ImportFileError, detect_format, import_applications
 from .models import JobApplication
-from .serializers import JobApplicationSerializer
+from .pagination import ApplicationCursorPagination
+from .serializers import JobApplicationListSerializer, JobApplicationSerializer
 
 class JobApplicationViewSet(viewsets.ModelViewSet):
     queryset = JobApplication.objects.all()
     serializer_class = JobApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ApplicationCursorPagination
 
     def get_queryset(self):
-        return JobApplication.objects.filter(user=self.request.user)
+        queryset = JobApplication.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            return queryset.defer('job_description').annotate(interview_count=Count('interviews'))
+        return queryset.prefetch_related('interviews')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return JobApplicationListSerializer
+        return JobApplicationSerializer
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_applications(self, request):
+        """
+        Create applications from an uploaded CSV or JSON Lines `file`. The type
+        comes from the file extension, or from ?type=csv|jsonl.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload a CSV or JSON Lines file as 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            kind = detect_format(upload.name, request.query_params.get('type', ''))
+            report = import_applications(request.user, upload.file, kind)
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream all of the user's applications as ?type=csv (default) or jsonl."""
+        kind = request.query_params.get('type', 'csv')
+        if kind not in EXPORTERS:
+            return Response({"error": f"Unsupported export type {kind!r}"}, status=status.HTTP_400_BAD_REQUEST)
+        generate, content_type = EXPORTERS[kind]
+        response = StreamingHttpResponse(generate(request.user), content_type=content_type)
+        filename = f"applications-{timezone.localdate()}.{kind}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,167 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from resumes.models import Resume
+from tracking.models import JobApplication, Interview
+
+INDEXED_MODELS = (JobApplication, Resume)
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the seeded created_at/updated_at values."""
+    fields = [
+        field for model in models for field in model._meta.fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def hot_queries():
+    """The per-user access paths the Meta.indexes are meant to serve."""
+    since = timezone.now() - timedelta(days=30)
+    return [
+        ('application list page', lambda uid: JobApplication.objects.filter(user_id=uid).order_by('-created_at')[:50]),
+        ('applications by status', lambda uid: JobApplication.objects.filter(user_id=uid).values('status').annotate(n=Count('id')).order_by()),
+        ('applications last 30 days', lambda uid: JobApplication.objects.filter(user_id=uid, created_at__gte=since).values_list('created_at', flat=True)),
+        ('recent resume scores', lambda uid: Resume.objects.filter(user_id=uid, last_score__gt=0).order_by('-updated_at').values_list('id', 'last_score')[:3]),
+        ('interviews per user', lambda uid: Interview.objects.filter(application__user_id=uid).values('id')),
+    ]
+
+
+def explain(queryset, phase) -> str:
+    if connection.vendor == 'sqlite':
+        # sqlite3 caches prepared statements by SQL text, and a cached EXPLAIN
+        # keeps reporting the plan from before DROP INDEX. The phase comment
+        # gives each phase its own statement.
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql} -- {phase}', params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+    if connection.vendor == 'postgresql':
+        return queryset.explain(analyze=True)
+    return queryset.explain()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large synthetic dataset inside a transaction, then report query plans and "
+        "timings for the per-user hot queries with and without the composite indexes. "
+        "Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--applications', type=int, default=200, help="Applications per user.")
+        parser.add_argument('--resumes', type=int, default=10, help="Resumes per user.")
+        parser.add_argument('--repeat', type=int, default=50, help="Timed runs per query.")
+        parser.add_argument('--plans', action='store_true', help="Print the full query plans.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user_ids = self.seed(options)
+                samples = random.Random(1).sample(user_ids, min(len(user_ids), options['repeat']))
+                with_idx = self.measure('with indexes', samples, options)
+                self.drop_indexes()
+                without_idx = self.measure('without indexes', samples, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f"\n{'query':<28}{'indexed ms':>12}{'unindexed ms':>14}{'speedup':>9}")
+        for label, ms in with_idx.items():
+            slow = without_idx[label]
+            self.stdout.write(f"{label:<28}{ms:>12.3f}{slow:>14.3f}{slow / ms if ms else 0:>8.1f}x")
+
+    def seed(self, options):
+        rng = random.Random(0)
+        now = timezone.now()
+        stamp = int(time.time())
+        self.stdout.write(
+            f"Seeding {options['users']} users x {options['applications']} applications "
+            f"and {options['resumes']} resumes each..."
+        )
+        users = User.objects.bulk_create(
+            User(username=f'bench-{stamp}-{i}', password='!') for i in range(options['users'])
+        )
+        user_ids = [user.pk for user in users]
+        statuses = [key for key, _ in JobApplication.STATUS_CHOICES]
+
+        # bulk_create skips the dashboard-stats signals, which is what we want here.
+        with explicit_timestamps(JobApplication, Resume):
+            for uid in user_ids:
+                apps = []
+                for i in range(options['applications']):
+                    created = now - timedelta(days=rng.uniform(0, 730))
+                    apps.append(JobApplication(
+                        user_id=uid, job_title=f'Role {i}', company=f'Company {i % 40}',
+                        status=rng.choice(statuses), created_at=created, updated_at=created,
+                    ))
+                apps = JobApplication.objects.bulk_create(apps, batch_size=500)
+                Interview.objects.bulk_create(
+                    [Interview(application_id=app.pk, date=app.created_at)
+                     for app in apps if app.status in ('INTERVIEWING', 'OFFER')],
+                    batch_size=500,
+                )
+                Resume.objects.bulk_create([
+                    Resume(
+                        user_id=uid, file=f'resumes/bench-{i}.pdf',
+                        last_score=rng.choice([0, rng.randint(1, 100)]),
+                        created_at=now, updated_at=now - timedelta(minutes=rng.randint(0, 100000)),
+                    )
+                    for i in range(options['resumes'])
+                ])
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return user_ids
+
+    def drop_indexes(self):
+        # Dropped inside the benchmark transaction, so the rollback restores them.
+        # Raw DROP INDEX rather than a schema editor, which SQLite refuses to open
+        # inside an atomic block; the statement itself is transactional.
+        template = connection.SchemaEditorClass.sql_delete_index
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    cursor.execute(template % {'name': quote(index.name), 'table': quote(model._meta.db_table)})
+
+    def measure(self, phase, user_ids, options):
+        self.stdout.write(f"\n── {phase} ──")
+        timings = {}
+        for label, build in hot_queries():
+            plan = explain(build(user_ids[0]), phase)
+            if options['plans']:
+                self.stdout.write(f"{label}:\n{plan}\n")
+            else:
+                self.stdout.write(f"{label}: {' | '.join(line.strip() for line in plan.splitlines())}")
+
+            runs = []
+            for uid in user_ids:
+                started = time.perf_counter()
+                list(build(uid))
+                runs.append((time.perf_counter() - started) * 1000)
+            timings[label] = statistics.median(runs)
+        return timings
@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from users.stats import check_dashboard_stats, rebuild_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user dashboard counters from scratch, or check them against the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help="Limit to this user id (repeatable).")
+        parser.add_argument('--check', action='store_true', help="Report drifted rows instead of rebuilding; exits 1 on drift.")
+
+    def handle(self, *args, **options):
+        user_ids = options['users'] or User.objects.order_by('id').values_list('id', flat=True)
+
+        if options['check']:
+            drifted = 0
+            for user_id in user_ids:
+                fields = check_dashboard_stats(user_id)
+                if fields:
+                    drifted += 1
+                    self.stdout.write(f"user {user_id}: {', '.join(fields)}")
+            if drifted:
+                raise CommandError(f"{drifted} user(s) have drifted dashboard stats.")
+            self.stdout.write("Dashboard stats are consistent.")
+            return
+
+        rebuilt = 0
+        for user_id in user_ids:
+            rebuild_dashboard_stats(user_id)
+            rebuilt += 1
+        self.stdout.write(f"Rebuilt dashboard stats for {rebuilt} user(s).")
@@ -22,6 +22,28 @@ class Profile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Profile - {self.subscription_tier}"
 
+class DashboardStats(models.Model):
+    """
+    Per-user dashboard counters, maintained incrementally by users.signals.
+    Rebuild or verify with `manage.py rebuild_dashboard_stats`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='dashboard_stats')
+    resume_count = models.PositiveIntegerField(default=0)
+    application_count = models.PositiveIntegerField(default=0)
+    interview_count = models.PositiveIntegerField(default=0)
+    status_counts = models.JSONField(default=dict)
+    # {"YYYY-MM-DD": applications created that day}, pruned to the last DAILY_WINDOW_DAYS
+    daily_applications = models.JSONField(default=dict)
+    top_resume_score = models.IntegerField(default=0)
+    # [[resume_id, score], ...] for the 3 most recently updated resumes with a score
+    recent_scores = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    DAILY_WINDOW_DAYS = 30
+
+    def __str__(self):
+        return f"Dashboard stats - {self.user.username}"
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from resumes.models import Resume
+from tracking.models import JobApplication, Interview
+from . import stats
+
+
+# Remember the persisted values each instance was loaded with, so a later
+# save can be turned into a delta without re-reading the row.
+@receiver(post_init, sender=JobApplication)
+def remember_application_status(sender, instance, **kwargs):
+    instance._stats_status = instance.status
+
+@receiver(post_init, sender=Resume)
+def remember_resume_score(sender, instance, **kwargs):
+    instance._stats_score = instance.last_score
+
+
+@receiver(post_save, sender=JobApplication)
+def application_saved(sender, instance, created, **kwargs):
+    stats.application_changed(instance, previous_status=None if created else instance._stats_status)
+    instance._stats_status = instance.status
+
+@receiver(post_delete, sender=JobApplication)
+def application_deleted(sender, instance, **kwargs):
+    stats.application_changed(instance, deleted=True)
+
+
+@receiver(post_save, sender=Interview)
+def interview_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.interviews_changed(instance.application.user_id, 1)
+
+@receiver(pre_delete, sender=Interview)
+def interview_deleted(sender, instance, **kwargs):
+    # pre_delete: when an application delete cascades here, the application
+    # row (and with it the owning user id) is still readable.
+    stats.interviews_changed(instance.application.user_id, -1)
+
+
+@receiver(post_save, sender=Resume)
+def resume_saved(sender, instance, created, **kwargs):
+    stats.resume_changed(instance, previous_score=None if created else instance._stats_score, created=created)
+    instance._stats_score = instance.last_score
+
+@receiver(post_delete, sender=Resume)
+def resume_deleted(sender, instance, **kwargs):
+    stats.resume_changed(instance, deleted=True)
@@ -0,0 +1,227 @@
+"""
+Incremental maintenance of DashboardStats.
+
+Signal handlers in users.signals call the *_changed helpers below. Each
+applies a delta to the user's row under select_for_update, inside the same
+transaction as the write that triggered it. If a user has no stats row
+yet, the row is built from scratch the first time it is needed. Writes that
+bypass model signals, such as QuerySet.update() or bulk_create(), must call
+rebuild_dashboard_stats() for the affected users.
+
+Every change also bumps a per-user version number in the default cache
+once the transaction commits. When that cache is shared by all workers,
+DashboardStatsView caches its payload and derives its ETag from that
+version, so an unchanged dashboard is served without touching the
+database.
+"""
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from resumes.models import Resume
+from tracking.models import JobApplication, Interview
+from .models import DashboardStats
+
+RECENT_SCORES = 3
+
+
+def _day_key(created_at) -> str:
+    return str(timezone.localdate(created_at))
+
+
+# ── Payload versions ────────────────────────────────────────────────────────
+
+def _version_key(user_id) -> str:
+    return f"dashboard:version:{user_id}"
+
+
+def stats_version(user_id) -> int:
+    """Current payload version for a user, seeded from the clock if absent."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # A clock seed keeps versions moving forward even if the counter is
+        # evicted, so a payload cached under an older number is never reused.
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_stats_version(user_id) -> None:
+    """Invalidate the user's cached dashboard once the current transaction commits."""
+    def bump():
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            stats_version(user_id)
+    transaction.on_commit(bump)
+
+
+def payload_cache_key(user_id, version) -> str:
+    # The date is part of the key because weeklyActivity shifts at midnight.
+    return f"dashboard:payload:{user_id}:{version}:{timezone.localdate()}"
+
+
+def _prune_days(daily: dict) -> dict:
+    cutoff = str(timezone.localdate() - timedelta(days=DashboardStats.DAILY_WINDOW_DAYS - 1))
+    return {day: count for day, count in daily.items() if day >= cutoff and count > 0}
+
+
+def _compute_resume_fields(user_id) -> dict:
+    agg = Resume.objects.filter(user_id=user_id).aggregate(count=Count('id'), top=Max('last_score'))
+    recent = (
+        Resume.objects.filter(user_id=user_id, last_score__gt=0)
+        .order_by('-updated_at')
+        .values_list('id', 'last_score')[:RECENT_SCORES]
+    )
+    return {
+        'resume_count': agg['count'],
+        'top_resume_score': agg['top'] or 0,
+        'recent_scores': [list(row) for row in recent],
+    }
+
+
+def compute_dashboard_stats(user_id) -> dict:
+    """Every DashboardStats field computed directly from the source tables."""
+    apps = JobApplication.objects.filter(user_id=user_id)
+    status_counts = {key: 0 for key, _ in JobApplication.STATUS_CHOICES}
+    for row in apps.values('status').annotate(count=Count('id')):
+        status_counts[row['status']] = row['count']
+
+    since = timezone.now() - timedelta(days=DashboardStats.DAILY_WINDOW_DAYS)
+    daily = {}
+    for created_at in apps.filter(created_at__gte=since).values_list('created_at', flat=True):
+        key = _day_key(created_at)
+        daily[key] = daily.get(key, 0) + 1
+
+    return {
+        'application_count': sum(status_counts.values()),
+        'interview_count': Interview.objects.filter(application__user_id=user_id).count(),
+        'status_counts': status_counts,
+        'daily_applications': _prune_days(daily),
+        **_compute_resume_fields(user_id),
+    }
+
+
+def rebuild_dashboard_stats(user_id) -> DashboardStats:
+    """Recompute a user's stats row from scratch."""
+    bump_stats_version(user_id)
+    with transaction.atomic():
+        stats, _ = DashboardStats.objects.update_or_create(
+            user_id=user_id, defaults=compute_dashboard_stats(user_id),
+        )
+    return stats
+
+
+def check_dashboard_stats(user_id) -> list:
+    """Names of the stored fields that disagree with a fresh computation."""
+    stats = DashboardStats.objects.filter(user_id=user_id).first()
+    expected = compute_dashboard_stats(user_id)
+    if stats is None:
+        return sorted(expected)
+    mismatched = []
+    for field, value in expected.items():
+        stored = getattr(stats, field)
+        if field == 'daily_applications':
+            stored = _prune_days(stored)
+        if stored != value:
+            mismatched.append(field)
+    return mismatched
+
+
+def get_dashboard_stats(user_id) -> DashboardStats:
+    return DashboardStats.objects.filter(user_id=user_id).first() or rebuild_dashboard_stats(user_id)
+
+
+def _locked(user_id):
+    return DashboardStats.objects.select_for_update().filter(user_id=user_id).first()
+
+
+# ── Applications ────────────────────────────────────────────────────────────
+
+def application_changed(app, previous_status=None, deleted=False) -> None:
+    """
+    Apply one application insert (previous_status None), status change or
+    delete. On insert and update a missing stats row is rebuilt, since the
+    rebuild already sees this write. On delete a missing row is left alone.
+    """
+    bump_stats_version(app.user_id)
+    with transaction.atomic():
+        stats = _locked(app.user_id)
+        if stats is None:
+            if not deleted:
+                rebuild_dashboard_stats(app.user_id)
+            return
+
+        counts = stats.status_counts
+        daily = stats.daily_applications
+        if deleted:
+            stats.application_count = max(stats.application_count - 1, 0)
+            counts[app.status] = max(counts.get(app.status, 0) - 1, 0)
+            key = _day_key(app.created_at)
+            if key in daily:
+                daily[key] -= 1
+        elif previous_status is None:
+            stats.application_count += 1
+            counts[app.status] = counts.get(app.status, 0) + 1
+            key = _day_key(app.created_at)
+            daily[key] = daily.get(key, 0) + 1
+        elif previous_status != app.status:
+            counts[previous_status] = max(counts.get(previous_status, 0) - 1, 0)
+            counts[app.status] = counts.get(app.status, 0) + 1
+        else:
+            return
+
+        stats.daily_applications = _prune_days(daily)
+        stats.save()
+
+
+def interviews_changed(user_id, delta: int) -> None:
+    bump_stats_version(user_id)
+    with transaction.atomic():
+        stats = _locked(user_id)
+        if stats is None:
+            if delta > 0:
+                rebuild_dashboard_stats(user_id)
+            return
+        stats.interview_count = max(stats.interview_count + delta, 0)
+        stats.save(update_fields=['interview_count', 'updated_at'])
+
+
+# ── Resumes ─────────────────────────────────────────────────────────────────
+
+def resume_changed(resume, previous_score=None, created=False, deleted=False) -> None:
+    """Apply one resume insert, save or delete to the counts and the top and rolling scores."""
+    bump_stats_version(resume.user_id)
+    with transaction.atomic():
+        stats = _locked(resume.user_id)
+        if stats is None:
+            if not deleted:
+                rebuild_dashboard_stats(resume.user_id)
+            return
+
+        if created:
+            stats.resume_count += 1
+        elif deleted:
+            stats.resume_count = max(stats.resume_count - 1, 0)
+
+        score = 0 if deleted else resume.last_score
+        recent = [row for row in stats.recent_scores if row[0] != resume.pk]
+        was_recent = len(recent) != len(stats.recent_scores)
+        old_score = resume.last_score if deleted else previous_score
+        lost_top = old_score is not None and old_score > score and old_score >= stats.top_resume_score
+
+        if score > 0:
+            # Saving a resume bumps its updated_at, so it becomes the most recent score.
+            stats.recent_scores = [[resume.pk, score]] + recent[:RECENT_SCORES - 1]
+            stats.top_resume_score = max(stats.top_resume_score, score)
+        if lost_top or (score <= 0 and was_recent):
+            # The next-best score, or the resume that slides into the rolling
+            # window, can only be found in the table.
+            for field, value in _compute_resume_fields(resume.user_id).items():
+                setattr(stats, field, value)
+        stats.save()
@@ -1,3 +1,138 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from resumes.models import Resume
+from tracking.models import JobApplication, Interview
+from .stats import check_dashboard_stats, rebuild_dashboard_stats
+
+
+class DashboardStatsViewTests(TestCase):
+    url = '/api/v1/users/stats/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('dash', 'dash@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _seed(self, apps_per_status):
+        for status, count in apps_per_status.items():
+            for i in range(count):
+                app = JobApplication.objects.create(
+                    user=self.user, job_title=f'{status} {i}', company='Acme', status=status,
+                )
+                if status == 'INTERVIEWING':
+                    Interview.objects.create(application=app, date=timezone.now())
+
+    def test_stats_payload(self):
+        self._seed({'APPLIED': 3, 'INTERVIEWING': 2, 'OFFER': 1})
+        two_days_ago = timezone.now() - timedelta(days=2)
+        JobApplication.objects.filter(status='APPLIED').update(created_at=two_days_ago)
+        # QuerySet.update() skips the signals that keep the counters current.
+        rebuild_dashboard_stats(self.user.id)
+        Resume.objects.create(user=self.user, file='a.pdf', last_score=60)
+        Resume.objects.create(user=self.user, file='b.pdf', last_score=80)
+        Resume.objects.create(user=self.user, file='c.pdf', last_score=0)
+
+        data = self.client.get(self.url).data
+
+        self.assertEqual(data['resumeCount'], 3)
+        self.assertEqual(data['applicationCount'], 6)
+        self.assertEqual(data['interviewCount'], 2)
+        self.assertEqual(data['topResumeScore'], 80)
+        self.assertEqual(data['intelligenceScore'], 70.0)
+        self.assertEqual(data['successRate'], round(100 / 6, 1))
+        self.assertEqual(data['statusBreakdown'], {
+            'WISHLIST': 0, 'APPLIED': 3, 'INTERVIEWING': 2, 'OFFER': 1, 'REJECTED': 0,
+        })
+        counts = [day['count'] for day in data['weeklyActivity']]
+        self.assertEqual(counts, [0, 0, 0, 0, 3, 0, 3])
+        self.assertEqual(len(data['recentApplications']), 5)
+
+    # File-based caches are shared by every process on the host, like Redis.
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp(),
+    }})
+    def test_payload_is_cached_until_a_write(self):
+        cache.clear()
+        self._seed({'APPLIED': 2})
+        first = self.client.get(self.url)
+        etag = first['ETag']
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.data, first.data)
+        self.assertEqual(not_modified.status_code, 304)
+
+        app = JobApplication.objects.filter(user=self.user).first()
+        app.job_title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            app.save()
+        fresh = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], etag)
+        self.assertIn('Renamed', [row['job_title'] for row in fresh.data['recentApplications']])
+
+    def test_process_local_cache_revalidates_against_content(self):
+        self._seed({'APPLIED': 2})
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A write whose version bump only reached another worker's cache.
+        JobApplication.objects.filter(user=self.user).update(job_title='Renamed')
+        fresh = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn('Renamed', [row['job_title'] for row in fresh.data['recentApplications']])
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        with self.assertRaisesMessage(SystemCheckError, 'dataaudit.E001'):
+            call_command('check', deploy=True, tags=['caches'])
+
+    def test_query_count_is_constant(self):
+        self._seed({'APPLIED': 2})
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+        self._seed({'WISHLIST': 20, 'INTERVIEWING': 10, 'REJECTED': 15})
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+
+class DashboardStatsMaintenanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('counts', 'counts@example.com', 'pw')
+
+    def test_signals_keep_stats_consistent(self):
+        app = JobApplication.objects.create(user=self.user, job_title='Dev', company='Acme', status='APPLIED')
+        other = JobApplication.objects.create(user=self.user, job_title='Ops', company='Acme', status='WISHLIST')
+        Interview.objects.create(application=app, date=timezone.now())
+        app.status = 'INTERVIEWING'
+        app.save()
+        first = Resume.objects.create(user=self.user, file='a.pdf', last_score=90)
+        second = Resume.objects.create(user=self.user, file='b.pdf', last_score=40)
+        first.last_score = 50
+        first.save()
+        self.assertEqual(check_dashboard_stats(self.user.id), [])
+
+        other.delete()
+        app.delete()
+        second.delete()
+        self.assertEqual(check_dashboard_stats(self.user.id), [])
+        stats = self.user.dashboard_stats
+        self.assertEqual((stats.application_count, stats.interview_count, stats.top_resume_score), (0, 0, 50))
+
+    def test_check_reports_drift(self):
+        JobApplication.objects.create(user=self.user, job_title='Dev', company='Acme')
+        JobApplication.objects.filter(user=self.user).update(status='OFFER')
+        self.assertEqual(check_dashboard_stats(self.user.id), ['status_counts'])
+        rebuild_dashboard_stats(self.user.id)
+        self.assertEqual(check_dashboard_stats(self.user.id), [])
@@ -1,15 +1,22 @@
+import hashlib
+import json
 from rest_framework import viewsets, permissions, status, views
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from django.db.models import Count, Avg, Max
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
 from django.utils import timezone
 from datetime import timedelta
+from dataaudit.caches import is_shared
 from .models import Profile
+from .stats import get_dashboard_stats, payload_cache_key, stats_version
 from .serializers import ProfileSerializer
-from resumes.models import Resume
-from tracking.models import JobApplication, Interview
+from tracking.models import JobApplication
 from tracking.serializers import RecentApplicationSerializer
 
 
@@ -65,62 +72,74 @@ class LoginView(views.APIView):
 
 
 class DashboardStatsView(views.APIView):
+    """
+    Dashboard payload, cached per user under a version number that every
+    application, interview and resume write bumps (see users.stats). The
+    ETag carries the same version, so a client revalidating an unchanged
+    dashboard gets a 304 without any database query.
+
+    Versions are only trustworthy in a cache every worker shares. With a
+    process-local cache the payload is rebuilt on each request and the ETag
+    is a hash of its content instead.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         user = request.user
+        payload = None
+        if is_shared():
+            version = stats_version(user.id)
+            etag = quote_etag(f"{user.id}.{version}.{timezone.localdate()}")
+        else:
+            payload = self.build_payload(user)
+            body = json.dumps(payload, sort_keys=True, cls=DjangoJSONEncoder).encode()
+            etag = quote_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
 
-        # ── Core counts ─────────────────────────────────────────────────────────
-        resume_count = Resume.objects.filter(user=user).count()
-        app_count = JobApplication.objects.filter(user=user).count()
-        interview_count = Interview.objects.filter(application__user=user).count()
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            if payload is None:
+                key = payload_cache_key(user.id, version)
+                payload = cache.get(key)
+                if payload is None:
+                    payload = self.build_payload(user)
+                    cache.set(key, payload, timeout=settings.DASHBOARD_CACHE_TTL)
+            response = Response(payload)
+
+        response['ETag'] = etag
+        # Browsers must revalidate every time: the version changes on writes,
+        # not on a schedule. private keeps shared proxies from storing it.
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
+
+    @staticmethod
+    def build_payload(user) -> dict:
+        # ── Counters: one read of the incrementally maintained stats row ────────
+        stats = get_dashboard_stats(user.id)
+        app_count = stats.application_count
+        status_keys = [key for key, _ in JobApplication.STATUS_CHOICES]
+        status_breakdown = {key: stats.status_counts.get(key, 0) for key in status_keys}
 
         # ── Intelligence Score: average of last 3 resume scores (0–100) ─────────
-        recent_scores = (
-            Resume.objects.filter(user=user, last_score__gt=0)
-            .order_by('-updated_at')
-            .values_list('last_score', flat=True)[:3]
-        )
+        recent_scores = [score for _, score in stats.recent_scores]
         if recent_scores:
             intel_score = round(sum(recent_scores) / len(recent_scores), 1)
         else:
             intel_score = 0.0
 
-        # ── Top resume score ─────────────────────────────────────────────────────
-        top_resume_agg = Resume.objects.filter(user=user).aggregate(top=Max('last_score'))
-        top_resume_score = top_resume_agg['top'] or 0
-
-        # ── Application status breakdown ─────────────────────────────────────────
-        status_qs = (
-            JobApplication.objects.filter(user=user)
-            .values('status')
-            .annotate(count=Count('id'))
-        )
-        status_breakdown = {
-            'WISHLIST': 0, 'APPLIED': 0, 'INTERVIEWING': 0, 'OFFER': 0, 'REJECTED': 0
-        }
-        for entry in status_qs:
-            status_breakdown[entry['status']] = entry['count']
-
         # ── Success rate: (OFFER count / total apps) × 100 ──────────────────────
         offer_count = status_breakdown.get('OFFER', 0)
         success_rate = round((offer_count / app_count) * 100, 1) if app_count > 0 else 0.0
 
         # ── Weekly activity: applications per day for last 7 days ────────────────
-        today = timezone.now().date()
-        weekly_activity = []
+        today = timezone.localdate()
+        days = [today - timedelta(days=i) for i in range(6, -1, -1)]
         day_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        for i in range(6, -1, -1):
-            day = today - timedelta(days=i)
-            count = JobApplication.objects.filter(
-                user=user,
-                created_at__date=day
-            ).count()
-            weekly_activity.append({
-                'day': day_labels[day.weekday()],
-                'date': str(day),
-                'count': count,
-            })
+        weekly_activity = [
+            {'day': day_labels[day.weekday()], 'date': str(day), 'count': stats.daily_applications.get(str(day), 0)}
+            for day in days
+        ]
 
         # ── Recent applications (last 5) ─────────────────────────────────────────
         recent_apps_qs = (
@@ -129,17 +148,17 @@ class DashboardStatsView(views.APIView):
         )
         recent_apps_data = RecentApplicationSerializer(recent_apps_qs, many=True).data
 
-        return Response({
-            'resumeCount': resume_count,
+        return {
+            'resumeCount': stats.resume_count,
             'applicationCount': app_count,
-            'interviewCount': interview_count,
+            'interviewCount': stats.interview_count,
             'intelligenceScore': intel_score,
-            'topResumeScore': top_resume_score,
+            'topResumeScore': stats.top_resume_score,
             'successRate': success_rate,
             'statusBreakdown': status_breakdown,
             'weeklyActivity': weekly_activity,
-            'recentApplications': recent_apps_data,
-        })
+            'recentApplications': list(recent_apps_data),
+        }
 
 
 class ProfileViewSet(viewsets.ModelViewSet):
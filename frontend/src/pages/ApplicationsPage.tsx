@@ -16,6 +16,7 @@ const ApplicationsPage = () => {
     const { token } = useAuth();
     const [apps, setApps] = useState<Application[]>([]);
     const [loading, setLoading] = useState(true);
+    const [nextPage, setNextPage] = useState<string | null>(null);
     const [showAdd, setShowAdd] = useState(false);
     const [formData, setFormData] = useState({
         company: '',
@@ -28,13 +29,18 @@ const ApplicationsPage = () => {
         fetchApps();
     }, []);
 
-    const fetchApps = async () => {
+    const fetchApps = async (pageUrl?: string) => {
         try {
-            const response = await fetch('/api/v1/tracking/', {
+            // Cursor-paginated list; only the columns this page renders are requested.
+            const url = pageUrl || '/api/v1/tracking/?fields=id,company,job_title,status,applied_at';
+            const response = await fetch(url, {
                 headers: { 'Authorization': `Token ${token}` }
             });
             const data = await response.json();
-            if (response.ok) setApps(data);
+            if (response.ok) {
+                setApps(prev => pageUrl ? [...prev, ...data.results] : data.results);
+                setNextPage(data.next);
+            }
         } catch (err) {
             console.error('Failed to fetch applications');
         } finally {
@@ -176,6 +182,15 @@ const ApplicationsPage = () => {
                         </table>
                     </div>
 
+                    {nextPage && (
+                        <button
+                            onClick={() => fetchApps(nextPage)}
+                            className="mt-6 w-full py-4 border border-white/10 rounded-2xl font-black uppercase tracking-widest text-xs text-gray-400 hover:bg-white/[0.04] transition-all"
+                        >
+                            Load More
+                        </button>
+                    )}
+
                 </div>
             </main>
         </div>
@@ -8,24 +8,51 @@ const LinkedInPage = () => {
     const [profileText, setProfileText] = useState('');
     const [optimizing, setOptimizing] = useState(false);
     const [result, setResult] = useState<any>(null);
+    const [draft, setDraft] = useState('');
 
     const handleOptimize = async () => {
         if (!profileText) return;
         setOptimizing(true);
         setResult(null);
+        setDraft('');
 
         try {
-            const response = await fetch('/api/v1/ai/linkedin-optimize/', {
+            // Server-sent events: "token" events carry the model output as it is
+            // written, then a single "result" event carries the parsed profile.
+            const response = await fetch('/api/v1/ai/linkedin-optimize/stream/', {
                 method: 'POST',
                 headers: {
                     'Authorization': `Token ${token}`,
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream'
                 },
                 body: JSON.stringify({ current_profile: profileText })
             });
-            const data = await response.json();
-            if (response.ok) {
-                setResult(data);
+            if (!response.ok || !response.body) return;
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary: number;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const message = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let event = 'message';
+                    let data = '';
+                    for (const line of message.split('\n')) {
+                        if (line.startsWith('event: ')) event = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    }
+                    if (event === 'token') {
+                        setDraft(prev => prev + JSON.parse(data));
+                    } else if (event === 'result') {
+                        setResult(JSON.parse(data));
+                    }
+                }
             }
         } catch (err) {
             console.error('Optimization failed');
@@ -104,9 +131,13 @@ const LinkedInPage = () => {
                                 </div>
                             ) : (
                                 <div className="h-full border-2 border-dashed border-white/5 rounded-[40px] flex flex-center items-center justify-center p-12 text-center">
-                                    <p className="text-gray-600 uppercase font-black tracking-[0.2em] text-[10px] leading-relaxed">
-                                        Await Command. <br /> Input profile data to generate optimized network presence.
-                                    </p>
+                                    {optimizing && draft ? (
+                                        <pre className="w-full text-left text-xs text-gray-500 font-mono whitespace-pre-wrap break-words">{draft}</pre>
+                                    ) : (
+                                        <p className="text-gray-600 uppercase font-black tracking-[0.2em] text-[10px] leading-relaxed">
+                                            Await Command. <br /> Input profile data to generate optimized network presence.
+                                        </p>
+                                    )}
                                 </div>
                             )}
                         </div>
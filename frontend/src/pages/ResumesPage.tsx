@@ -11,6 +11,10 @@ interface Resume {
     created_at: string;
 }
 
+// Give up polling an analysis job after this long; the job keeps running server-side.
+const ANALYSIS_POLL_TIMEOUT_MS = 3 * 60 * 1000;
+const ANALYSIS_POLL_INTERVAL_MS = 1500;
+
 const ResumesPage = () => {
     const { token } = useAuth();
     const [resumes, setResumes] = useState<Resume[]>([]);
@@ -20,6 +24,7 @@ const ResumesPage = () => {
     const [jobDescription, setJobDescription] = useState('');
     const [analyzing, setAnalyzing] = useState(false);
     const [analysisResult, setAnalysisResult] = useState<any>(null);
+    const [analysisError, setAnalysisError] = useState<string | null>(null);
 
     useEffect(() => {
         fetchResumes();
@@ -66,6 +71,8 @@ const ResumesPage = () => {
 
     const handleAnalyze = async (id: number) => {
         setAnalyzing(true);
+        setAnalysisResult(null);
+        setAnalysisError(null);
         try {
             const response = await fetch(`/api/v1/resumes/${id}/analyze/`, {
                 method: 'POST',
@@ -76,12 +83,37 @@ const ResumesPage = () => {
                 body: JSON.stringify({ job_description: jobDescription })
             });
             const data = await response.json();
-            if (response.ok) {
-                setAnalysisResult(data);
-                fetchResumes();
+            if (!response.ok) {
+                setAnalysisError(data.error || 'Analysis could not be started.');
+                return;
+            }
+            // The analysis runs as a background job; poll it until it finishes or we time out.
+            let job = data;
+            const deadline = Date.now() + ANALYSIS_POLL_TIMEOUT_MS;
+            while (job.status === 'QUEUED' || job.status === 'RUNNING') {
+                if (Date.now() > deadline) {
+                    setAnalysisError('Analysis is taking longer than expected. Check back in a few minutes.');
+                    return;
+                }
+                await new Promise(resolve => setTimeout(resolve, ANALYSIS_POLL_INTERVAL_MS));
+                const poll = await fetch(data.status_url, {
+                    headers: { 'Authorization': `Token ${token}` }
+                });
+                if (!poll.ok) {
+                    setAnalysisError('Lost track of the analysis job.');
+                    return;
+                }
+                job = await poll.json();
             }
+            if (job.status === 'SUCCEEDED') {
+                setAnalysisResult(job.result);
+            } else {
+                setAnalysisError(job.error || 'Analysis failed.');
+            }
+            fetchResumes();
         } catch (err) {
             console.error('Analysis failed');
+            setAnalysisError('Network error — could not reach the server.');
         } finally {
             setAnalyzing(false);
         }
@@ -165,6 +197,12 @@ const ResumesPage = () => {
                                                 </div>
                                             </div>
 
+                                            {analysisError && (
+                                                <div className="mt-8 p-6 bg-red-600/10 border border-red-600/30 rounded-2xl text-left text-sm text-red-400 font-medium">
+                                                    {analysisError}
+                                                </div>
+                                            )}
+
                                             {analysisResult && (
                                                 <div className="mt-8 p-8 bg-red-600/5 border border-red-600/20 rounded-3xl text-left">
                                                     <div className="flex items-center gap-3 mb-6">